@@ -42,7 +42,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy==2.3.1,kivymd==2.0.1,nltk==3.6.7,pyttsx3==2.98,starlette==0.19.1,cython==0.29.36,sdl2_ttf=2.20.2 
+requirements = python3,kivy==2.3.1,kivymd==2.0.1,nltk==3.9.1,pyttsx3==2.98,starlette==0.19.1,cython==0.29.36,sdl2_ttf=2.20.2 
 
 requirements.source.numpy = pip
 requirements.source.sympy = pip
@@ -18,15 +18,20 @@ from kivy.uix.popup import Popup
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.metrics import dp
 from kivy.properties import ObjectProperty, StringProperty
-from datetime import datetime
+from datetime import datetime, timedelta
 import calendar
+import itertools
 from kivymd.uix.card import MDCard
 from kivy.app import App
 from kivy.uix.widget import Widget
 from kivy.core.clipboard import Clipboard  # Import Clipboard
 
+RECENT_EXPENSES = 5  # Number of expenses shown in the recent list
+PERIOD_DAYS = {"1w": 7, "1m": 30, "3m": 90, "6m": 180, "1y": 365, "all": None}  # Expense story periods
+
 
 class ExpenseTrackerScreen(Screen):
     def __init__(self, user_id=None, **kwargs):
@@ -34,6 +39,11 @@ class ExpenseTrackerScreen(Screen):
         self.user_id = user_id
         self.db = DatabaseManager()
         print(f"Initialized ExpenseTrackerScreen with User ID: {self.user_id}")  # Debugging
+        self.recent_expenses = None  # Rows in the recent list, newest first; None until first loaded
+        self.recent_items = []  # List items matching recent_expenses
+        self.recent_user_id = None
+        self.empty_item = None
+        self.db.subscribe("expenses", self.on_expense_changed)  # Patch the list instead of reloading it
         self.selected_date = datetime.now()
 
         # Main layout with ScrollView for dynamic content
@@ -172,35 +182,104 @@ class ExpenseTrackerScreen(Screen):
         self.add_widget(self.nav_drawer)
 
     def on_enter(self):
-        """Called when the screen is entered - refresh the expenses list"""
-        self.refresh_expenses_list()
+        """Called when the screen is entered - load the recent list once, change events keep it current"""
+        user_id = App.get_running_app().current_user_id
+        if self.recent_expenses is None or self.recent_user_id != user_id:
+            self.refresh_expenses_list()
 
     def refresh_expenses_list(self):
         """Update the recent expenses list display"""
         self.expenses_list.clear_widgets()
+        self.empty_item = None
         user_id = App.get_running_app().current_user_id  # Get the current user ID from the app instance
         print(f"Current User ID: {user_id}")  # Debugging print
-        expenses = self.db.get_expenses_by_user_id(user_id)  # Fetch expenses for the current user
+        with self.db.action("ExpenseTracker.refresh_expenses_list"):
+            expenses = self.db.get_expenses_page(user_id, limit=RECENT_EXPENSES)
         print(f"Fetched Expenses: {expenses}")  # Debugging print
 
-        if not expenses:
-            self.expenses_list.add_widget(OneLineListItem(
+        self.recent_user_id = user_id
+        self.recent_expenses = []
+        self.recent_items = []
+        for exp in expenses:
+            self.insert_recent_expense(len(self.recent_expenses), exp)
+        self.update_empty_state()
+
+    def create_expense_item(self, exp):
+        """Build the list item for one expense"""
+        icon = IconLeftWidget(
+            icon=self.get_icon_for_expense_type(exp['exp_type'])
+        )
+        item = TwoLineIconListItem(
+            text=f"{exp['exp_name']} - ₹{exp['exp_amount']}",
+            secondary_text=f"{exp['exp_type']} | {exp['exp_date']}",
+            on_release=lambda x, e=exp: self.show_expense_details(e)
+        )
+        item.add_widget(icon)
+        return item
+
+    def insert_recent_expense(self, position, exp):
+        """Show an expense at `position` (0 = top) of the recent list"""
+        if self.empty_item is not None:
+            self.expenses_list.remove_widget(self.empty_item)
+            self.empty_item = None
+        item = self.create_expense_item(exp)
+        self.recent_expenses.insert(position, exp)
+        self.recent_items.insert(position, item)
+        # Kivy counts widget indices from the bottom of the list
+        self.expenses_list.add_widget(item, index=len(self.recent_items) - 1 - position)
+
+    def remove_recent_expense(self, position):
+        """Remove the expense at `position` from the recent list"""
+        self.recent_expenses.pop(position)
+        self.expenses_list.remove_widget(self.recent_items.pop(position))
+
+    def update_empty_state(self):
+        """Show a placeholder while the recent list is empty"""
+        if not self.recent_items and self.empty_item is None:
+            self.empty_item = OneLineListItem(
                 text="No recent expenses found",
                 divider="Full"
-            ))
+            )
+            self.expenses_list.add_widget(self.empty_item)
+
+    def on_expense_changed(self, event):
+        """Change events can arrive on a worker thread; patch the list on the UI thread"""
+        Clock.schedule_once(lambda dt: self.patch_expenses_list(event))
+
+    def patch_expenses_list(self, event):
+        """Apply one committed expense change to the recent list without reloading it"""
+        if self.recent_expenses is None:
+            return  # Not shown yet; on_enter loads it
+        if event.row is not None and event.row['user_id'] != self.recent_user_id:
             return
+        # While the list is full, rows may exist below it that it doesn't know about
+        was_full = len(self.recent_expenses) >= RECENT_EXPENSES
+
+        ids = [exp['id'] for exp in self.recent_expenses]
+        if event.row_id in ids:
+            self.remove_recent_expense(ids.index(event.row_id))
+
+        if event.row is not None:
+            key = (event.row['exp_date'], event.row['id'])
+            position = sum(1 for exp in self.recent_expenses if (exp['exp_date'], exp['id']) > key)
+            if not was_full or position < len(self.recent_expenses):
+                self.insert_recent_expense(position, event.row)
+
+        while len(self.recent_expenses) > RECENT_EXPENSES:
+            self.remove_recent_expense(len(self.recent_expenses) - 1)
+
+        if was_full and len(self.recent_expenses) < RECENT_EXPENSES:
+            # A row left the list: pull in the ones right after the last row still shown
+            last = self.recent_expenses[-1] if self.recent_expenses else None
+            missing = RECENT_EXPENSES - len(self.recent_expenses)
+            if last is None:
+                rows = self.db.get_expenses_page(self.recent_user_id, limit=missing)
+            else:
+                rows = self.db.get_expenses_page(self.recent_user_id, last['exp_date'], last['id'], limit=missing)
+            for exp in rows:
+                self.insert_recent_expense(len(self.recent_expenses), exp)
 
-        for exp in expenses[:5]:  # Show only the 5 most recent
-            icon = IconLeftWidget(
-                icon=self.get_icon_for_expense_type(exp['exp_type'])
-            )
-            item = TwoLineIconListItem(
-                text=f"{exp['exp_name']} - ₹{exp['exp_amount']}",
-                secondary_text=f"{exp['exp_type']} | {exp['exp_date']}",
-                on_release=lambda x, e=exp: self.show_expense_details(e)
-            )
-            item.add_widget(icon)
-            self.expenses_list.add_widget(item)
+        self.update_empty_state()
 
     def get_icon_for_expense_type(self, expense_type):
         """Return an appropriate icon based on expense type"""
@@ -219,6 +298,10 @@ class ExpenseTrackerScreen(Screen):
         }
         return icon_map.get(expense_type, 'cash')
 
+    def close(self):
+        """Stop listening for expense changes; called when the user's screens go."""
+        self.db.unsubscribe("expenses", self.on_expense_changed)
+
     def toggle_menu(self):
         """Opens or closes the navigation drawer."""
         self.nav_drawer.set_state("toggle")
@@ -284,26 +367,25 @@ class ExpenseTrackerScreen(Screen):
             user_id = getattr(self.manager, 'current_user_id', 1)  # Default to 1 if not set
             self.db.add_expense(user_id, name, type_exp, amount, date)
             self.show_dialog("Success", "Expense logged successfully!")
-            self.clear_inputs()
-            self.refresh_expenses_list()  # Update the list to show the new expense
+            self.clear_inputs()  # The recent list is patched by the change event
         except ValueError:
             self.show_dialog("Error", "Amount must be a number.")
 
     def show_expenses(self, instance):
         """Show all expenses in a detailed view"""
-        expenses = self.db.show_expense()
-        if not expenses:
+        user_id = App.get_running_app().current_user_id
+        # Streamed page by page, already sorted latest first by the database
+        expenses = self.db.iter_expenses(user_id)
+        first_expense = next(expenses, None)
+        if first_expense is None:
             self.show_dialog("No Records", "No expenses recorded.")
             return
 
-        # Sort expenses by date (latest first)
-        expenses.sort(key=lambda x: datetime.strptime(x['exp_date'], '%Y-%m-%d'), reverse=True)
-
         # Create a scrollable dialog to display expenses
         content = ScrollView(size_hint=(1, None), height=dp(500))  # Increased height
         expenses_list = MDList()
 
-        for exp in expenses:
+        for exp in itertools.chain([first_expense], expenses):
             icon = IconLeftWidget(
                 icon=self.get_icon_for_expense_type(exp['exp_type'])
             )
@@ -455,8 +537,7 @@ class ExpenseTrackerScreen(Screen):
             amount = float(amount)
             self.db.update_expense(expense_id, name, type_exp, amount, date)  # Update the database
             self.show_dialog("Success", "Expense updated successfully!")
-            self.clear_inputs()
-            self.refresh_expenses_list()  # Refresh the list to show updated expense
+            self.clear_inputs()  # The recent list is patched by the change event
         except ValueError:
             self.show_dialog("Error", "Amount must be a number.")
 
@@ -487,7 +568,6 @@ class ExpenseTrackerScreen(Screen):
         if parent_dialog:
             parent_dialog.dismiss()
 
-        self.refresh_expenses_list()
         self.show_dialog("Success", "Expense deleted successfully!")
 
     def show_dialog(self, title, message):
@@ -615,66 +695,29 @@ class ExpenseTrackerScreen(Screen):
     def generate_expense_story(self, period):
         """Generate a narrative based on expense data for the selected time period"""
         user_id = App.get_running_app().current_user_id
-        expenses = self.db.get_expenses_by_user_id(user_id)
-        
-        if not expenses:
-            self.show_dialog("No Data", "You haven't logged any expenses yet.")
-            return
-        
-        # Filter expenses based on selected time period
-        today = datetime.now()
-        filtered_expenses = []
-        
-        for expense in expenses:
-            exp_date = datetime.strptime(expense['exp_date'], '%Y-%m-%d')
-            if period == "1w" and (today - exp_date).days <= 7:
-                filtered_expenses.append(expense)
-            elif period == "1m" and (today - exp_date).days <= 30:
-                filtered_expenses.append(expense)
-            elif period == "3m" and (today - exp_date).days <= 90:
-                filtered_expenses.append(expense)
-            elif period == "6m" and (today - exp_date).days <= 180:
-                filtered_expenses.append(expense)
-            elif period == "1y" and (today - exp_date).days <= 365:
-                filtered_expenses.append(expense)
-            elif period == "all":
-                filtered_expenses.append(expense)
-        
-        if not filtered_expenses:
-            self.show_dialog("No Data", f"No expenses found for the selected period.")
+
+        # Totals, categories, weekdays and the biggest expense come from one SQL pass
+        days = PERIOD_DAYS[period]
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d') if days else None
+        summary = self.db.expense_summary(user_id, start)
+
+        if not summary['count']:
+            if period == "all" or not self.db.get_expenses_page(user_id, limit=1):
+                self.show_dialog("No Data", "You haven't logged any expenses yet.")
+            else:
+                self.show_dialog("No Data", f"No expenses found for the selected period.")
             return
         
         # Calculate insights
-        self.total_spent = sum(float(expense['exp_amount']) for expense in filtered_expenses)
-        
-        # Group by category
-        categories = {}
-        for expense in filtered_expenses:
-            category = expense['exp_type']
-            if category in categories:
-                categories[category] += float(expense['exp_amount'])
-            else:
-                categories[category] = float(expense['exp_amount'])
-        
-        # Sort categories by amount
-        sorted_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)
-        self.top_category = sorted_categories[0][0] if sorted_categories else "None"
-        top_amount = sorted_categories[0][1] if sorted_categories else 0
-        
-        # Get the frequency of expenses
-        expense_dates = [datetime.strptime(exp['exp_date'], '%Y-%m-%d') for exp in filtered_expenses]
-        date_counts = {}
-        for date in expense_dates:
-            day_of_week = date.strftime('%A')
-            if day_of_week in date_counts:
-                date_counts[day_of_week] += 1
-            else:
-                date_counts[day_of_week] = 1
+        self.total_spent = summary['total']
+        categories = summary['categories']  # Sorted by amount, largest first
+        self.top_category, top_amount = next(iter(categories.items()))
         
-        self.most_active_day = max(date_counts.items(), key=lambda x: x[1])[0] if date_counts else "None"
+        weekday_counts = summary['weekday_counts']
+        self.most_active_day = max(weekday_counts.items(), key=lambda x: x[1])[0] if weekday_counts else "None"
         
         # Find the biggest single expense
-        self.biggest_expense = max(filtered_expenses, key=lambda x: float(x['exp_amount']), default={"exp_amount": 0, "exp_name": "None", "exp_date": "N/A"})
+        self.biggest_expense = summary['biggest']
         
         # Generate a narrative
         period_text = {
@@ -690,7 +733,7 @@ class ExpenseTrackerScreen(Screen):
         top_category_percentage = (top_amount / self.total_spent) * 100
         
         # Find unique categories
-        unique_categories = len(categories)
+        unique_categories = summary['category_count']
         
         # Create a personalized story
         story_layout = MDGridLayout(
@@ -750,7 +793,7 @@ class ExpenseTrackerScreen(Screen):
         personality = self.generate_spending_personality(
             categories, 
             self.total_spent, 
-            len(filtered_expenses), 
+            summary['count'], 
             self.biggest_expense
         )
         
@@ -91,6 +91,7 @@ class AddFlashcardDialog(MDBoxLayout):
         self.db = db
         self.on_save = on_save
         self.existing_flashcard_name = existing_flashcard_name  # Store existing flashcard name
+        self.qa_generator = EnhancedQAGenerator()  # NLTK models are shared and load on first use
         self.orientation = 'vertical'
         self.spacing = dp(20)
         self.padding = dp(20)
@@ -186,8 +187,7 @@ class AddFlashcardDialog(MDBoxLayout):
                 show_message("Please enter a valid number of questions (1-50)")
                 return
 
-            qa_generator = EnhancedQAGenerator()
-            qa_pairs = qa_generator.generate_qa_pairs(text, num_pairs=num_questions)
+            qa_pairs = self.qa_generator.generate_qa_pairs(text, num_pairs=num_questions)
 
             if not qa_pairs:
                 show_message("Couldn't generate questions. Try more detailed content.")
@@ -195,17 +195,18 @@ class AddFlashcardDialog(MDBoxLayout):
 
             cards_name = self.ai_name_field.text.strip() or self.name_field.text.strip()  # Automatically set cards_name
 
-            for pair in qa_pairs:
-                print(f"Generated pair: Question={pair['question']}, Answer={pair['answer']}")  # Debugging print
-                # Attempt to add the flashcard to the database
-                success = self.db.add_flashcard(1, cards_name, pair['question'], pair['answer'])
-                if not success:
-                    print(f"Failed to add flashcard: {pair['question']} - {pair['answer']}")  # Debugging print
-                    show_message("Failed to save one or more flashcards.")
-                    return
+            # Save the whole deck in one transaction
+            card_ids = self.db.add_flashcards_bulk(
+                1, cards_name, [(pair['question'], pair['answer']) for pair in qa_pairs]
+            )
+            if not card_ids:
+                print(f"Failed to add {len(qa_pairs)} generated flashcards")  # Debugging print
+                show_message("Failed to save one or more flashcards.")
+                return
 
             show_message(f"Generated {len(qa_pairs)} flashcards with name '{cards_name}'!")
-            self.on_save()
+            if self.on_save:
+                self.on_save()
 
         except Exception as e:
             print(f"Error generating flashcards: {str(e)}")
@@ -275,6 +276,9 @@ class FlashcardScreen(MDScreen):
         self.name = "flashcards"
         self.db = DatabaseManager()
         self.dialog = None
+        self.group_widgets = None  # cards_name -> FlashcardGroup; None until first loaded
+        self.empty_label = None
+        self.db.subscribe("flashcards", self.on_flashcard_changed)  # Patch groups instead of reloading
         
         # Create the navigation drawer
         self.nav_drawer = MDNavigationDrawer()
@@ -294,6 +298,10 @@ class FlashcardScreen(MDScreen):
         self.nav_drawer.add_widget(self.nav_list)
         self.add_widget(self.nav_drawer)
 
+    def close(self):
+        """Stop listening for flashcard changes; called when the user's screens go."""
+        self.db.unsubscribe("flashcards", self.on_flashcard_changed)
+
     def toggle_menu(self):
         """Opens or closes the navigation drawer."""
         self.nav_drawer.set_state("toggle")
@@ -305,48 +313,80 @@ class FlashcardScreen(MDScreen):
         self.nav_drawer.set_state("close")
 
     def on_enter(self):
-        """Load flashcards when screen is entered"""
-        self.load_flashcards()
+        """Load flashcards the first time the screen is entered; change events keep them current"""
+        if self.group_widgets is None:
+            self.load_flashcards()
 
     def load_flashcards(self):
         """Load and display all flashcards grouped by cards_name for the current user."""
         try:
             container = self.ids.flashcard_list
             container.clear_widgets()
+            self.group_widgets = {}
+            self.empty_label = None
 
-            flashcards = self.db.get_flashcards_by_user_id(self.user_id)  # Use the user_id
-            print(f"Fetched flashcards for user ID {self.user_id}: {flashcards}")  # Debugging print
-            if not flashcards:
-                # Show empty state
-                empty_label = MDLabel(
-                    text="No flashcards yet. Click + to add some!",
-                    halign="center",
-                    theme_text_color="Secondary"
-                )
-                container.add_widget(empty_label)
-                return
-
-            # Group flashcards by cards_name
-            groups = {}
-            for card in flashcards:
-                cards_name = card['cards_name']  # Ensure this is a string
-                if cards_name not in groups:
-                    groups[cards_name] = []
-                groups[cards_name].append(card)
+            # Deck sizes come from the counter table; no card is loaded here
+            with self.db.action("FlashcardScreen.load_flashcards"):
+                deck_sizes = self.db.get_deck_sizes(self.user_id)
+            print(f"Fetched decks for user ID {self.user_id}: {deck_sizes}")  # Debugging print
 
             # Add each group to the list
-            for group_name, cards in groups.items():
-                group_widget = FlashcardGroup(
-                    group_name=group_name,  # Ensure group_name is a string
-                    flashcards=cards,
-                    on_edit=self.edit_group,
-                    on_view=self.view_group
-                )
-                container.add_widget(group_widget)
+            for group_name, card_count in deck_sizes.items():
+                self.add_group_widget(group_name, card_count)
+            self.update_empty_state()
 
         except Exception as e:
             print(f"Error loading flashcards: {e}")
 
+    def add_group_widget(self, group_name, card_count):
+        """Append the list entry for one deck"""
+        group_widget = FlashcardGroup(
+            group_name=group_name,  # Ensure group_name is a string
+            card_count=card_count,
+            on_edit=self.edit_group,
+            on_view=self.view_group
+        )
+        self.group_widgets[group_name] = group_widget
+        self.ids.flashcard_list.add_widget(group_widget)
+
+    def update_empty_state(self):
+        """Show the empty-state label only while there are no decks"""
+        container = self.ids.flashcard_list
+        if not self.group_widgets and self.empty_label is None:
+            # Show empty state
+            self.empty_label = MDLabel(
+                text="No flashcards yet. Click + to add some!",
+                halign="center",
+                theme_text_color="Secondary"
+            )
+            container.add_widget(self.empty_label)
+        elif self.group_widgets and self.empty_label is not None:
+            container.remove_widget(self.empty_label)
+            self.empty_label = None
+
+    def on_flashcard_changed(self, event):
+        """Change events can arrive on a worker thread; patch the list on the UI thread"""
+        Clock.schedule_once(lambda dt: self.patch_flashcard_groups(event))
+
+    def patch_flashcard_groups(self, event):
+        """Apply one committed flashcard change to the deck list without reloading it"""
+        if self.group_widgets is None:
+            return  # Not shown yet; on_enter loads it
+        if event.row is not None and event.row['user_id'] != self.user_id:
+            return
+
+        # One cached counter read; a bulk change re-reads it only once
+        deck_sizes = self.db.get_deck_sizes(self.user_id)
+        for group_name in list(self.group_widgets):
+            if group_name not in deck_sizes:  # Its last card is gone
+                self.ids.flashcard_list.remove_widget(self.group_widgets.pop(group_name))
+        for group_name, card_count in deck_sizes.items():
+            if group_name in self.group_widgets:
+                self.group_widgets[group_name].set_card_count(card_count)
+            else:
+                self.add_group_widget(group_name, card_count)
+        self.update_empty_state()
+
     def edit_group(self, group_name):
         """Edit all flashcards in a group"""
         try:
@@ -369,6 +409,7 @@ class FlashcardScreen(MDScreen):
                     size_hint_y=None,
                     height=dp(150)
                 )
+                card_box.flashcard_id = card[0]
 
                 front_field = MDTextField(
                     text=card[2],
@@ -407,13 +448,14 @@ class FlashcardScreen(MDScreen):
     def save_group_edits(self, group_name, content, dialog):
         """Save edits made to a group of flashcards"""
         try:
+            updates = []
             for card_box in content.children:
                 front = card_box.children[1].text.strip()
                 back = card_box.children[0].text.strip()
-                # Update each flashcard in the database
-                self.db.update_flashcard_by_name(group_name, front, back)
+                updates.append((card_box.flashcard_id, front, back))
+            # Update every edited flashcard in one transaction
+            self.db.update_flashcards_bulk(updates)
             dialog.dismiss()
-            self.load_flashcards()
         except Exception as e:
             print(f"Error saving group edits: {e}")
 
@@ -428,8 +470,7 @@ class FlashcardScreen(MDScreen):
             flashcard_view = FlashcardView(
                 group_name=group_name,
                 flashcards=flashcards,
-                db=self.db,
-                on_flashcards_updated=self.load_flashcards  # Pass the callback
+                db=self.db
             )
             app = MDApp.get_running_app()
             app.root.add_widget(flashcard_view)
@@ -443,14 +484,13 @@ class FlashcardScreen(MDScreen):
         try:
             self.db.delete_flashcards_by_name(group_name)
             dialog.dismiss()
-            self.load_flashcards()
         except Exception as e:
             print(f"Error deleting group: {e}")
 
     def show_add_dialog(self):
         """Show dialog to add a new flashcard"""
         if not self.dialog:
-            content = AddFlashcardDialog(db=self.db, on_save=self.load_flashcards)
+            content = AddFlashcardDialog(db=self.db)
             self.dialog = MDDialog(
                 title="Add New Flashcard",
                 type="custom",
@@ -482,7 +522,6 @@ class FlashcardScreen(MDScreen):
             show_message("Flashcard added successfully!")
             self.dialog.dismiss()
             self.dialog = None
-            self.load_flashcards()
 
     def view_flashcard(self, flashcard_id):
         """View a flashcard's details"""
@@ -538,7 +577,6 @@ class FlashcardScreen(MDScreen):
         """Delete a flashcard"""
         if self.db.delete_flashcard(flashcard_id):
             dialog.dismiss()
-            self.load_flashcards()
 
 class FlashcardView(MDScreen):
     """Screen for viewing flashcards in a group"""
@@ -557,6 +595,28 @@ class FlashcardView(MDScreen):
 
         # Build the UI
         self.build_ui()
+        self.db.subscribe("flashcards", self.on_flashcard_changed)  # Keep the carousel in sync
+
+    def on_flashcard_changed(self, event):
+        """Change events can arrive on a worker thread; patch the carousel on the UI thread"""
+        Clock.schedule_once(lambda dt: self.patch_carousel(event))
+
+    def patch_carousel(self, event):
+        """Add, update or remove the one slide a committed change affects."""
+        slide = next((card for card in self.carousel.slides if card.flashcard_id == event.row_id), None)
+        in_group = event.row is not None and event.row['cards_name'] == self.group_name
+        if slide is not None and not in_group:
+            self.carousel.remove_widget(slide)  # Deleted or moved to another deck
+        elif slide is not None:
+            slide.set_texts(event.row['front'], event.row['back'])
+        elif in_group:
+            self.carousel.add_widget(Flashcard(
+                front_text=event.row['front'],
+                back_text=event.row['back'],
+                flashcard_id=event.row_id,
+                db=self.db,
+                on_flashcard_updated=self.on_flashcards_updated
+            ))
 
     def build_ui(self):
         # Use FloatLayout as root to allow for better positioning
@@ -632,21 +692,9 @@ class FlashcardView(MDScreen):
             show_message("Flashcard added successfully!")
             dialog.dismiss()
             if self.on_flashcards_updated:
-                self.on_flashcards_updated()  # Call the callback to refresh flashcards
-            
-            # Update the current view with the new flashcard
-            flashcards = self.db.get_flashcards_by_name(self.group_name)
-            newest_card = flashcards[-1]  # Assume the newest card is the last one
-            new_flashcard = Flashcard(
-                front_text=newest_card[2],
-                back_text=newest_card[3],
-                flashcard_id=newest_card[0],
-                db=self.db,
-                on_flashcard_updated=self.on_flashcards_updated
-            )
-            self.carousel.add_widget(new_flashcard)
-            # Optionally switch to the new card
-            self.carousel.index = len(self.carousel.slides) - 1
+                self.on_flashcards_updated()
+            # The change event adds the new card's slide; switch to it once it's there
+            Clock.schedule_once(lambda dt: setattr(self.carousel, "index", len(self.carousel.slides) - 1))
         else:
             show_message("Failed to add flashcard.")
 
@@ -660,6 +708,7 @@ class FlashcardView(MDScreen):
 
     def go_back(self, *args):
         """Return to flashcard list"""
+        self.db.unsubscribe("flashcards", self.on_flashcard_changed)
         app = MDApp.get_running_app()
         app.root.current = "flashcards"
         app.root.remove_widget(self)
@@ -822,6 +871,12 @@ class Flashcard(MDCard):
         # Bind touch for flipping
         self.bind(on_touch_down=self.flip_card)
 
+    def set_texts(self, front_text, back_text):
+        """Show edited question/answer text on the visible side."""
+        self.front_text = front_text
+        self.back_text = back_text
+        self.content.text = back_text if self.is_flipped else front_text
+
     def flip_card(self, instance, touch):
         """Flip the card to show the answer."""
         if self.collide_point(*touch.pos):
@@ -884,7 +939,7 @@ class Flashcard(MDCard):
 class FlashcardGroup(MDBoxLayout):
     group_name = StringProperty()
 
-    def __init__(self, group_name, flashcards, on_edit=None, on_view=None, **kwargs):
+    def __init__(self, group_name, card_count=0, on_edit=None, on_view=None, **kwargs):
         super().__init__(**kwargs)
         self.group_name = group_name
         self.orientation = 'horizontal'
@@ -906,8 +961,17 @@ class FlashcardGroup(MDBoxLayout):
             height=dp(30)
         )
 
+        self.count_label = MDLabel(
+            theme_text_color="Secondary",
+            halign="right",
+            size_hint=(None, None),
+            size=(dp(80), dp(30))
+        )
+        self.set_card_count(card_count)
+
         # Make the entire group clickable
         self.add_widget(name_label)
+        self.add_widget(self.count_label)
         self.bind(on_touch_down=lambda instance, touch: self.on_view(group_name) if self.collide_point(*touch.pos) else None)
 
         view_button = MDIconButton(
@@ -917,6 +981,10 @@ class FlashcardGroup(MDBoxLayout):
 
         self.add_widget(view_button)
 
+    def set_card_count(self, card_count):
+        """Show the deck size next to its name"""
+        self.count_label.text = f"{card_count} card" + ("" if card_count == 1 else "s")
+
 # Load KV Design
 KV = '''
 <FlashcardScreen>:
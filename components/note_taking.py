@@ -28,7 +28,10 @@ from kivymd.uix.snackbar import Snackbar  # Import Snackbar for notifications
 
 from kivymd.uix.screen import Screen
 from database.database_manager import DatabaseManager
+from database.events import INSERT
+from database.note_colors import unpack_rgba
 from utils.notai import EnhancedNotAI  # Import the EnhancedNotAI class
+from utils.note_analysis import ANALYSIS_DB, NoteAnalysisCache
 
 
 class NoteTaking(Screen):
@@ -40,14 +43,18 @@ class NoteTaking(Screen):
         self.user_id = user_id
         print(f"NoteTaking initialized with user_id: {self.user_id}")
 
-        self.db = sqlite3.connect("Fusion.db")
-        self.cursor = self.db.cursor()
+        self.db_manager = DatabaseManager()
+        self.note_cards = None  # note_id -> card while the grid shows all notes (None during a search)
+        self.current_note_color = (1, 1, 1, 1)  # Color of the note open in the editor
+        self.current_note_id = None  # Note open in the editor; its analyses are cached under this id
 
         # Initialize the color picker
         self.color_picker = ColorPicker()  # Create a ColorPicker instance
 
         # Initialize the EnhancedNotAI instance
-        self.not_ai = EnhancedNotAI()  # Create an instance of EnhancedNotAI
+        # Saved notes' analyses persist across sessions until the note is edited or deleted
+        self.not_ai = EnhancedNotAI(NoteAnalysisCache(db_path=ANALYSIS_DB))
+        self.db_manager.subscribe("notes", self.on_note_changed)  # Patch cards instead of reloading
 
         self.layout = BoxLayout(orientation="vertical", padding=10, spacing=10)  # ✅ Added Padding
 
@@ -157,6 +164,8 @@ class NoteTaking(Screen):
         self.add_widget(self.nav_drawer)
         self.add_widget(self.add_button)
 
+        self.list_widgets = list(reversed(self.children))  # Restored by go_back after editing a note
+
         # Load notes with a slight delay for animation effect
         Clock.schedule_once(lambda dt: self.load_notes(), 0.2)
 
@@ -176,28 +185,12 @@ class NoteTaking(Screen):
     def load_notes(self):
         """Fetches and displays notes from the database with Google Keep style cards."""
         self.notes_grid.clear_widgets()
-        self.cursor.execute("SELECT id, title, content, Color FROM notes WHERE user_id=?", (self.user_id,))
-        notes = self.cursor.fetchall()
+        self.note_cards = {}
+        with self.db_manager.action("NoteTaking.load_notes"):
+            notes = self.db_manager.get_note_cards(self.user_id)
 
         if not notes:
-            # Show empty state message
-            empty_layout = BoxLayout(orientation="vertical", padding=dp(20), spacing=dp(10))
-            empty_icon = MDIconButton(
-                icon="notebook-outline",
-                size_hint=(None, None),
-                size=(dp(64), dp(64)),
-                pos_hint={"center_x": 0.5},
-                theme_text_color="Custom",
-                text_color=(0.1, 0.5, 1, 0.5),
-            )
-            empty_label = MDLabel(
-                text="No notes yet. Tap the + button to create one.",
-                halign="center",
-                theme_text_color="Secondary",
-            )
-            empty_layout.add_widget(empty_icon)
-            empty_layout.add_widget(empty_label)
-            self.notes_grid.add_widget(empty_layout)
+            self.show_empty_state()
             return
 
         # Calculate the number of columns based on screen width
@@ -210,65 +203,123 @@ class NoteTaking(Screen):
         self.notes_grid.cols = num_columns
 
         # Add notes with animation effects
-        for i, (note_id, title, content, color) in enumerate(notes):
-            # Ensure color is a string before using eval
-            if isinstance(color, str):
-                try:
-                    note_bg_color = eval(color)  # Convert string to tuple
-                except Exception as e:
-                    print(f"Error evaluating color: {e}")
-                    note_bg_color = (1, 1, 1, 1)  # Default to white if there's an error
-            else:
-                note_bg_color = (1, 1, 1, 1)  # Default to white if color is not a string
-
-            note_card = MDCard(
-                size_hint=(None, None),
-                width=card_width,  # Set the width of the card
-                height=dp(180) if len(content) < 100 else dp(220),
-                elevation=1,  # Slightly increased elevation
-                padding=dp(12),
-                radius=[dp(8)],
-                md_bg_color=note_bg_color,  # Set the background color from the database
-                on_release=lambda x, n_id=note_id: self.open_note(n_id),  # Open Note on Click
-                ripple_behavior=True,  # Add ripple effect on tap
-                opacity=0,  # Start with zero opacity for animation
-            )
-
-            card_content = BoxLayout(orientation="vertical", spacing=dp(8))
-
-            # Title with ellipsis if too long
-            title_label = MDLabel(
-                text=title[:40] + ("..." if len(title) > 40 else ""),
-                font_style="Subtitle1",
-                bold=True,
-                size_hint_y=None,
-                height=dp(30),
-            )
-
-            # Content preview with ellipsis
-            content_preview = content[:120] + ("..." if len(content) > 120 else "")
-            content_label = MDLabel(
-                text=content_preview,
-                size_hint_y=None,
-                height=dp(120) if len(content) < 100 else dp(160),
-                theme_text_color="Secondary",
-            )
-
-            card_content.add_widget(title_label)
-            card_content.add_widget(content_label)
-            note_card.add_widget(card_content)
+        for i, (note_id, title, preview, content_length, color) in enumerate(notes):
+            note_card = self.create_note_card(note_id, title, preview, content_length, color)
+            note_card.opacity = 0  # Start with zero opacity for animation
+            self.note_cards[note_id] = note_card
             self.notes_grid.add_widget(note_card)
             
             # Animate the card appearance with a slight delay based on index
             anim = Animation(opacity=1, d=0.3)
             Clock.schedule_once(lambda dt, card=note_card: anim.start(card), 0.05 * i)
 
+    def show_empty_state(self):
+        """Shows the empty state message in the notes grid."""
+        empty_layout = BoxLayout(orientation="vertical", padding=dp(20), spacing=dp(10))
+        empty_icon = MDIconButton(
+            icon="notebook-outline",
+            size_hint=(None, None),
+            size=(dp(64), dp(64)),
+            pos_hint={"center_x": 0.5},
+            theme_text_color="Custom",
+            text_color=(0.1, 0.5, 1, 0.5),
+        )
+        empty_label = MDLabel(
+            text="No notes yet. Tap the + button to create one.",
+            halign="center",
+            theme_text_color="Secondary",
+        )
+        empty_layout.add_widget(empty_icon)
+        empty_layout.add_widget(empty_label)
+        self.notes_grid.add_widget(empty_layout)
+
+    def create_note_card(self, note_id, title, preview, content_length, color_rgba):
+        """Builds the grid card for one note from its stored preview; the body loads on open."""
+        card_width = dp(170)  # Desired width of each note card
+        note_bg_color = unpack_rgba(color_rgba)  # Cached per distinct colour
+
+        note_card = MDCard(
+            size_hint=(None, None),
+            width=card_width,  # Set the width of the card
+            height=dp(180) if content_length < 100 else dp(220),
+            elevation=1,  # Slightly increased elevation
+            padding=dp(12),
+            radius=[dp(8)],
+            md_bg_color=note_bg_color,  # Set the background color from the database
+            on_release=lambda x, n_id=note_id: self.open_note(n_id),  # Open Note on Click
+            ripple_behavior=True,  # Add ripple effect on tap
+        )
+
+        card_content = BoxLayout(orientation="vertical", spacing=dp(8))
+
+        # Title with ellipsis if too long
+        title_label = MDLabel(
+            text=title[:40] + ("..." if len(title) > 40 else ""),
+            font_style="Subtitle1",
+            bold=True,
+            size_hint_y=None,
+            height=dp(30),
+        )
+
+        # Content preview with ellipsis
+        content_preview = preview + ("..." if content_length > len(preview) else "")
+        content_label = MDLabel(
+            text=content_preview,
+            size_hint_y=None,
+            height=dp(120) if content_length < 100 else dp(160),
+            theme_text_color="Secondary",
+        )
+
+        card_content.add_widget(title_label)
+        card_content.add_widget(content_label)
+        note_card.add_widget(card_content)
+        return note_card
+
+    def on_note_changed(self, event):
+        """Change events can arrive on a worker thread; patch the grid on the UI thread."""
+        if event.op != INSERT:
+            # Don't keep analyses (and so the text) of a note's old versions
+            self.not_ai.forget_note(event.row_id, event.row['content'] if event.row is not None else None)
+        Clock.schedule_once(lambda dt: self.patch_note_card(event))
+
+    def patch_note_card(self, event):
+        """Adds, replaces or removes the one card a committed note change affects."""
+        if self.note_cards is None:
+            return  # Showing search results; refresh reloads the full list
+        if event.row is not None and event.row['user_id'] != self.user_id:
+            return
+
+        old_card = self.note_cards.pop(event.row_id, None)
+        if event.row is None:
+            if old_card is not None:
+                self.notes_grid.remove_widget(old_card)
+            if not self.note_cards:
+                self.notes_grid.clear_widgets()
+                self.show_empty_state()
+            return
+
+        if not self.note_cards and old_card is None:
+            self.notes_grid.clear_widgets()  # Drop the empty state message
+        new_card = self.create_note_card(
+            event.row_id, event.row['title'], event.row['preview'], event.row['content_length'],
+            event.row['color_rgba']
+        )
+        self.note_cards[event.row_id] = new_card
+        if old_card is not None:
+            # Keep the card where it was; Kivy indexes children from the end
+            index = self.notes_grid.children.index(old_card)
+            self.notes_grid.remove_widget(old_card)
+            self.notes_grid.add_widget(new_card, index=index)
+        else:
+            self.notes_grid.add_widget(new_card)
+
     def open_note(self, note_id):
         """Opens a full-screen note view with color display."""
-        self.cursor.execute("SELECT title, content, Color FROM notes WHERE id=?", (note_id,))
-        note = self.cursor.fetchone()
+        with self.db_manager.action("NoteTaking.open_note"):
+            note = self.db_manager.get_note(note_id)
 
         if note:
+            self.current_note_id = note_id
             self.clear_widgets()
             self.layout = BoxLayout(orientation="vertical", padding=dp(0), spacing=dp(0))
 
@@ -293,7 +344,7 @@ class NoteTaking(Screen):
             )
             
             self.edit_note_title = MDTextField(
-                text=note[0],
+                text=note['title'],
                 hint_text="Title",
                 size_hint_y=None,
                 height=dp(60),
@@ -303,7 +354,7 @@ class NoteTaking(Screen):
             )
             
             self.edit_note_content = MDTextField(
-                text=note[1],
+                text=note['content'],
                 hint_text="Note",
                 multiline=True,
                 size_hint_y=1,
@@ -312,17 +363,8 @@ class NoteTaking(Screen):
             )
 
             # Set the background color of the note based on the saved color
-            note_color = note[2]  # Get the color value from the database
-
-            # Check if note_color is a string and convert it to a tuple
-            if isinstance(note_color, str):
-                try:
-                    note_color = eval(note_color)  # Convert string back to tuple
-                except Exception as e:
-                    print(f"Error evaluating color: {e}")
-                    note_color = (1, 1, 1, 1)  # Default to white if there's an error
-            else:
-                note_color = (1, 1, 1, 1)  # Default to white if not a string
+            note_color = unpack_rgba(note['color_rgba'])
+            self.current_note_color = note_color
 
             # Add a canvas to set the background color
             with content_layout.canvas.before:
@@ -380,10 +422,19 @@ class NoteTaking(Screen):
         self.rect.pos = instance.pos
         self.rect.size = instance.size
 
+    def close(self):
+        """Stop listening for note changes and close the analysis cache; called when the user's screens go."""
+        self.db_manager.unsubscribe("notes", self.on_note_changed)
+        self.not_ai.analysis_cache.close()
+
     def go_back(self):
         """Returns to the main notes list."""
+        self.db_manager.flush()  # Commit queued colour changes; their events patch the cards
+        self.current_note_id = None
         self.clear_widgets()
-        self.__init__(self.user_id)
+        # The list widgets were kept up to date by change events, so just put them back
+        for widget in self.list_widgets:
+            self.add_widget(widget)
 
     def read_aloud(self):
         """Reads the note content aloud."""
@@ -516,12 +567,13 @@ class NoteTaking(Screen):
         
         # Get current note content
         current_note_content = self.edit_note_content.text
+        current_note_id = self.current_note_id
         
         # Use a Clock to prevent UI freezing during processing
         def get_answer(dt):
             try:
                 # Use the EnhancedNotAI instance to get the answer
-                answer = self.not_ai.answer_question(question, current_note_content)
+                answer = self.not_ai.answer_question(question, current_note_content, current_note_id)
                 
                 # Format the answer with the question for context
                 formatted_answer = f"[b]Q: {question}[/b]\n\n[color=3f51b5]{answer}[/color]"
@@ -565,8 +617,7 @@ class NoteTaking(Screen):
     def confirm_delete(self, note_id):
         """Actually deletes the note after confirmation."""
         try:
-            self.cursor.execute("DELETE FROM notes WHERE id=?", (note_id,))
-            self.db.commit()
+            self.db_manager.delete_note(note_id)
             print(f"Note {note_id} deleted successfully")
             self.confirm_dialog.dismiss()
             self.go_back()
@@ -623,13 +674,8 @@ class NoteTaking(Screen):
             return
 
         try:
-            self.cursor.execute(
-                "INSERT INTO notes (user_id, title, content, Color) VALUES (?, ?, ?, ?)",
-                (self.user_id, title, content, str(color))  # Save color as a string
-            )
-            self.db.commit()
+            self.db_manager.add_note(self.user_id, title, content, color)  # The change event adds its card
             print("Note saved successfully!")
-            self.load_notes()
             self.add_note_dialog.dismiss()
         except sqlite3.Error as e:
             print(f"Error saving note: {e}")
@@ -639,32 +685,27 @@ class NoteTaking(Screen):
         try:
             new_title = self.edit_note_title.text
             new_content = self.edit_note_content.text
-            # Get the current color from the color picker
-            color = self.color_picker.color  # Ensure color_picker is defined
-            
-            self.cursor.execute(
-                "UPDATE notes SET title=?, content=?, Color=? WHERE id=?",
-                (new_title, new_content, str(color), note_id)  # Save color as a string
-            )
-            self.db.commit()
+
+            self.db_manager.update_note(note_id, new_title, new_content)
+            self.db_manager.update_note_color(note_id, self.current_note_color)
             print(f"Note {note_id} updated successfully")
             self.go_back()
         except sqlite3.Error as e:
             print(f"Error updating note: {e}")
 
     def search_notes(self, instance):
-        """Filters notes based on search input."""
-        keyword = self.search_bar.text.lower()
+        """Filters notes based on search input using the full-text index."""
+        keyword = self.search_bar.text.strip()
+        if not keyword:
+            self.load_notes()  # Nothing to match; show every note again
+            return
         self.notes_grid.clear_widgets()
+        self.note_cards = None  # Stop patching the full list while results are shown
         
         try:
-            self.cursor.execute(
-                "SELECT id, title, content FROM notes WHERE user_id=? AND (LOWER(title) LIKE ? OR LOWER(content) LIKE ?)",
-                (self.user_id, f"%{keyword}%", f"%{keyword}%")
-            )
-            notes = self.cursor.fetchall()
+            notes = self.db_manager.search_notes_ranked(self.user_id, keyword, limit=100)
 
-            for note_id, title, content in notes:
+            for note in notes:
                 note_card = MDCard(
                     size_hint=(0.45, None),
                     height=150,
@@ -673,10 +714,10 @@ class NoteTaking(Screen):
                     radius=[5],
                     line_width=1.5,
                     line_color=(0, 0, 0, 1),
-                    on_release=lambda x, n_id=note_id: self.open_note(n_id),
+                    on_release=lambda x, n_id=note['id']: self.open_note(n_id),
                 )
                 note_label = MDLabel(
-                    text=f"[b]{title}[/b]\n{content[:100]}...",
+                    text=f"[b]{note['title']}[/b]\n{note['snippet']}",
                     markup=True,
                     size_hint_y=None,
                 )
@@ -721,13 +762,10 @@ class NoteTaking(Screen):
         # Change the background color of the note content and title
         self.edit_note_content.background_color = color  # Change the background color of the note content
         self.edit_note_title.background_color = color  # Change the background color of the title
+        self.current_note_color = color
 
-        # Update the color in the database
-        self.cursor.execute("UPDATE notes SET Color=? WHERE id=?", (str(color), note_id))
-        self.db.commit()
-
-        # Refresh the note card in the grid to reflect the new color
-        self.load_notes()  # Reload notes to refresh the display
+        # Queue the color update; DatabaseManager group-commits it off the UI thread
+        self.db_manager.update_note_color(note_id, color)
 
     def update_border(self, instance, value):
         """Update the rectangle size and position for the border."""
@@ -331,7 +331,8 @@ class TaskList(Screen):
 
     def load_tasks(self):
         """Load tasks from database."""
-        tasks = self.db_manager.get_tasks(self.user_id)
+        with self.db_manager.action("TaskList.load_tasks"):
+            tasks = self.db_manager.get_tasks(self.user_id)
 
         # Clear existing task containers before loading new tasks
         self.pending_container.clear_widgets()
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+DEFAULT_KEEP = 5  # Snapshots kept per database; older ones are deleted
+DEFAULT_PAGES = 256  # Pages copied per backup step (1 MiB at the default 4 KiB page size)
+DEFAULT_SLEEP = 0.005  # Seconds between steps, leaving room for other connections
+BACKUP_INTERVAL = 24 * 60 * 60  # Seconds between the app's automatic snapshots
+
+
+class BackupService:
+    """Online snapshots of a database into rotated files, copied on a worker thread.
+
+    The copy uses sqlite3's backup API over its own read-only connection,
+    `pages` pages per step with a `sleep` in between, all inside one read
+    transaction. In WAL mode readers never block the writer, so the app
+    keeps writing during a backup; the snapshot is the database as it was
+    when the copy started.
+
+    Snapshots are <directory>/<name>-YYYYmmdd-HHMMSS-ffffff.db, written to a
+    .partial file first and renamed once complete.
+    """
+
+    def __init__(self, db_name, directory=None, keep=DEFAULT_KEEP, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP):
+        self.db_name = db_name
+        self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(db_name)), "backups")
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self._prefix = os.path.splitext(os.path.basename(db_name))[0] + "-"
+        self._lock = threading.Lock()  # One copy at a time
+        self._thread = None
+
+    def snapshots(self):
+        """Paths of the existing snapshots, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(self._prefix) and name.endswith(".db")
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def last_snapshot_age(self):
+        """Seconds since the newest snapshot was written, or None if there is none."""
+        snapshots = self.snapshots()
+        if not snapshots:
+            return None
+        return time.time() - os.path.getmtime(snapshots[-1])
+
+    def backup(self, progress=None):
+        """Copy the database into a new snapshot on the calling thread, rotate, and return its path.
+
+        progress(remaining, total) is called after each step with page counts.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            path = os.path.join(self.directory, f"{self._prefix}{stamp}.db")
+            partial = path + ".partial"
+            uri = f"file:{quote(os.path.abspath(self.db_name))}?mode=ro"
+            source = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            target = sqlite3.connect(partial)
+            try:
+                # Hold one read transaction for the whole copy: each step then reads
+                # the same WAL snapshot, and commits made meanwhile by other
+                # connections neither wait for the copy nor make SQLite restart it
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                source.backup(
+                    target, pages=self.pages, sleep=self.sleep,
+                    progress=(lambda status, remaining, total: progress(remaining, total)) if progress else None,
+                )
+                # A snapshot is a single self-contained file, without WAL side files
+                target.execute("PRAGMA journal_mode=DELETE")
+            except BaseException:
+                target.close()
+                os.remove(partial)
+                raise
+            finally:
+                source.close()
+            target.close()
+            os.replace(partial, path)
+            self.rotate()
+            return path
+
+    def start(self, progress=None, done=None):
+        """Run backup() on a daemon worker thread and return the thread.
+
+        done(path, error) is called on the worker when the copy ends; path
+        is None if it failed. If a backup is already running, its thread is
+        returned instead of starting another.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+
+            def run():
+                try:
+                    path = self.backup(progress)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Error backing up {self.db_name}: {e}")
+                    if done:
+                        done(None, e)
+                    return
+                print(f"Backed up {self.db_name} to {path}")
+                if done:
+                    done(path, None)
+
+            self._thread = threading.Thread(target=run, name="database-backup", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def rotate(self):
+        """Delete all but the newest `keep` (at least one) snapshots and return the deleted paths."""
+        snapshots = self.snapshots()
+        removed = snapshots[:max(0, len(snapshots) - max(1, self.keep))]
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing old backup {path}: {e}")
+        return removed
@@ -0,0 +1,291 @@
+"""Time DatabaseManager against synthetic datasets of increasing size.
+
+Run from the project root:
+
+    python -m database.benchmark --rows 10000 100000 --seed 7 --out benchmark.json
+
+For each size a fresh database is filled by database.synthetic_data, then
+every public DatabaseManager method and the queries each screen runs when it
+opens are timed. The first run of each call starts from an empty read cache
+(cold); the other runs show the cached/warm cost. Results are written as JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database.database_manager import DatabaseManager
+from database.synthetic_data import ANCHOR_DATE, PASSWORD, generate_dataset, username
+
+# Administrative methods with no workload of their own worth timing
+NOT_TIMED = {
+    "action",
+    "backup",
+    "cache_stats",
+    "clear_cache",
+    "close_connection",
+    "create_tables",
+    "disable_note_compression",
+    "disable_write_behind",
+    "dump_stats",
+    "enable_note_compression",
+    "enable_write_behind",
+    "ensure_default_user",
+    "execute_query",
+    "flush",
+    "get_schema_version",
+    "list_backups",
+    "reset_instance",
+    "reset_stats",
+    "save_note",  # Legacy insert without a user
+    "set_pragma_profile",
+    "set_slow_query_threshold",
+    "stats",
+    "subscribe",
+    "unsubscribe",
+    "update_schema",
+}
+
+# Same periods as the expense story in components/expense_tracker.py
+PERIOD_DAYS = {"1w": 7, "1m": 30, "3m": 90, "6m": 180, "1y": 365, "all": None}
+
+
+def dataset_ids(db, user_id):
+    """IDs and names of the heaviest user's rows to aim the calls at."""
+    def ids(query):
+        return [row[0] for row in db.execute_query(query, (user_id,), fetch_all=True)]
+
+    return {
+        "notes": ids("SELECT id FROM notes WHERE user_id = ? ORDER BY id"),
+        "tasks": ids("SELECT id FROM tasks WHERE user_id = ? ORDER BY id"),
+        "flashcards": ids("SELECT id FROM flashcards WHERE user_id = ? ORDER BY id"),
+        "expenses": ids("SELECT id FROM expenses WHERE user_id = ? ORDER BY id"),
+        "decks": ids("SELECT DISTINCT cards_name FROM flashcards WHERE user_id = ? ORDER BY cards_name"),
+    }
+
+
+def pick(items, i):
+    return items[i % len(items)]
+
+
+def method_calls(user_id, ids, repeat, work_dir):
+    """(method name, args(run) -> tuple) for every timed method, deletes last.
+
+    The last `repeat` IDs of each table (and the last deck) are kept for the
+    deletes, so every delete run removes a row that still exists.
+    """
+    notes, tasks, cards, expenses = (ids[table][:-repeat] or ids[table]
+                                     for table in ("notes", "tasks", "flashcards", "expenses"))
+    decks = ids["decks"][:-1] or ids["decks"]
+    anchor = ANCHOR_DATE.isoformat()
+    month = ANCHOR_DATE.strftime("%Y-%m")
+    year_ago = (ANCHOR_DATE - timedelta(days=365)).strftime("%Y-%m")
+
+    export_dir = os.path.join(work_dir, "export")
+    notes_file = os.path.join(work_dir, "notes.jsonl")
+
+    def deleting(table):
+        return lambda i: (ids[table][-1 - i],)
+
+    return [
+        ("register_user", lambda i: (f"bench_new_user_{i}", PASSWORD)),
+        ("verify_user", lambda i: (username(0), PASSWORD)),
+        ("add_note", lambda i: (user_id, "Benchmark note", "Benchmark body " * 40)),
+        ("add_notes_bulk", lambda i: (user_id, [("Bulk note", "Bulk body " * 40, None)] * 100)),
+        ("get_notes", lambda i: (user_id,)),
+        ("get_note_cards", lambda i: (user_id,)),
+        ("get_note", lambda i: (pick(notes, i),)),
+        ("update_note", lambda i: (pick(notes, i), "Edited title", "Edited body " * 40)),
+        ("update_note_color", lambda i: (pick(notes, i), (1, 0.92, 0.8, 1))),
+        ("search_notes", lambda i: (user_id, "deadline")),
+        ("search_notes_ranked", lambda i: (user_id, "project deadline", 100)),
+        ("get_notes_page", lambda i: (user_id, None, None, 50)),
+        ("iter_notes", lambda i: (user_id,)),
+        ("add_task", lambda i: (user_id, "Benchmark task")),
+        ("add_tasks_bulk", lambda i: (user_id, ["Bulk task"] * 100)),
+        ("update_task_status", lambda i: (pick(tasks, i), "Completed")),
+        ("update_task_statuses_bulk", lambda i: ([(task_id, "Pending") for task_id in tasks[:100]],)),
+        ("get_tasks", lambda i: (user_id,)),
+        ("get_tasks_page", lambda i: (user_id, None, 50)),
+        ("iter_tasks", lambda i: (user_id,)),
+        ("add_flashcard", lambda i: (user_id, "Benchmark deck", "Front", "Back")),
+        ("add_flashcards_bulk", lambda i: (user_id, "Bulk deck", [("Front", "Back")] * 100)),
+        ("update_flashcard", lambda i: (pick(cards, i), pick(decks, i), "Front", "Back")),
+        ("update_flashcards_bulk", lambda i: ([(card_id, "Front", "Back") for card_id in cards[:100]],)),
+        ("update_flashcard_by_name", lambda i: (pick(decks, i), "Front", "Back")),
+        ("get_flashcards", lambda i: (user_id,)),
+        ("get_flashcard", lambda i: (pick(cards, i),)),
+        ("get_flashcards_by_name", lambda i: (pick(decks, i),)),
+        ("get_flashcards_by_user_id", lambda i: (user_id,)),
+        ("get_all_cards_names", lambda i: ()),
+        ("get_all_flashcards", lambda i: ()),
+        ("search_flashcards", lambda i: (user_id, "history")),
+        ("search_flashcards_ranked", lambda i: (user_id, "history", 100)),
+        ("get_flashcards_page", lambda i: (user_id, None, 50)),
+        ("iter_flashcards", lambda i: (user_id,)),
+        ("get_deck_sizes", lambda i: (user_id,)),
+        ("add_expense", lambda i: (user_id, "Benchmark lunch", "Food", 120.0, anchor)),
+        ("add_expenses_bulk", lambda i: (user_id, [("Bulk tea", "Food", 20.0, anchor)] * 100)),
+        ("update_expense", lambda i: (pick(expenses, i), "Edited", "Food", 240.0, anchor)),
+        ("show_expense", lambda i: ()),
+        ("get_expenses_by_user_id", lambda i: (user_id,)),
+        ("get_expenses_page", lambda i: (user_id, None, None, 50)),
+        ("iter_expenses", lambda i: (user_id,)),
+        ("get_total_spending_by_user_id", lambda i: (user_id, month)),
+        ("get_monthly_spending", lambda i: (user_id, year_ago, month)),
+        ("get_category_trends", lambda i: (user_id, year_ago, month)),
+        ("expense_summary", lambda i: (user_id, None, None)),
+        ("get_dashboard", lambda i: (user_id,)),
+        ("export_user_data", lambda i: (user_id, export_dir)),
+        ("export_table", lambda i: (user_id, "notes", notes_file)),
+        ("import_user_data", lambda i: (user_id, export_dir)),  # Every record is a duplicate: measures the dedup pass
+        ("import_table", lambda i: (user_id, "notes", notes_file)),
+        ("rebuild_expense_rollup", lambda i: ()),
+        ("rebuild_counters", lambda i: ()),
+        ("delete_note", deleting("notes")),
+        ("delete_task", deleting("tasks")),
+        ("delete_flashcard", deleting("flashcards")),
+        ("delete_expense", deleting("expenses")),
+        ("delete_flashcards_by_name", lambda i: (ids["decks"][-1],)),
+    ]
+
+
+def screen_calls(db, user_id, ids):
+    """(screen load path, callable) for what each screen queries when it opens."""
+    note_id = ids["notes"][0]
+    deck = ids["decks"][0]
+    paths = [
+        ("LoginScreen.login", lambda: db.verify_user(username(0), PASSWORD)),
+        ("MainWindow.on_enter", lambda: db.get_dashboard(user_id)),
+        ("NoteTaking.load_notes", lambda: db.get_note_cards(user_id)),
+        ("NoteTaking.open_note", lambda: db.get_note(note_id)),
+        ("NoteTaking.search", lambda: db.search_notes_ranked(user_id, "project deadline", 100)),
+        ("TaskList.load_tasks", lambda: db.get_tasks(user_id)),
+        ("FlashcardScreen.load_flashcards", lambda: db.get_deck_sizes(user_id)),
+        ("FlashcardScreen.open_deck", lambda: db.get_flashcards_by_name(deck)),
+        ("ExpenseTracker.refresh_expenses_list", lambda: db.get_expenses_page(user_id, limit=5)),
+    ]
+    for period, days in PERIOD_DAYS.items():
+        start = (ANCHOR_DATE - timedelta(days=days)).isoformat() if days else None
+        paths.append((f"ExpenseTracker.expense_story[{period}]",
+                      lambda start=start: db.expense_summary(user_id, start)))
+    return paths
+
+
+def time_runs(db, call, repeat):
+    """Timings in ms of `repeat` runs of call(run), the first one with an empty read cache."""
+    db.clear_cache()
+    samples = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        result = call(run)
+        if hasattr(result, "__next__"):
+            result = list(result)  # Generators only query when consumed
+        samples.append((time.perf_counter() - start) * 1000)
+    db.flush()
+    return {
+        "cold_ms": round(samples[0], 3),
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+        "rows": len(result) if isinstance(result, (list, tuple)) else None,
+    }
+
+
+def run_dataset(path, rows, seed, repeat):
+    """Generate one dataset at `path` and return its timings."""
+    DatabaseManager.reset_instance()
+    db = DatabaseManager(path)
+    try:
+        start = time.perf_counter()
+        dataset = generate_dataset(db, rows, seed)
+        generate_s = time.perf_counter() - start
+        db.execute_query("ANALYZE", commit=True)
+
+        user_id = dataset["user_ids"][0]
+        ids = dataset_ids(db, user_id)
+        calls = method_calls(user_id, ids, repeat, os.path.dirname(path))
+        public_methods = {
+            name for name in dir(DatabaseManager)
+            if not name.startswith("_") and callable(getattr(DatabaseManager, name))
+        }
+        untimed = sorted(public_methods - NOT_TIMED - {name for name, _ in calls})
+        for name in untimed:
+            print(f"Warning: no benchmark registered for DatabaseManager.{name}")
+
+        # Screens first: the method calls below add and delete rows
+        screens = {name: time_runs(db, lambda run, load=load: load(), repeat)
+                   for name, load in screen_calls(db, user_id, ids)}
+        methods = {}
+        for name, args in calls:
+            method = getattr(db, name)
+            methods[name] = time_runs(db, lambda run, method=method, args=args: method(*args(run)), repeat)
+        return {
+            "rows": rows,
+            "users": dataset["users"],
+            "counts": dataset["counts"],
+            "heaviest_user_rows": {table: len(values) for table, values in ids.items()},
+            "generate_s": round(generate_s, 3),
+            "db_bytes": os.path.getsize(path),
+            "screens": screens,
+            "methods": methods,
+            "untimed": untimed,
+        }
+    finally:
+        DatabaseManager.reset_instance()
+
+
+def run_benchmark(sizes, seed=0, repeat=5, db_dir=None):
+    """Benchmark every dataset size and return the results as one JSON-ready dict."""
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "datasets": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in sizes:
+            path = os.path.join(db_dir or tmp_dir, f"benchmark_{rows}_{seed}.db")
+            if os.path.exists(path):
+                os.remove(path)
+            print(f"Benchmarking {rows} rows...")
+            results["datasets"].append(run_dataset(path, rows, seed, repeat))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m database.benchmark", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="dataset sizes to run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic data")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per call (the first one is cold)")
+    parser.add_argument("--db-dir", help="keep the generated databases in this directory")
+    parser.add_argument("--out", default="benchmark.json", help="JSON results file (default: benchmark.json)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = run_benchmark(args.rows, args.seed, args.repeat, args.db_dir)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    for dataset in results["datasets"]:
+        slowest = sorted(dataset["methods"].items(), key=lambda item: item[1]["median_ms"], reverse=True)[:5]
+        summary = ", ".join(f"{name} {timing['median_ms']:.1f} ms" for name, timing in slowest)
+        print(f"{dataset['rows']} rows: generated in {dataset['generate_s']:.1f} s; slowest: {summary}")
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Fail when any DatabaseManager query is planned as a full table scan.
+
+Run from the project root:
+
+    python -m database.check_query_plans
+
+Every public DatabaseManager method is called once against a throwaway
+database while a trace callback records the SQL it issues. Each recorded
+SELECT/UPDATE/DELETE is then run through EXPLAIN QUERY PLAN.
+"""
+import os
+import re
+import sys
+import tempfile
+
+from database.database_manager import DatabaseManager
+
+# Methods that read an entire table on purpose (not scoped to a user).
+ALLOWED_SCANS = {
+    "get_all_flashcards",
+    "show_expense",
+}
+
+# Methods that issue no per-row queries worth planning.
+SKIPPED_METHODS = {
+    "action",
+    "backup",  # Copies pages with the backup API; no queries
+    "cache_stats",
+    "clear_cache",
+    "close_connection",
+    "create_tables",
+    "disable_note_compression",
+    "disable_write_behind",
+    "enable_note_compression",
+    "enable_write_behind",
+    "dump_stats",
+    "ensure_default_user",
+    "execute_query",
+    "flush",
+    "get_schema_version",
+    "list_backups",
+    "rebuild_counters",  # Deliberately reads every table
+    "reset_instance",
+    "rebuild_expense_rollup",  # Deliberately reads the whole ledger
+    "reset_stats",
+    "save_note",  # Plain INSERT; nothing to plan
+    "set_pragma_profile",
+    "set_slow_query_threshold",
+    "stats",
+    "subscribe",
+    "unsubscribe",
+    "update_schema",
+}
+
+PLANNED_STATEMENT = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+# FTS5 reads its own shadow tables (x_config, x_data, ...) by key; those are not ours to plan
+FTS_SHADOW_STATEMENT = re.compile(r"'main'\.'\w+_(?:config|data|idx|docsize|content)'")
+# Virtual tables (FTS5) report "SCAN x VIRTUAL TABLE INDEX ..." and are fine
+TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\b(?:USING|VIRTUAL TABLE)\b)")
+
+
+def method_calls(user_id, tmp_dir):
+    """(method name, args) for every public DatabaseManager method, deletes last."""
+    export_dir = os.path.join(tmp_dir, "export")
+    notes_csv = os.path.join(tmp_dir, "notes.csv")
+    return [
+        ("register_user", ("plan_check_user", "secret")),
+        ("verify_user", ("plan_check_user", "secret")),
+        ("add_note", (user_id, "Title", "Body")),
+        ("get_notes", (user_id,)),
+        ("get_note_cards", (user_id,)),
+        ("get_note", (1,)),
+        ("update_note", (1, "Title", "Body")),
+        ("update_note_color", (1, (1, 0.92, 0.8, 1))),
+        ("search_notes", (user_id, "body")),
+        ("search_notes_ranked", (user_id, 'bo "title"')),
+        ("add_task", (user_id, "Task")),
+        ("update_task_status", (1, "Completed")),
+        ("get_tasks", (user_id,)),
+        ("add_flashcard", (user_id, "Deck", "Front", "Back")),
+        ("get_flashcards", (user_id,)),
+        ("search_flashcards", (user_id, "front")),
+        ("search_flashcards_ranked", (user_id, "fro")),
+        ("get_all_cards_names", ()),
+        ("update_flashcard", (1, "Deck", "Front", "Back")),
+        ("get_flashcard", (1,)),
+        ("get_all_flashcards", ()),
+        ("get_flashcards_by_name", ("Deck",)),
+        ("update_flashcard_by_name", ("Deck", "Front", "Back")),
+        ("get_flashcards_by_user_id", (user_id,)),
+        ("add_expense", (user_id, "Lunch", "Food", 120.0, "2025-01-15")),
+        ("update_expense", (1, "Dinner", "Food", 240.0, "2025-01-15")),
+        ("show_expense", ()),
+        ("add_flashcards_bulk", (user_id, "Deck", [("Front", "Back"), ("Front 2", "Back 2")])),
+        ("update_flashcards_bulk", ([(1, "Front", "Back")],)),
+        ("add_expenses_bulk", (user_id, [("Tea", "Food", 20.0, "2025-01-16")])),
+        ("add_tasks_bulk", (user_id, ["Task 2", "Task 3"])),
+        ("update_task_statuses_bulk", ([(2, "Completed"), (3, "Pending")],)),
+        ("add_notes_bulk", (user_id, [("Title 2", "Body 2", None), ("Title 3", "Body 3", (1, 1, 1, 1))])),
+        ("get_expenses_by_user_id", (user_id,)),
+        ("get_total_spending_by_user_id", (user_id, "2025-01")),
+        ("expense_summary", (user_id, "2025-01-01", "2025-02-01")),
+        ("get_monthly_spending", (user_id, "2024-01", "2025-12")),
+        ("get_category_trends", (user_id, "2024-01", "2025-12")),
+        ("get_dashboard", (user_id,)),
+        ("get_deck_sizes", (user_id,)),
+        ("get_notes_page", (user_id, "2025-01-01 00:00:00", 10, 20)),
+        ("get_tasks_page", (user_id, 10, 20)),
+        ("get_expenses_page", (user_id, "2025-01-31", 10, 20)),
+        ("get_flashcards_page", (user_id, 10, 20)),
+        ("iter_notes", (user_id,)),
+        ("iter_tasks", (user_id,)),
+        ("iter_expenses", (user_id,)),
+        ("iter_flashcards", (user_id,)),
+        ("export_user_data", (user_id, export_dir)),
+        ("export_table", (user_id, "notes", notes_csv)),
+        ("import_user_data", (user_id, export_dir)),
+        ("import_table", (user_id, "notes", notes_csv)),
+        ("delete_note", (1,)),
+        ("delete_task", (1,)),
+        ("delete_flashcard", (1,)),
+        ("delete_flashcards_by_name", ("Deck",)),
+        ("delete_expense", (1,)),
+    ]
+
+
+def table_scans(connection, statement):
+    """Return the tables EXPLAIN QUERY PLAN reports as fully scanned."""
+    plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+    scans = []
+    for row in plan:
+        match = TABLE_SCAN.match(row[-1])
+        if match and not match.group(1).startswith("sqlite_"):
+            scans.append(match.group(1))
+    return scans
+
+
+def check_query_plans():
+    """Return a list of failure messages; empty when every plan uses an index."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # max_readers=0 keeps every statement on the traced writer connection
+        db = DatabaseManager(os.path.join(tmp_dir, "plan_check.db"), max_readers=0)
+        statements = []
+        failures = []
+        try:
+            public_methods = {
+                name for name in dir(DatabaseManager)
+                if not name.startswith("_") and callable(getattr(DatabaseManager, name))
+            }
+            # With a subscriber, writes also read back the rows they changed
+            for table in ("notes", "tasks", "flashcards", "expenses"):
+                db.subscribe(table, lambda event: None)
+            calls = method_calls(user_id=1, tmp_dir=tmp_dir)
+            unchecked = public_methods - SKIPPED_METHODS - {name for name, _ in calls}
+            for name in sorted(unchecked):
+                failures.append(f"{name}: no plan check registered for this method")
+
+            for name, args in calls:
+                traced = []
+                db._connection.set_trace_callback(traced.append)
+                try:
+                    result = getattr(db, name)(*args)
+                    if name.startswith("iter_"):
+                        list(result)  # Generators only query when consumed
+                finally:
+                    db._connection.set_trace_callback(None)
+                statements.extend((name, sql) for sql in traced if PLANNED_STATEMENT.match(sql))
+
+            for name, sql in statements:
+                if sql.strip() == "SELECT 1" or name in ALLOWED_SCANS or FTS_SHADOW_STATEMENT.search(sql):
+                    continue
+                for table in table_scans(db._connection, sql):
+                    failures.append(f"{name}: full scan of {table} in: {' '.join(sql.split())}")
+        finally:
+            DatabaseManager.reset_instance()
+    return failures
+
+
+def main():
+    failures = check_query_plans()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print("All DatabaseManager queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
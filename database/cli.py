@@ -0,0 +1,137 @@
+"""Maintenance commands for the Fusion database.
+
+Run from the project root:
+
+    python -m database.cli [--db Fusion.db] rebuild-rollup
+    python -m database.cli [--db Fusion.db] rebuild-counters
+    python -m database.cli [--db Fusion.db] export --user-id 1 --dir backup [--format jsonl|csv]
+    python -m database.cli [--db Fusion.db] import --user-id 1 --dir backup [--format jsonl|csv]
+    python -m database.cli [--db Fusion.db] backup [--dir backups] [--keep 5]
+    python -m database.cli --db bench.db generate --rows 100000 [--seed 0] [--users N]
+"""
+import argparse
+import sys
+
+from database.backup import DEFAULT_KEEP
+from database.data_transfer import FORMATS, TRANSFER_TABLES
+from database.database_manager import DatabaseManager
+from database.synthetic_data import generate_dataset
+
+
+def rebuild_rollup(db, args):
+    """Recompute expense_monthly_rollup from the expenses ledger."""
+    db.rebuild_expense_rollup()
+    rows = db.execute_query("SELECT COUNT(*) FROM expense_monthly_rollup", fetch_one=True)
+    print(f"Rebuilt expense rollup: {rows[0]} monthly buckets")
+    return 0
+
+
+def rebuild_counters(db, args):
+    """Recompute the dashboard and deck counters."""
+    db.rebuild_counters()
+    rows = db.execute_query("SELECT COUNT(*) FROM user_counters", fetch_one=True)
+    print(f"Rebuilt counters for {rows[0]} users")
+    return 0
+
+
+def generate(db, args):
+    """Fill the database with deterministic synthetic data."""
+    dataset = generate_dataset(db, args.rows, args.seed, args.users)
+    counts = ", ".join(f"{count} {table}" for table, count in dataset["counts"].items())
+    print(f"Generated {dataset['users']} users: {counts}")
+    return 0
+
+
+def backup(db, args):
+    """Snapshot the database into the backup directory and rotate old snapshots."""
+    result = {}
+    thread = db.backup(args.dir, args.keep, done=lambda path, error: result.update(path=path))
+    thread.join()
+    if not result.get('path'):
+        return 1
+    print(f"{len(db.list_backups(args.dir))} snapshots kept")
+    return 0
+
+
+def show_progress(table, rows):
+    print(f"  {table}: {rows} rows", flush=True)
+
+
+def export_data(db, args):
+    """Write a user's tables to <dir>/<table>.<format>."""
+    counts = db.export_user_data(args.user_id, args.dir, args.format, args.tables, args.chunk_size, show_progress)
+    for table, rows in counts.items():
+        print(f"Exported {rows} {table}")
+    return 0
+
+
+def import_data(db, args):
+    """Add the rows of <dir>/<table>.<format> files to a user's tables."""
+    results = db.import_user_data(args.user_id, args.dir, args.format, args.tables, args.chunk_size,
+                                  not args.keep_duplicates, show_progress)
+    if not results:
+        print(f"No {args.format} files to import in {args.dir}")
+        return 1
+    for table, counts in results.items():
+        print(f"Imported {counts['imported']} {table} "
+              f"({counts['duplicates']} duplicates, {counts['invalid']} invalid skipped)")
+    return 0
+
+
+def add_transfer_arguments(parser):
+    parser.add_argument("--user-id", type=int, required=True, help="ID of the user whose data is moved")
+    parser.add_argument("--dir", required=True, help="directory holding one file per table")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="file format (default: jsonl)")
+    parser.add_argument("--tables", nargs="+", choices=TRANSFER_TABLES, default=TRANSFER_TABLES,
+                        help="tables to move (default: all)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per read page / transaction")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m database.cli", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="Fusion.db", help="database file (default: Fusion.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollup", help="recompute the monthly expense rollup")
+    rebuild.set_defaults(handler=rebuild_rollup)
+
+    counters = commands.add_parser("rebuild-counters", help="recompute the dashboard and deck counters")
+    counters.set_defaults(handler=rebuild_counters)
+
+    snapshot = commands.add_parser("backup", help="snapshot the database without blocking other connections")
+    snapshot.add_argument("--dir", help="snapshot directory (default: backups/ next to the database)")
+    snapshot.add_argument("--keep", type=int, default=DEFAULT_KEEP,
+                          help=f"snapshots to keep (default: {DEFAULT_KEEP})")
+    snapshot.set_defaults(handler=backup)
+
+    export = commands.add_parser("export", help="export a user's notes, tasks, flashcards and expenses")
+    add_transfer_arguments(export)
+    export.set_defaults(handler=export_data)
+
+    load = commands.add_parser("import", help="import notes, tasks, flashcards and expenses for a user")
+    add_transfer_arguments(load)
+    load.add_argument("--keep-duplicates", action="store_true", help="import records the user already has")
+    load.set_defaults(handler=import_data)
+
+    synthetic = commands.add_parser("generate", help="add synthetic users, notes, tasks, flashcards and expenses")
+    synthetic.add_argument("--rows", type=int, required=True, help="approximate number of rows to add")
+    synthetic.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    synthetic.add_argument("--users", type=int, help="number of users (default: rows / 2000)")
+    synthetic.set_defaults(handler=generate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = DatabaseManager(args.db)
+    try:
+        return args.handler(db, args)
+    except Exception as e:
+        print(f"Error running {args.command}: {e}")
+        return 1
+    finally:
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
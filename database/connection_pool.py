@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+from urllib.parse import quote
+
+
+# PRAGMA presets applied to every connection the pool opens.
+# cache_size is negative so SQLite reads it as KiB instead of pages.
+PRAGMA_PROFILES = {
+    "balanced": {
+        "cache_size": -8000,
+        "mmap_size": 64 * 1024 * 1024,
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+    },
+    "performance": {
+        "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024,
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+    },
+    "low_memory": {
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "synchronous": "NORMAL",
+        "temp_store": "FILE",
+    },
+    "durable": {
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "synchronous": "FULL",
+        "temp_store": "MEMORY",
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+DEFAULT_MAX_READERS = 4
+# Prepared statements kept per connection, keyed by SQL text. DatabaseManager
+# issues well over sqlite3's default of 128 distinct statements, so keep them all.
+DEFAULT_CACHED_STATEMENTS = 512
+
+
+class ConnectionPool:
+    """One read-write connection plus a bounded set of per-thread read-only connections.
+
+    The database runs in WAL mode, so readers never block the writer and the
+    writer never blocks readers. Writes are serialised through `write_lock`.
+    """
+
+    def __init__(self, db_name, profile=DEFAULT_PROFILE, max_readers=DEFAULT_MAX_READERS, timeout=5.0,
+                 cached_statements=DEFAULT_CACHED_STATEMENTS, on_connect=None):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile: {profile}")
+        self.db_name = db_name
+        self.profile = profile
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.on_connect = on_connect  # Called with every new connection, e.g. to register SQL functions
+        self.write_lock = threading.RLock()
+        self._readers_lock = threading.Lock()
+        self._readers = {}  # threading.Thread -> read-only connection
+        self._local = threading.local()
+        self.supports_readers = db_name != ":memory:" and max_readers > 0
+
+        self.writer = self._connect(read_only=False)
+        mode = self.writer.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if str(mode).lower() != "wal":
+            # Without WAL a reader would block the writer, so keep everything on one connection
+            self.supports_readers = False
+
+    def _connect(self, read_only):
+        """Open a connection and apply the active PRAGMA profile."""
+        if read_only:
+            uri = f"file:{quote(os.path.abspath(self.db_name))}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False,
+                                         cached_statements=self.cached_statements)
+        else:
+            connection = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False,
+                                         cached_statements=self.cached_statements)
+        connection.row_factory = sqlite3.Row
+        self._apply_profile(connection, read_only)
+        return connection
+
+    def _apply_profile(self, connection, read_only=False):
+        """Apply the PRAGMA values of the active profile to a connection, then run on_connect.
+
+        Changing temp_store drops a connection's TEMP views, so on_connect
+        (which may create them) runs again every time and must be repeatable.
+        """
+        for pragma, value in PRAGMA_PROFILES[self.profile].items():
+            if read_only and pragma == "synchronous":
+                continue  # Only meaningful for connections that write
+            connection.execute(f"PRAGMA {pragma}={value}")
+        if self.on_connect is not None:
+            self.on_connect(connection)
+
+    def set_profile(self, profile):
+        """Switch every open connection to another PRAGMA profile."""
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile: {profile}")
+        self.profile = profile
+        with self.write_lock:
+            self._apply_profile(self.writer)
+        with self._readers_lock:
+            for connection in self._readers.values():
+                self._apply_profile(connection, read_only=True)
+
+    def reader(self):
+        """Return the calling thread's read-only connection.
+
+        Returns None when readers are unsupported or the pool is exhausted, in
+        which case the caller should fall back to the writer connection.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None or not self.supports_readers:
+            return connection
+
+        with self._readers_lock:
+            if len(self._readers) >= self.max_readers:
+                self._prune_dead_readers()
+            if len(self._readers) >= self.max_readers:
+                return None
+            try:
+                connection = self._connect(read_only=True)
+            except sqlite3.Error as e:
+                print(f"Error opening read connection: {e}")
+                return None
+            self._readers[threading.current_thread()] = connection
+
+        self._local.connection = connection
+        return connection
+
+    def _prune_dead_readers(self):
+        """Close connections owned by threads that have exited."""
+        for thread in [t for t in self._readers if not t.is_alive()]:
+            self._readers.pop(thread).close()
+
+    def reader_count(self):
+        """Number of read-only connections currently open."""
+        with self._readers_lock:
+            return len(self._readers)
+
+    def close(self):
+        """Close the writer and every read-only connection."""
+        with self._readers_lock:
+            for connection in self._readers.values():
+                connection.close()
+            self._readers.clear()
+        self._local = threading.local()
+        with self.write_lock:
+            self.writer.close()
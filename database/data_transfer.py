@@ -0,0 +1,144 @@
+"""CSV and JSON Lines files of a user's notes, tasks, flashcards and expenses.
+
+Each table goes to its own file of records with the fields in
+TRANSFER_FIELDS. Row and user IDs are left out, so a file can be imported
+into any account. Files are read and written one record at a time.
+"""
+import csv
+import hashlib
+import json
+import os
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+TRANSFER_TABLES = ("notes", "tasks", "flashcards", "expenses")
+FORMATS = ("jsonl", "csv")
+TRANSFER_FIELDS = {
+    "notes": ("title", "content", "color", "created_at"),
+    "tasks": ("task", "status"),
+    "flashcards": ("cards_name", "front", "back", "created_at"),
+    "expenses": ("exp_name", "exp_type", "exp_amount", "exp_date"),
+}
+# Fields that make two records the same one when importing, so importing a file twice adds nothing
+DEDUP_FIELDS = {
+    "notes": ("title", "content"),
+    "tasks": ("task",),
+    "flashcards": ("cards_name", "front", "back"),
+    "expenses": ("exp_name", "exp_type", "exp_amount", "exp_date"),
+}
+OPTIONAL_FIELDS = {"color", "created_at", "status"}
+TASK_STATUSES = ("Pending", "Completed")
+
+
+def file_format(path):
+    """'jsonl' or 'csv', from the file extension."""
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file type {path!r}; use .jsonl or .csv")
+    return fmt
+
+
+def export_record(table, row):
+    """The file record of a row from DatabaseManager's export queries."""
+    record = {field: row[field] for field in TRANSFER_FIELDS[table] if field in row.keys()}
+    if table == "notes":
+        record["color"] = f"#{row['color_rgba']:08x}"
+    elif table == "expenses":
+        record["exp_amount"] = str(Decimal(row["amount_minor"]).scaleb(-2))
+    return record
+
+
+def clean_record(table, record):
+    """Validate an imported record and bring its values to the exported form.
+
+    Raises ValueError for missing fields or unreadable values.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("not a record")
+    cleaned = {}
+    for field in TRANSFER_FIELDS[table]:
+        value = record.get(field)
+        if field in OPTIONAL_FIELDS and value == "":
+            value = None  # CSV has no null
+        elif value is None and field not in OPTIONAL_FIELDS:
+            raise ValueError(f"missing {field}")
+        cleaned[field] = value if value is None else str(value)
+
+    if "created_at" in cleaned:
+        cleaned["created_at"] = timestamp(cleaned["created_at"])
+    if table == "notes":
+        color = cleaned["color"] or "#ffffffff"
+        if len(color) != 9 or not color.startswith("#"):
+            raise ValueError(f"invalid color {color!r}")
+        cleaned["color"] = f"#{int(color[1:], 16):08x}"
+    elif table == "tasks":
+        cleaned["status"] = cleaned["status"] or "Pending"
+        if cleaned["status"] not in TASK_STATUSES:
+            raise ValueError(f"invalid status {cleaned['status']!r}")
+    elif table == "expenses":
+        try:
+            cleaned["exp_amount"] = str(Decimal(cleaned["exp_amount"]).quantize(Decimal("0.01"), ROUND_HALF_UP))
+        except InvalidOperation:
+            raise ValueError(f"invalid amount {cleaned['exp_amount']!r}") from None
+        cleaned["exp_date"] = date.fromisoformat(cleaned["exp_date"][:10]).isoformat()
+    return cleaned
+
+
+def timestamp(value):
+    """'YYYY-MM-DD HH:MM:SS' like CURRENT_TIMESTAMP; now (UTC) when value is None."""
+    moment = datetime.now(timezone.utc) if value is None else datetime.fromisoformat(value)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_key(table, record):
+    """Short digest of a cleaned record's DEDUP_FIELDS."""
+    values = json.dumps([record[field] for field in DEDUP_FIELDS[table]], ensure_ascii=False)
+    return hashlib.blake2b(values.encode("utf-8"), digest_size=16).digest()
+
+
+def write_records(path, table, records):
+    """Write records to a .jsonl or .csv file one at a time and return how many were written."""
+    fmt = file_format(path)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, TRANSFER_FIELDS[table])
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for record in records:
+            write(record)
+            count += 1
+    return count
+
+
+def read_records(path):
+    """Yield (line number, record) from a .jsonl or .csv file; record is None for unreadable lines."""
+    fmt = file_format(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def with_progress(records, table, progress, every):
+    """Pass records through, calling progress(table, count) every `every` records and at the end."""
+    count = 0
+    for record in records:
+        yield record
+        count += 1
+        if progress and count % every == 0:
+            progress(table, count)
+    if progress and count % every:
+        progress(table, count)
@@ -1,37 +1,136 @@
 import sqlite3
+import json
 import os
+import re
 import threading
-from datetime import datetime
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from database.backup import DEFAULT_KEEP, BackupService
+from database.connection_pool import ConnectionPool, DEFAULT_MAX_READERS, DEFAULT_PROFILE
+from database.data_transfer import (
+    FORMATS, TRANSFER_TABLES, clean_record, export_record, read_records, record_key, with_progress, write_records,
+)
+from database.events import ChangeEvent, ChangeEventBus, DELETE, INSERT, UPDATE
+from database.instrumentation import QueryStats
+from database.note_colors import WHITE, pack_rgba
+from database.note_storage import (
+    create_notes_plain_view, drop_notes_plain_view, encode_note, note_preview, register_note_functions,
+)
+from database.migrations import (
+    ORDINAL_TO_JULIAN_DAY, SCHEMA_VERSION, get_schema_version, migrate, rebuild_counters, rebuild_expense_rollup,
+)
+from database.query_cache import QueryCache
+from database.write_behind import WriteBehindQueue
+
+# Table a write statement modifies, used to invalidate cached reads of it
+WRITE_TARGET = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)",
+    re.IGNORECASE,
+)
+# Tables that triggers write when the key table changes, so their cached reads go stale too
+DERIVED_TABLES = {
+    "expenses": ("expense_monthly_rollup", "user_counters"),
+    "flashcards": ("user_counters", "deck_counters"),
+    "notes": ("user_counters",),
+    "tasks": ("user_counters",),
+}
+# Views and indexes a table's rows are also read through
+TABLE_VIEWS = {
+    "expenses": ("expense_ledger",),
+    "notes": ("notes_plain", "notes_search", "notes_fts"),
+}
+SQL_NAME = re.compile(r"\w+")
+# Tables whose rows are read back through a view with the legacy column names
+ROW_SOURCES = {
+    "expenses": "expense_ledger",
+    "notes": "notes_plain",
+}
+# Keyset-paged reads of a user's rows for export, oldest first
+EXPORT_QUERIES = {
+    "notes": "SELECT id, title, content, color_rgba, created_at FROM notes_plain"
+             " WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+    "tasks": "SELECT id, task, status FROM tasks WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+    "flashcards": "SELECT id, cards_name, front, back, created_at FROM flashcards"
+                  " WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+    "expenses": f"""SELECT e.id, e.exp_name, c.name AS exp_type, e.amount_minor,
+                          date(e.day + {ORDINAL_TO_JULIAN_DAY}) AS exp_date
+                   FROM expenses e JOIN expense_categories c ON c.id = e.category_id
+                   WHERE e.user_id = ? AND e.id > ? ORDER BY e.id LIMIT ?""",
+}
+# Columns an import writes, in the order of _import_row's tuples
+IMPORT_COLUMNS = {
+    "notes": ("user_id", "title", "content", "content_codec", "preview", "content_length", "color_rgba",
+              "created_at"),
+    "tasks": ("user_id", "task", "status"),
+    "flashcards": ("user_id", "cards_name", "front", "back", "created_at"),
+    "expenses": ("user_id", "exp_name", "category_id", "amount_minor", "day"),
+}
+_MISS = object()
+# Day ordinals bounding open-ended expense ranges
+FIRST_DAY = date.min.toordinal()
+LAST_DAY = date.max.toordinal() + 1
 
 
 class DatabaseManager:
     _instance = None
     _lock = threading.Lock()
     _connection = None
+    _pool = None
+    _fts_tables = {}
+    _write_behind = None
+    _cache = None
+    _note_compression = None  # Minimum UTF-8 bytes before a note body is compressed
     
-    def __new__(cls, db_name="Fusion.db"):
+    def __new__(cls, db_name="Fusion.db", profile=DEFAULT_PROFILE, max_readers=DEFAULT_MAX_READERS):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super(DatabaseManager, cls).__new__(cls)
                     cls._instance._db_name = db_name
+                    cls._instance._profile = profile
+                    cls._instance._max_readers = max_readers
+                    cls._instance._stats = QueryStats()
+                    cls._instance._events = ChangeEventBus()
                     cls._instance._init_connection()
         return cls._instance
     
+    @classmethod
+    def reset_instance(cls):
+        """Close the shared instance so the next DatabaseManager(...) opens a fresh one.
+
+        For tools and benchmarks that work on several database files in one process.
+        """
+        with cls._lock:
+            if cls._instance is not None:
+                cls._instance.close_connection()
+                cls._instance = None
+
     def _init_connection(self):
-        """Initialize the database connection."""
-        db_exists = os.path.exists(self._db_name)
-        try:
-            self._connection = sqlite3.connect(self._db_name, check_same_thread=False)
-            self._connection.row_factory = sqlite3.Row
-            if not db_exists:
-                self.create_tables()
-            else:
-                self.update_schema()
+        """Initialize the connection pool; the writer doubles as `_connection`."""
+        try:
+            if self._pool is not None:
+                self._pool.close()
+            self._pool = ConnectionPool(self._db_name, profile=self._profile, max_readers=self._max_readers,
+                                        on_connect=self._prepare_connection)
+            self._fts_tables = {}
+            self._cache = QueryCache()
+            self._category_ids = {}  # expense category name -> id; categories are never renamed
+            self._backups = {}  # snapshot directory -> BackupService
+            self._connection = self._pool.writer
+            self.update_schema()
         except sqlite3.Error as e:
             print(f"Error initializing database: {e}")
             raise
     
+    @staticmethod
+    def _prepare_connection(connection):
+        """on_connect hook: note_text(), plus the notes_plain view once the schema is current."""
+        register_note_functions(connection)
+        if get_schema_version(connection) >= SCHEMA_VERSION:
+            create_notes_plain_view(connection)
+
     def _ensure_connection(self):
         """Ensure database connection is active."""
         try:
@@ -40,21 +139,93 @@ class DatabaseManager:
         except (sqlite3.Error, AttributeError):
             # Reconnect if the connection is dead
             self._init_connection()
-    
-    def _execute(self, query, params=(), commit=False):
-        """Execute a query with proper locking and connection management."""
-        with self._lock:
+
+    @staticmethod
+    def _is_read_query(query):
+        """True for statements that only read and can go to a reader connection."""
+        words = query.split(None, 1)
+        return bool(words) and words[0].upper() in ("SELECT", "WITH")
+
+    def _reader_for(self, query, commit):
+        """Pick a read-only connection for the query, or None to use the writer."""
+        if commit or not self._is_read_query(query):
+            return None
+        if self._connection is None or self._connection.in_transaction:
+            # Uncommitted writes are only visible on the writer
+            return None
+        return self._pool.reader()
+
+    def _execute(self, query, params=(), commit=False, fetch=None):
+        """Execute a query with proper locking and connection management.
+
+        Reads run lock-free on the calling thread's read-only connection;
+        everything else is serialised on the single writer connection.
+        With fetch="one" or fetch="all" the rows are fetched here (and
+        counted in stats()); otherwise the cursor is returned.
+        """
+        if self._pool is None:
+            self._init_connection()
+        self._flush_pending(query)
+        reader = self._reader_for(query, commit)
+        if reader is not None:
+            start = time.perf_counter()
+            try:
+                cursor = reader.cursor()
+                cursor.execute(query, params)
+                result = self._fetch(cursor, fetch)
+            except sqlite3.Error as e:
+                print(f"Database error: {e}")
+                self._record(reader, query, params, start, error=True)
+                raise
+            self._record(reader, query, params, start, cursor, fetch, result)
+            return result
+
+        wait_start = time.perf_counter()
+        with self._pool.write_lock:
+            start = time.perf_counter()
             try:
                 self._ensure_connection()
                 cursor = self._connection.cursor()
                 cursor.execute(query, params)
+                result = self._fetch(cursor, fetch)
                 if commit:
                     self._connection.commit()
-                return cursor
+                self._invalidate_for(query)
             except sqlite3.Error as e:
                 print(f"Database error: {e}")
                 self._connection.rollback()
+                self._record(self._connection, query, params, start, lock_wait=start - wait_start, error=True)
                 raise
+            self._record(self._connection, query, params, start, cursor, fetch, result, start - wait_start)
+            return result
+
+    @staticmethod
+    def _fetch(cursor, fetch):
+        if fetch == "one":
+            return cursor.fetchone()
+        if fetch == "all":
+            return cursor.fetchall()
+        return cursor
+
+    def _record(self, connection, query, params, start, cursor=None, fetch=None, result=None,
+                lock_wait=0.0, error=False):
+        """Add one statement to the query stats, capturing its plan if it ran slow."""
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if fetch == "all":
+            rows = len(result)
+        elif fetch == "one":
+            rows = int(result is not None)
+        elif cursor is not None and cursor.rowcount >= 0:
+            rows = cursor.rowcount  # Rows changed by a write
+        else:
+            rows = None
+        plan = None
+        if self._stats.is_slow(elapsed_ms) and self._stats.needs_plan(query):
+            try:
+                plan = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+            except sqlite3.Error as e:
+                plan = [f"(no plan: {e})"]
+        self._stats.record(query, elapsed_ms, rows, lock_wait * 1000, error, plan)
 
     def execute_query(self, query, params=(), fetch_one=False, fetch_all=False, commit=False):
         """Execute a query and return results based on parameters.
@@ -70,223 +241,416 @@ class DatabaseManager:
             Cursor results based on fetch parameters
         """
         try:
-            cursor = self._execute(query, params, commit)
+            fetch = "one" if fetch_one else "all" if fetch_all else None
+            result = self._execute(query, params, commit, fetch=None if commit else fetch)
             
             if commit:
-                self._connection.commit()
                 return True
             
-            if fetch_one:
-                return cursor.fetchone()
-            elif fetch_all:
-                return cursor.fetchall()
-            
-            return cursor
+            return result
             
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            if commit:
-                self._connection.rollback()
             return None
 
+    def set_pragma_profile(self, profile):
+        """Switch all pooled connections to another PRAGMA profile (see PRAGMA_PROFILES)."""
+        self._pool.set_profile(profile)
+        self._profile = profile
+
+    # 🔹 **Read Cache**
+    # Per-user reads that screens repeat on every entry are served from a
+    # bounded LRU. Each write bumps the generation of the table it touches,
+    # which makes every cached read of that table stale at once.
+    def _cached_query(self, tables, query, params=(), user_id=None, shape=None):
+        """Read-through cache for a SELECT over `tables`.
+
+        `shape(rows)` turns the fetched rows into the cached result.
+        Callers get a copy, so they may modify it freely.
+        """
+        key = (query, user_id, params)
+        result = self._cache.get(key, tables, _MISS)
+        if result is _MISS:
+            generations = self._cache.generations(tables)  # Taken before the read, so a racing write wins
+            result = self._execute(query, params, fetch="all")
+            if shape:
+                result = shape(result)
+            self._cache.put(key, generations, result)
+        return result
+
+    def _invalidate_for(self, query):
+        """Mark cached reads of the table a write statement modifies as stale."""
+        match = WRITE_TARGET.match(query)
+        if match:
+            table = match.group(1).lower()
+            self._cache.invalidate(table, *DERIVED_TABLES.get(table, ()))
+
+    def cache_stats(self):
+        """Read cache hit/miss counters and current entry count."""
+        return self._cache.stats()
+
+    def clear_cache(self):
+        """Drop every cached read and reset the counters."""
+        self._cache.clear()
+
+    # 🔹 **Query Stats**
+    def stats(self):
+        """Per-action, per-statement latency histograms, row counts, lock waits and slow queries."""
+        snapshot = self._stats.snapshot()
+        snapshot['cache'] = self.cache_stats()
+        return snapshot
+
+    def dump_stats(self, path):
+        """Write stats() to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def reset_stats(self):
+        """Forget all recorded query stats."""
+        self._stats.reset()
+
+    def set_slow_query_threshold(self, ms):
+        """Log (with EXPLAIN QUERY PLAN) statements slower than `ms`; None disables the log."""
+        self._stats.slow_query_ms = ms
+
+    def action(self, name):
+        """Context manager attributing the queries run inside it to a screen action.
+
+            with db.action("TaskList.load_tasks"):
+                tasks = db.get_tasks(user_id)
+        """
+        return self._stats.action(name)
+
+    # 🔹 **Change Events**
+    # Every mutating method publishes a ChangeEvent per row after it commits,
+    # so screens can patch the affected widget instead of reloading a list.
+    def subscribe(self, table, callback):
+        """Call `callback(ChangeEvent)` after every committed change to `table`."""
+        self._events.subscribe(table, callback)
+
+    def unsubscribe(self, table, callback):
+        """Stop delivering change events for `table` to `callback`."""
+        self._events.unsubscribe(table, callback)
+
+    def _publish(self, table, op, row_ids):
+        """Publish one event per changed row; new rows are only read when someone listens."""
+        if not self._events.has_subscribers(table) or not row_ids:
+            return
+        rows = {}
+        if op != DELETE:
+            row_ids = list(row_ids)
+            for start in range(0, len(row_ids), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = row_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                source = ROW_SOURCES.get(table, table)
+                for row in self._execute(f"SELECT * FROM {source} WHERE id IN ({placeholders})",
+                                         tuple(chunk), fetch="all"):
+                    rows[row['id']] = dict(row)
+        for row_id in row_ids:
+            self._events.publish(ChangeEvent(table, op, row_id, rows.get(row_id)))
+
+    def _ids_where(self, table, condition, params):
+        """IDs of the rows a by-name update/delete is about to touch, if anyone listens."""
+        if not self._events.has_subscribers(table):
+            return []
+        rows = self._execute(f"SELECT id FROM {table} WHERE {condition}", params, fetch="all")
+        return [row['id'] for row in rows]
+
+    # 🔹 **Write-Behind Queue**
+    def enable_write_behind(self, delay=0.25, max_pending=64):
+        """Queue high-frequency small updates and group-commit them.
+
+        Queued writes are committed `delay` seconds after the first one, once
+        `max_pending` rows are waiting, or on flush(). A read or write through
+        DatabaseManager that names a table with queued writes (or a view or
+        trigger-kept table over it) flushes the queue first, so callers always
+        see their own writes and later writes land after queued ones.
+        """
+        if self._write_behind is None:
+            self._write_behind = WriteBehindQueue(self._apply_deferred, delay=delay, max_pending=max_pending)
+
+    def disable_write_behind(self):
+        """Flush queued writes and go back to committing every write immediately."""
+        if self._write_behind is not None:
+            self._write_behind.close()
+            self._write_behind = None
+
+    def flush(self):
+        """Barrier: commit every queued write before returning."""
+        if self._write_behind is not None:
+            self._write_behind.flush()
+
+    def _flush_pending(self, *queries):
+        """Flush the write-behind queue if `queries` name a table with queued or committing writes.
+
+        Statements over other tables don't wait for the queue. Without
+        queries, anything waiting is flushed.
+        """
+        if self._write_behind is None:
+            return
+        tables = self._write_behind.pending_tables()
+        if not tables:
+            return
+        if queries:
+            names = set(SQL_NAME.findall(" ".join(queries).lower()))
+            if not any(names.intersection((table, *DERIVED_TABLES.get(table, ()), *TABLE_VIEWS.get(table, ())))
+                       for table in tables):
+                return
+        self._write_behind.flush()
+
+    def _apply_deferred(self, batch):
+        """Run a batch of queued (key, query, params) writes in one transaction."""
+        def apply(cursor):
+            for _, query, params in batch:
+                cursor.execute(query, params)
+            return len(batch)
+        self._in_transaction(apply, [query for _, query, _ in batch])
+        # Keys are (table, row id, column); every queued write is an UPDATE
+        for (table, row_id, _), _, _ in batch:
+            self._publish(table, UPDATE, [row_id])
+
+    def _defer(self, key, query, params):
+        """Queue a write; cached reads of its table go stale right away."""
+        self._invalidate_for(query)
+        self._write_behind.submit(key, query, params)
+
     def update_schema(self):
-        """Check and update database schema if necessary."""
-        try:
-            # Check if chapter column exists in flashcards table
-            self._connection.execute("SELECT chapter FROM flashcards LIMIT 1")
-        except sqlite3.OperationalError:
-            # Add chapter column if it doesn't exist
-            try:
-                self._connection.execute("ALTER TABLE flashcards ADD COLUMN chapter TEXT NOT NULL DEFAULT 'General'")
-                self._connection.commit()
-                print("Added chapter column to flashcards table")
-            except sqlite3.OperationalError as e:
-                print(f"Error updating schema: {e}")
-                # If table doesn't exist, create all tables
-                self.create_tables()
+        """Bring the schema up to date by running any pending migrations."""
+        with self._pool.write_lock:
+            drop_notes_plain_view(self._connection)  # Migrations may alter `notes`
+            migrate(self._connection)
+            create_notes_plain_view(self._connection)
 
     def create_tables(self):
-        """Creates necessary tables for users, notes, tasks, and flashcards."""
-        # Create users table
-        self._connection.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        """)
-
-        # Create notes table with Color column
-        self._connection.execute("""
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                Color TEXT DEFAULT (1, 1, 1, 1),  -- Default white color
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        """)
-
-        # Create tasks table
-        self._connection.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                task TEXT NOT NULL,
-                status TEXT CHECK(status IN ('Pending', 'Completed')) DEFAULT 'Pending',
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        """)
-
-        # Create flashcards table
-        self._connection.execute("""
-            CREATE TABLE IF NOT EXISTS flashcards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                cards_name TEXT NOT NULL,
-                front TEXT NOT NULL,
-                back TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        """)
-
-        # Create expenses table with user_id foreign key
-        self._connection.execute("""
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                exp_name TEXT NOT NULL,
-                exp_type TEXT NOT NULL,
-                exp_amount REAL NOT NULL,
-                exp_date TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE
-            )
-        """)
-        self._connection.commit()
-        
-        # Ensure default user exists
-        self.ensure_default_user()
+        """Creates necessary tables for users, notes, tasks, flashcards and expenses."""
+        self.update_schema()
+
+    def get_schema_version(self):
+        """Return the schema version stored in PRAGMA user_version."""
+        return get_schema_version(self._connection)
 
     def ensure_default_user(self):
         """Ensure that a default user exists in the database."""
         try:
-            cursor = self._connection.cursor()
             # Check if default user exists
-            cursor.execute("SELECT id FROM users WHERE id = 1")
-            if not cursor.fetchone():
+            if not self._execute("SELECT id FROM users WHERE id = 1", fetch="one"):
                 # Create default user
-                cursor.execute(
-                    "INSERT INTO users (id, username, password) VALUES (1, 'default_user', 'default_password')"
+                self._execute(
+                    "INSERT INTO users (id, username, password) VALUES (1, 'default_user', 'default_password')",
+                    commit=True
                 )
-                self._connection.commit()
                 print("Created default user")
         except sqlite3.Error as e:
             print(f"Error ensuring default user: {e}")
-            self._connection.rollback()
 
     # 🔹 **User Authentication**
     def register_user(self, username, password):
         """Registers a new user."""
         try:
-            self._connection.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-            self._connection.commit()
+            self._execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password), commit=True)
             return True
         except sqlite3.IntegrityError:
             return False  # Username already exists
 
     def verify_user(self, username, password):
         """Checks if username & password match."""
-        cursor = self._connection.execute("SELECT id FROM users WHERE username=? AND password=?", (username, password))
-        result = cursor.fetchone()
+        result = self._execute("SELECT id FROM users WHERE username=? AND password=?", (username, password), fetch="one")
         return result[0] if result else None  # Return user_id if found
 
     # 🔹 **Notes Management**
-    def add_note(self, user_id, title, content):
-        """Adds a new note to the database."""
-        self._connection.execute("""
-            INSERT INTO notes (user_id, title, content) 
-            VALUES (?, ?, ?)
-        """, (user_id, title, content))
-        self._connection.commit()
+    # Writes store a preview and the body length next to the body, so the
+    # notes grid never reads bodies. Readers get plain bodies from the
+    # notes_plain view whether or not they are stored compressed. Triggers
+    # keep notes_fts in step with every write, whoever makes it.
+    def enable_note_compression(self, min_bytes=4096):
+        """zlib-compress note bodies of at least `min_bytes` UTF-8 bytes from now on.
+
+        Off by default: full-text search indexes only plain bodies, so a
+        compressed note is found by its title and preview alone.
+        """
+        self._note_compression = min_bytes
+
+    def disable_note_compression(self):
+        """Store new and edited note bodies as plain text (existing ones still read fine)."""
+        self._note_compression = None
+
+    def _note_columns(self, content):
+        """(stored content, codec, preview, content_length) for a note body."""
+        stored, codec = encode_note(content, self._note_compression)
+        return stored, codec, note_preview(content), len(content)
+
+    def add_note(self, user_id, title, content, color=None):
+        """Adds a new note to the database and returns its ID."""
+        if color is None:
+            cursor = self._execute("""
+                INSERT INTO notes (user_id, title, content, content_codec, preview, content_length) 
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, title, *self._note_columns(content)), commit=True)
+        else:
+            cursor = self._execute("""
+                INSERT INTO notes (user_id, title, content, content_codec, preview, content_length, color_rgba) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, title, *self._note_columns(content), pack_rgba(color)), commit=True)
+        self._publish("notes", INSERT, [cursor.lastrowid])
+        return cursor.lastrowid
 
     def get_notes(self, user_id):
         """Retrieves all notes for a specific user."""
-        cursor = self._connection.execute("""
+        return self._execute("""
             SELECT id, title, content 
-            FROM notes 
+            FROM notes_plain 
             WHERE user_id = ? 
             ORDER BY created_at DESC
-        """, (user_id,))
-        return cursor.fetchall()
+        """, (user_id,), fetch="all")
+
+    def get_note_cards(self, user_id):
+        """(id, title, preview, content_length, color_rgba) of every note of a user, oldest first.
+
+        The notes grid needs no bodies, so none are read.
+        """
+        return self._cached_query(("notes",), """
+            SELECT id, title, preview, content_length, color_rgba
+            FROM notes
+            WHERE user_id = ?
+            ORDER BY created_at, id
+        """, (user_id,), user_id)
+
+    def get_note(self, note_id):
+        """One note with its full body (id, user_id, title, content, color_rgba, created_at), or None."""
+        return self._cached_query(("notes",), """
+            SELECT id, user_id, title, content, color_rgba, created_at
+            FROM notes_plain
+            WHERE id = ?
+        """, (note_id,), shape=lambda rows: rows[0] if rows else None)
 
     def delete_note(self, note_id):
         """Deletes a note from the database."""
-        self._connection.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-        self._connection.commit()
+        self._execute("DELETE FROM notes WHERE id = ?", (note_id,), commit=True)
+        self._publish("notes", DELETE, [note_id])
 
     def update_note(self, note_id, title, content):
         """Updates an existing note."""
-        self._connection.execute("""
+        self._execute("""
             UPDATE notes 
-            SET title=?, content=? 
+            SET title=?, content=?, content_codec=?, preview=?, content_length=? 
             WHERE id=?
-        """, (title, content, note_id))
-        self._connection.commit()
+        """, (title, *self._note_columns(content), note_id), commit=True)
+        self._publish("notes", UPDATE, [note_id])
+
+    def update_note_color(self, note_id, color):
+        """Updates the background color ((r, g, b, a) tuple) of a note.
+
+        With write-behind enabled the update is queued and coalesced.
+        """
+        query = "UPDATE notes SET color_rgba=? WHERE id=?"
+        params = (pack_rgba(color), note_id)
+        if self._write_behind is not None:
+            self._defer(("notes", note_id, "color_rgba"), query, params)
+            return
+        self._execute(query, params, commit=True)
+        self._publish("notes", UPDATE, [note_id])
 
     def search_notes(self, user_id, keyword):
-        """Searches notes containing the keyword."""
-        cursor = self._connection.execute("""
+        """Searches notes containing the keyword, best matches first."""
+        if self._has_full_text_index("notes_fts"):
+            match = fts_match_query(keyword)
+            if not match:
+                return []
+            try:
+                return [tuple(row) for row in self._execute("""
+                    SELECT n.id, n.title, n.content
+                    FROM notes_fts
+                    JOIN notes_plain n ON n.id = notes_fts.rowid
+                    WHERE notes_fts MATCH ? AND n.user_id = ?
+                    ORDER BY bm25(notes_fts, 10.0, 1.0)
+                """, (match, user_id), fetch="all")]
+            except sqlite3.Error as e:
+                print(f"Error searching notes: {e}")
+                return []
+        return self._execute("""
             SELECT id, title, content 
-            FROM notes 
+            FROM notes_plain 
             WHERE user_id = ? AND (title LIKE ? OR content LIKE ?) 
             ORDER BY created_at DESC
-        """, (user_id, f"%{keyword}%", f"%{keyword}%"))
-        return cursor.fetchall()
+        """, (user_id, f"%{keyword}%", f"%{keyword}%"), fetch="all")
+
+    def search_notes_ranked(self, user_id, text, limit=20, highlight=("[b]", "[/b]")):
+        """Full-text search over note titles and bodies ranked by bm25.
+
+        Bare words match as prefixes and "quoted text" as a phrase. Returns
+        rows with id, title, snippet and rank (lower is better); only the
+        snippet reads the body, and never decompresses one.
+        """
+        match = fts_match_query(text)
+        if not match:
+            return []
+        if not self._has_full_text_index("notes_fts"):
+            return [{'id': row[0], 'title': row[1], 'snippet': row[2][:120], 'rank': 0.0}
+                    for row in self.search_notes(user_id, text)][:limit if limit >= 0 else None]
+        try:
+            return self._execute("""
+                SELECT notes_fts.rowid AS id, notes_fts.title,
+                       snippet(notes_fts, -1, ?, ?, '...', 12) AS snippet,
+                       bm25(notes_fts, 10.0, 1.0) AS rank
+                FROM notes_fts
+                JOIN notes n ON n.id = notes_fts.rowid
+                WHERE notes_fts MATCH ? AND n.user_id = ?
+                ORDER BY rank
+                LIMIT ?
+            """, (highlight[0], highlight[1], match, user_id, limit), fetch="all")
+        except sqlite3.Error as e:
+            print(f"Error searching notes: {e}")
+            return []
 
     # 🔹 **Task Management**
     def add_task(self, user_id, task):
         """Adds a new task and returns the task ID."""
-        cursor = self._connection.execute("""
+        cursor = self._execute("""
             INSERT INTO tasks (user_id, task) 
             VALUES (?, ?)
-        """, (user_id, task))
-        self._connection.commit()
+        """, (user_id, task), commit=True)
+        self._publish("tasks", INSERT, [cursor.lastrowid])
         return cursor.lastrowid  # Return the ID of the newly created task
 
     def update_task_status(self, task_id, status):
-        """Updates the status of a task ('Pending' or 'Completed')."""
-        self._connection.execute("""
+        """Updates the status of a task ('Pending' or 'Completed').
+
+        With write-behind enabled the update is queued and coalesced.
+        """
+        query = """
             UPDATE tasks 
             SET status=? 
             WHERE id=?
-        """, (status, task_id))
-        self._connection.commit()
+        """
+        if self._write_behind is not None:
+            self._defer(("tasks", task_id, "status"), query, (status, task_id))
+            return
+        self._execute(query, (status, task_id), commit=True)
+        self._publish("tasks", UPDATE, [task_id])
 
     def delete_task(self, task_id):
         """Deletes a task by its ID."""
-        self._connection.execute("DELETE FROM tasks WHERE id=?", (task_id,))
-        self._connection.commit()
+        self._execute("DELETE FROM tasks WHERE id=?", (task_id,), commit=True)
+        self._publish("tasks", DELETE, [task_id])
 
     def get_tasks(self, user_id):
         """Fetch tasks for a specific user from the database."""
-        cursor = self._connection.cursor()
-        cursor.execute("SELECT id, task, status FROM tasks WHERE user_id=?", (user_id,))
-        tasks = cursor.fetchall()
-        return [{'id': task[0], 'task': task[1], 'status': task[2]} for task in tasks]
+        return self._cached_query(
+            ("tasks",), "SELECT id, task, status FROM tasks WHERE user_id=?", (user_id,), user_id,
+            lambda rows: [{'id': task[0], 'task': task[1], 'status': task[2]} for task in rows],
+        )
 
     # 🔹 **Flashcard Management**
     def add_flashcard(self, user_id, cards_name, front, back):
         """Add a new flashcard."""
         try:
             print(f"Adding flashcard: User ID={user_id}, Name={cards_name}, Front={front}, Back={back}")  # Debugging print
-            self._execute("""
+            cursor = self._execute("""
                 INSERT INTO flashcards (user_id, cards_name, front, back)
                 VALUES (?, ?, ?, ?)
             """, (user_id, cards_name, front, back), commit=True)
             print("Flashcard added successfully")  # Debugging print
+            self._publish("flashcards", INSERT, [cursor.lastrowid])
             return True
         except sqlite3.Error as e:
             print(f"Error adding flashcard: {e}")
@@ -295,7 +659,7 @@ class DatabaseManager:
     def get_flashcards(self, user_id):
         """Get all flashcards grouped by cards_name."""
         try:
-            cursor = self._execute("""
+            return self._cached_query(("flashcards",), """
                 SELECT cards_name, 
                        GROUP_CONCAT(id) as ids,
                        GROUP_CONCAT(front) as fronts,
@@ -304,35 +668,70 @@ class DatabaseManager:
                 WHERE user_id = ?
                 GROUP BY cards_name
                 ORDER BY cards_name
-            """, (user_id,))
-            return cursor.fetchall()
+            """, (user_id,), user_id)
         except sqlite3.Error as e:
             print(f"Error getting flashcards: {e}")
             return []
 
     def search_flashcards(self, user_id, keyword):
-        """Search flashcards containing the keyword."""
+        """Search flashcards containing the keyword, best matches first."""
+        if self._has_full_text_index("flashcards_fts"):
+            return [(row['id'], row['cards_name'], row['front'], row['back'], row['created_at'])
+                    for row in self.search_flashcards_ranked(user_id, keyword, limit=-1)]
         try:
-            cursor = self._execute("""
+            return self._execute("""
                 SELECT id, cards_name, front, back, created_at
                 FROM flashcards 
                 WHERE user_id = ? 
                 AND (cards_name LIKE ? OR front LIKE ? OR back LIKE ?) 
                 ORDER BY created_at DESC
-            """, (user_id, f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"))
-            return cursor.fetchall()
+            """, (user_id, f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"), fetch="all")
         except sqlite3.Error as e:
             print(f"Error searching flashcards: {e}")
             return []
+
+    def search_flashcards_ranked(self, user_id, text, limit=20, highlight=("[b]", "[/b]")):
+        """Full-text search over deck names, questions and answers ranked by bm25.
+
+        Returns rows with id, cards_name, front, back, created_at, snippet and rank.
+        """
+        match = fts_match_query(text)
+        if not match:
+            return []
+        if not self._has_full_text_index("flashcards_fts"):
+            return [{'id': row[0], 'cards_name': row[1], 'front': row[2], 'back': row[3], 'created_at': row[4],
+                     'snippet': row[2], 'rank': 0.0}
+                    for row in self.search_flashcards(user_id, text)][:limit if limit >= 0 else None]
+        try:
+            return self._execute("""
+                SELECT f.id, f.cards_name, f.front, f.back, f.created_at,
+                       snippet(flashcards_fts, -1, ?, ?, '...', 12) AS snippet,
+                       bm25(flashcards_fts, 5.0, 2.0, 1.0) AS rank
+                FROM flashcards_fts
+                JOIN flashcards f ON f.id = flashcards_fts.rowid
+                WHERE flashcards_fts MATCH ? AND f.user_id = ?
+                ORDER BY rank
+                LIMIT ?
+            """, (highlight[0], highlight[1], match, user_id, limit), fetch="all")
+        except sqlite3.Error as e:
+            print(f"Error searching flashcards: {e}")
+            return []
+
+    def _has_full_text_index(self, name):
+        """True when the FTS5 table exists (SQLite may be built without FTS5)."""
+        if name not in self._fts_tables:
+            row = self._execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,), fetch="one")
+            self._fts_tables[name] = row is not None
+        return self._fts_tables[name]
         
     def get_all_cards_names(self):
         """Retrieve all unique card names from the flashcards."""
         try:
-            cursor = self._execute("""
+            rows = self._execute("""
                 SELECT DISTINCT cards_name 
                 FROM flashcards
-            """)
-            return [row['cards_name'] for row in cursor.fetchall()]
+            """, fetch="all")
+            return [row['cards_name'] for row in rows]
         except sqlite3.Error as e:
             print(f"Error retrieving card names: {e}")
             return []
@@ -341,6 +740,7 @@ class DatabaseManager:
         """Delete a flashcard by its ID."""
         try:
             self._execute("DELETE FROM flashcards WHERE id = ?", (flashcard_id,), commit=True)
+            self._publish("flashcards", DELETE, [flashcard_id])
             return True
         except sqlite3.Error as e:
             print(f"Error deleting flashcard: {e}")
@@ -354,6 +754,7 @@ class DatabaseManager:
                 SET cards_name = ?, front = ?, back = ? 
                 WHERE id = ?
             """, (cards_name, front, back, flashcard_id), commit=True)
+            self._publish("flashcards", UPDATE, [flashcard_id])
             return True
         except sqlite3.Error as e:
             print(f"Error updating flashcard: {e}")
@@ -362,12 +763,11 @@ class DatabaseManager:
     def get_flashcard(self, flashcard_id):
         """Get a specific flashcard by ID."""
         try:
-            cursor = self._execute("""
+            return self._execute("""
                 SELECT id, cards_name, front, back 
                 FROM flashcards 
                 WHERE id = ?
-            """, (flashcard_id,))
-            return cursor.fetchone()
+            """, (flashcard_id,), fetch="one")
         except sqlite3.Error as e:
             print(f"Error getting flashcard: {e}")
             return None
@@ -379,12 +779,13 @@ class DatabaseManager:
             FROM flashcards 
             ORDER BY id DESC
         """
-        return self.execute_query(query).fetchall()
+        return self.execute_query(query, fetch_all=True)
 
     def get_flashcards_by_name(self, cards_name):
         """Get all flashcards with a specific cards_name."""
         try:
-            cursor = self._execute(
+            return self._cached_query(
+                ("flashcards",),
                 """
                 SELECT id, cards_name, front, back 
                 FROM flashcards 
@@ -393,7 +794,6 @@ class DatabaseManager:
                 """,
                 (cards_name,)
             )
-            return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error getting flashcards by name: {e}")
             return []
@@ -401,6 +801,7 @@ class DatabaseManager:
     def update_flashcard_by_name(self, cards_name, front, back):
         """Update flashcards by cards_name."""
         try:
+            changed_ids = self._ids_where("flashcards", "cards_name = ?", (cards_name,))
             self._execute(
                 """
                 UPDATE flashcards 
@@ -410,6 +811,7 @@ class DatabaseManager:
                 (front, back, cards_name),
                 commit=True
             )
+            self._publish("flashcards", UPDATE, changed_ids)
             return True
         except sqlite3.Error as e:
             print(f"Error updating flashcards by name: {e}")
@@ -418,6 +820,7 @@ class DatabaseManager:
     def delete_flashcards_by_name(self, cards_name):
         """Delete all flashcards with a specific cards_name."""
         try:
+            deleted_ids = self._ids_where("flashcards", "cards_name = ?", (cards_name,))
             self._execute(
                 """
                 DELETE FROM flashcards 
@@ -426,52 +829,102 @@ class DatabaseManager:
                 (cards_name,),
                 commit=True
             )
+            self._publish("flashcards", DELETE, deleted_ids)
             return True
         except sqlite3.Error as e:
             print(f"Error deleting flashcards by name: {e}")
             return False
 
     def close_connection(self):
-        """Closes the database connection."""
-        if self._connection:
-            self._connection.close()
+        """Flushes queued writes, then closes the writer and all pooled read connections."""
+        self.flush()
+        if self._pool:
+            self._pool.close()
+            self._pool = None
             self._connection = None
 
+    # 🔹 **Backups**
+    def backup(self, directory=None, keep=DEFAULT_KEEP, min_interval=None, progress=None, done=None):
+        """Snapshot the database on a worker thread and return the thread, or None if skipped.
+
+        Queued writes are committed first so the snapshot includes them.
+        With `min_interval` (seconds), nothing happens while the newest
+        snapshot is younger than that. `directory` defaults to backups/ next
+        to the database; see BackupService for progress and done.
+        """
+        service = self._backup_service(directory, keep)
+        age = service.last_snapshot_age()
+        if min_interval is not None and age is not None and age < min_interval:
+            return None
+        self.flush()
+        return service.start(progress, done)
+
+    def list_backups(self, directory=None):
+        """Paths of the database's snapshots in `directory`, oldest first."""
+        return self._backup_service(directory).snapshots()
+
+    def _backup_service(self, directory=None, keep=DEFAULT_KEEP):
+        """One BackupService per directory, so overlapping requests share its worker."""
+        service = self._backups.get(directory)
+        if service is None:
+            service = self._backups[directory] = BackupService(self._db_name, directory, keep)
+        service.keep = keep
+        return service
+
+    # 🔹 **Expenses**
+    # Stored as integer paise, day ordinals and category ids; the
+    # expense_ledger view gives readers exp_type/exp_amount/exp_date back.
+    def _category_id(self, name):
+        """ID of an expense category, created on first use."""
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            self._execute("INSERT OR IGNORE INTO expense_categories (name) VALUES (?)", (name,), commit=True)
+            row = self._execute("SELECT id FROM expense_categories WHERE name = ?", (name,), fetch="one")
+            category_id = self._category_ids[name] = row[0]
+        return category_id
+
     def add_expense(self, user_id, name, type_exp, amount, date):
-        """Add a new expense to the database."""
-        with self._connection:
-            cursor = self._connection.cursor()
-            cursor.execute("INSERT INTO expenses (user_id, exp_name, exp_type, exp_amount, exp_date) VALUES (?, ?, ?, ?, ?)",
-                           (user_id, name, type_exp, amount, date))
+        """Add a new expense to the database and return its ID."""
+        cursor = self._execute(
+            "INSERT INTO expenses (user_id, exp_name, category_id, amount_minor, day) VALUES (?, ?, ?, ?, ?)",
+            (user_id, name, self._category_id(type_exp), to_minor_units(amount), day_ordinal(date)), commit=True)
+        self._publish("expenses", INSERT, [cursor.lastrowid])
+        return cursor.lastrowid
+
+    def update_expense(self, expense_id, name, type_exp, amount, date):
+        """Update the name, type, amount and date of an expense."""
+        self._execute("""
+            UPDATE expenses
+            SET exp_name = ?, category_id = ?, amount_minor = ?, day = ?
+            WHERE id = ?
+        """, (name, self._category_id(type_exp), to_minor_units(amount), day_ordinal(date), expense_id), commit=True)
+        self._publish("expenses", UPDATE, [expense_id])
 
     def show_expense(self):
         """Retrieves all expenses from the database."""
-        cursor = self._execute("SELECT * FROM expenses")
-        return cursor.fetchall()
+        return self._execute("SELECT * FROM expense_ledger", fetch="all")
 
     def delete_expense(self, expense_id):
         """Delete an expense from the database by its ID."""
-        with self._connection:
-            cursor = self._connection.cursor()
-            cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+        self._execute("DELETE FROM expenses WHERE id = ?", (expense_id,), commit=True)
+        self._publish("expenses", DELETE, [expense_id])
 
     def save_note(self, title, content):
         """Saves a new note to the database."""
-        self._connection.execute(
-            "INSERT INTO notes (title, content) VALUES (?, ?)",
-            (title, content)
+        cursor = self._execute(
+            "INSERT INTO notes (title, content, content_codec, preview, content_length) VALUES (?, ?, ?, ?, ?)",
+            (title, *self._note_columns(content)),
+            commit=True
         )
-        self._connection.commit()
+        self._publish("notes", INSERT, [cursor.lastrowid])
 
-    def __init__(self):
+    def __init__(self, db_name="Fusion.db", profile=DEFAULT_PROFILE, max_readers=DEFAULT_MAX_READERS):
         self.current_user_id = None  # Set this when the user logs in
 
     def get_flashcards_by_user_id(self, user_id):
         """Fetch flashcards for a specific user."""
         try:
-            cursor = self._connection.cursor()
-            cursor.execute("SELECT * FROM flashcards WHERE user_id=?", (user_id,))
-            return cursor.fetchall()
+            return self._cached_query(("flashcards",), "SELECT * FROM flashcards WHERE user_id=?", (user_id,), user_id)
         except sqlite3.Error as e:
             print(f"Error fetching flashcards: {e}")
             return []
@@ -479,26 +932,584 @@ class DatabaseManager:
     def get_expenses_by_user_id(self, user_id):
         """Fetch expenses for a specific user."""
         try:
-            cursor = self._connection.cursor()
-            cursor.execute("SELECT * FROM expenses WHERE user_id=?", (user_id,))
-            return cursor.fetchall()
+            return self._cached_query(("expenses",), "SELECT * FROM expense_ledger WHERE user_id=?", (user_id,), user_id)
         except sqlite3.Error as e:
             print(f"Error fetching expenses: {e}")
             return []
 
-    def get_total_spending_by_user_id(self, user_id, current_month):
-        """Fetch total spending for a specific user for the current month."""
+    # 🔹 **Bulk Writes**
+    # One executemany inside one transaction: a single lock acquisition and a
+    # single commit (fsync) for the whole batch instead of one per row.
+    def add_flashcards_bulk(self, user_id, cards_name, cards):
+        """Add many (front, back) cards to one deck and return their new IDs."""
+        try:
+            ids = self._insert_many(
+                "flashcards", ("user_id", "cards_name", "front", "back"),
+                ((user_id, cards_name, front, back) for front, back in cards),
+            )
+            self._publish("flashcards", INSERT, ids)
+            return ids
+        except sqlite3.Error as e:
+            print(f"Error adding flashcards: {e}")
+            return []
+
+    def update_flashcards_bulk(self, updates):
+        """Apply many (flashcard_id, front, back) edits and return the number of rows changed."""
+        updates = list(updates)
+        try:
+            changed = self._write_many(
+                "UPDATE flashcards SET front = ?, back = ? WHERE id = ?",
+                ((front, back, flashcard_id) for flashcard_id, front, back in updates),
+            )
+            self._publish("flashcards", UPDATE, [flashcard_id for flashcard_id, _, _ in updates])
+            return changed
+        except sqlite3.Error as e:
+            print(f"Error updating flashcards: {e}")
+            return 0
+
+    def add_expenses_bulk(self, user_id, expenses):
+        """Add many (name, type_exp, amount, date) expenses and return their new IDs."""
+        try:
+            rows = [
+                (user_id, name, self._category_id(type_exp), to_minor_units(amount), day_ordinal(date))
+                for name, type_exp, amount, date in expenses
+            ]
+            ids = self._insert_many("expenses", ("user_id", "exp_name", "category_id", "amount_minor", "day"), rows)
+            self._publish("expenses", INSERT, ids)
+            return ids
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error adding expenses: {e}")
+            return []
+
+    def add_notes_bulk(self, user_id, notes):
+        """Add many (title, content, color) notes and return their new IDs; color may be None."""
+        try:
+            ids = self._insert_many(
+                "notes", ("user_id", "title", "content", "content_codec", "preview", "content_length", "color_rgba"),
+                [(user_id, title, *self._note_columns(content), pack_rgba(color or WHITE))
+                 for title, content, color in notes],
+            )
+            self._publish("notes", INSERT, ids)
+            return ids
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error adding notes: {e}")
+            return []
+
+    def update_task_statuses_bulk(self, updates):
+        """Apply many (task_id, status) changes and return the number of rows changed."""
+        updates = list(updates)
+        try:
+            changed = self._write_many(
+                "UPDATE tasks SET status = ? WHERE id = ?",
+                ((status, task_id) for task_id, status in updates),
+            )
+            self._publish("tasks", UPDATE, [task_id for task_id, _ in updates])
+            return changed
+        except sqlite3.Error as e:
+            print(f"Error updating tasks: {e}")
+            return 0
+
+    def add_tasks_bulk(self, user_id, tasks):
+        """Add many task texts and return their new IDs."""
         try:
+            ids = self._insert_many("tasks", ("user_id", "task"), ((user_id, task) for task in tasks))
+            self._publish("tasks", INSERT, ids)
+            return ids
+        except sqlite3.Error as e:
+            print(f"Error adding tasks: {e}")
+            return []
+
+    def _insert_many(self, table, columns, rows):
+        """INSERT all rows in one transaction and return the new IDs in order.
+
+        All tables use AUTOINCREMENT and the write lock plus BEGIN IMMEDIATE
+        keep other writers out, so the batch gets the consecutive IDs right
+        after the previous sqlite_sequence value.
+        """
+        placeholders = ", ".join("?" for _ in columns)
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        ids = []
+
+        def insert(cursor):
+            before = self._sequence_value(cursor, table)
+            cursor.executemany(query, rows)
+            after = self._sequence_value(cursor, table)
+            ids.extend(range(before + 1, after + 1))
+            return cursor.rowcount
+
+        self._in_transaction(insert, [query])
+        return ids
+
+    def _write_many(self, query, rows):
+        """executemany a write statement in one transaction and return the rows changed."""
+        return self._in_transaction(lambda cursor: cursor.executemany(query, rows).rowcount, [query])
+
+    def _in_transaction(self, work, queries=()):
+        """Run work(cursor) on the writer inside BEGIN IMMEDIATE ... COMMIT.
+
+        `queries` are the write statements work() runs; the cached reads of
+        their tables are invalidated once the transaction commits. The whole
+        transaction is recorded in stats() as one statement.
+        """
+        self._flush_pending(*queries)
+        statement = "BEGIN IMMEDIATE; " + "; ".join(dict.fromkeys(queries)) + "; COMMIT"
+        wait_start = time.perf_counter()
+        with self._pool.write_lock:
+            start = time.perf_counter()
+            lock_wait_ms = (start - wait_start) * 1000
+            self._ensure_connection()
+            if self._connection.in_transaction:
+                self._connection.commit()
             cursor = self._connection.cursor()
-            cursor.execute("""
-                SELECT SUM(exp_amount) 
-                FROM expenses 
-                WHERE user_id = ? AND exp_date LIKE ?
-            """, (user_id, f"{current_month}%"))
-            total = cursor.fetchone()[0]
-            return total if total is not None else 0.0
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                result = work(cursor)
+                self._connection.commit()
+                for query in queries:
+                    self._invalidate_for(query)
+            except sqlite3.Error:
+                self._connection.rollback()
+                self._stats.record(statement, (time.perf_counter() - start) * 1000,
+                                   lock_wait_ms=lock_wait_ms, error=True)
+                raise
+            rows = result if isinstance(result, int) else None
+            self._stats.record(statement, (time.perf_counter() - start) * 1000, rows, lock_wait_ms)
+            return result
+
+    @staticmethod
+    def _sequence_value(cursor, table):
+        """Last AUTOINCREMENT value handed out for a table (0 if none yet)."""
+        row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    # 🔹 **Paginated Reads**
+    # Keyset pagination: each page starts strictly after the sort key of the
+    # previous page's last row, so every page is one index range seek no
+    # matter how deep into the history it is.
+    def get_notes_page(self, user_id, after_created_at=None, after_id=None, limit=50):
+        """Notes newest first, starting after the (created_at, id) of the previous page."""
+        if after_id is None:
+            return self._execute("""
+                SELECT id, title, content, created_at
+                FROM notes_plain
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """, (user_id, limit), fetch="all")
+        return self._execute("""
+            SELECT id, title, content, created_at
+            FROM notes_plain
+            WHERE user_id = ? AND (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (user_id, after_created_at, after_id, limit), fetch="all")
+
+    def get_tasks_page(self, user_id, after_id=None, limit=50):
+        """Tasks in creation order, starting after the id of the previous page."""
+        return self._execute("""
+            SELECT id, task, status
+            FROM tasks
+            WHERE user_id = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (user_id, after_id or 0, limit), fetch="all")
+
+    def get_expenses_page(self, user_id, after_date=None, after_id=None, limit=50):
+        """Expenses most recent first, starting after the (exp_date, id) of the previous page."""
+        if after_id is None:
+            # The first page is what the expense screen shows on every entry
+            return self._cached_query(("expenses",), """
+                SELECT *
+                FROM expense_ledger
+                WHERE user_id = ?
+                ORDER BY day DESC, id DESC
+                LIMIT ?
+            """, (user_id, limit), user_id)
+        return self._execute("""
+            SELECT *
+            FROM expense_ledger
+            WHERE user_id = ? AND (day, id) < (?, ?)
+            ORDER BY day DESC, id DESC
+            LIMIT ?
+        """, (user_id, day_ordinal(after_date), after_id, limit), fetch="all")
+
+    def get_flashcards_page(self, user_id, after_id=None, limit=50):
+        """Flashcards in creation order, starting after the id of the previous page."""
+        return self._execute("""
+            SELECT id, cards_name, front, back, created_at
+            FROM flashcards
+            WHERE user_id = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (user_id, after_id or 0, limit), fetch="all")
+
+    def iter_notes(self, user_id, batch_size=200):
+        """Stream all notes of a user, newest first, one page at a time."""
+        return self._iter_pages(
+            lambda **cursor: self.get_notes_page(user_id, limit=batch_size, **cursor),
+            lambda row: {'after_created_at': row['created_at'], 'after_id': row['id']},
+            batch_size,
+        )
+
+    def iter_tasks(self, user_id, batch_size=200):
+        """Stream all tasks of a user in creation order, one page at a time."""
+        return self._iter_pages(
+            lambda **cursor: self.get_tasks_page(user_id, limit=batch_size, **cursor),
+            lambda row: {'after_id': row['id']},
+            batch_size,
+        )
+
+    def iter_expenses(self, user_id, batch_size=200):
+        """Stream all expenses of a user, most recent first, one page at a time."""
+        return self._iter_pages(
+            lambda **cursor: self.get_expenses_page(user_id, limit=batch_size, **cursor),
+            lambda row: {'after_date': row['day'], 'after_id': row['id']},
+            batch_size,
+        )
+
+    def iter_flashcards(self, user_id, batch_size=200):
+        """Stream all flashcards of a user in creation order, one page at a time."""
+        return self._iter_pages(
+            lambda **cursor: self.get_flashcards_page(user_id, limit=batch_size, **cursor),
+            lambda row: {'after_id': row['id']},
+            batch_size,
+        )
+
+    @staticmethod
+    def _iter_pages(fetch_page, next_cursor, batch_size):
+        """Yield rows page by page until a short page signals the end."""
+        cursor = {}
+        while True:
+            rows = fetch_page(**cursor)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            cursor = next_cursor(rows[-1])
+
+    # 🔹 **Import / Export**
+    # Files are streamed record by record and rows are read in keyset pages,
+    # so memory use stays flat however large the tables are.
+    def export_table(self, user_id, table, path, batch_size=1000, progress=None):
+        """Write a user's rows of `table` to a .jsonl or .csv file and return how many were written.
+
+        progress(table, rows_written) is called every `batch_size` rows.
+        """
+        records = (export_record(table, row) for row in self._export_rows(table, user_id, batch_size))
+        return write_records(path, table, with_progress(records, table, progress, batch_size))
+
+    def export_user_data(self, user_id, directory, fmt="jsonl", tables=TRANSFER_TABLES, batch_size=1000,
+                         progress=None):
+        """Export each table to directory/<table>.<fmt>; returns {table: rows written}."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+        os.makedirs(directory, exist_ok=True)
+        return {
+            table: self.export_table(user_id, table, os.path.join(directory, f"{table}.{fmt}"),
+                                     batch_size, progress)
+            for table in tables
+        }
+
+    def _export_rows(self, table, user_id, batch_size):
+        query = EXPORT_QUERIES[table]
+        return self._iter_pages(
+            lambda after_id=0: self._execute(query, (user_id, after_id, batch_size), fetch="all"),
+            lambda row: {'after_id': row['id']},
+            batch_size,
+        )
+
+    def import_table(self, user_id, table, path, chunk_size=1000, dedup=True, progress=None):
+        """Add the records of a .jsonl or .csv file to a user's `table`.
+
+        Rows are inserted in transactions of `chunk_size`; progress(table,
+        rows_imported) is called after each one. With `dedup`, records equal
+        on DEDUP_FIELDS to a row the user already has (or to an earlier
+        record in the file) are skipped; only a 16-byte digest per row is
+        kept for that. Unreadable records are reported and skipped.
+
+        Returns {'imported', 'duplicates', 'invalid'} counts.
+        """
+        result = {'imported': 0, 'duplicates': 0, 'invalid': 0}
+        seen = set()
+        if dedup:
+            seen.update(record_key(table, clean_record(table, export_record(table, row)))
+                        for row in self._export_rows(table, user_id, chunk_size))
+        chunk = []
+        try:
+            for line_number, record in read_records(path):
+                try:
+                    record = clean_record(table, record)
+                    row = self._import_row(table, user_id, record)
+                except ValueError as e:
+                    print(f"Skipping {table} record on line {line_number} of {path}: {e}")
+                    result['invalid'] += 1
+                    continue
+                if dedup:
+                    key = record_key(table, record)
+                    if key in seen:
+                        result['duplicates'] += 1
+                        continue
+                    seen.add(key)
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    self._import_chunk(table, chunk, result, progress)
+                    chunk = []
+            if chunk:
+                self._import_chunk(table, chunk, result, progress)
         except sqlite3.Error as e:
+            print(f"Error importing {table} from {path}: {e}")
+        return result
+
+    def import_user_data(self, user_id, directory, fmt="jsonl", tables=TRANSFER_TABLES, chunk_size=1000,
+                         dedup=True, progress=None):
+        """Import directory/<table>.<fmt> for each table that has a file; returns {table: counts}."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+        results = {}
+        for table in tables:
+            path = os.path.join(directory, f"{table}.{fmt}")
+            if os.path.exists(path):
+                results[table] = self.import_table(user_id, table, path, chunk_size, dedup, progress)
+        return results
+
+    def _import_row(self, table, user_id, record):
+        """The IMPORT_COLUMNS values of a cleaned record."""
+        if table == "notes":
+            return (user_id, record['title'], *self._note_columns(record['content']),
+                    int(record['color'][1:], 16), record['created_at'])
+        if table == "tasks":
+            return user_id, record['task'], record['status']
+        if table == "flashcards":
+            return user_id, record['cards_name'], record['front'], record['back'], record['created_at']
+        return (user_id, record['exp_name'], self._category_id(record['exp_type']),
+                to_minor_units(record['exp_amount']), day_ordinal(record['exp_date']))
+
+    def _import_chunk(self, table, rows, result, progress):
+        ids = self._insert_many(table, IMPORT_COLUMNS[table], rows)
+        self._publish(table, INSERT, ids)
+        result['imported'] += len(ids)
+        if progress:
+            progress(table, result['imported'])
+
+    def get_total_spending_by_user_id(self, user_id, current_month):
+        """Fetch total spending for a specific user for the current month."""
+        try:
+            month_bounds(current_month)  # Validate the 'YYYY-MM' string
+            # One rollup row per category instead of summing the month's ledger rows
+            total = self._cached_query(("expense_monthly_rollup",), """
+                SELECT SUM(total_minor) 
+                FROM expense_monthly_rollup 
+                WHERE user_id = ? AND month = ?
+            """, (user_id, current_month[:7]), user_id, lambda rows: rows[0][0])
+            return total / 100 if total is not None else 0.0
+        except (sqlite3.Error, ValueError) as e:
             print(f"Error fetching total spending: {e}")
             return 0.0
 
-  
\ No newline at end of file
+    def get_monthly_spending(self, user_id, start_month=None, end_month=None):
+        """(month, total, count) per month from start_month to end_month ('YYYY-MM', inclusive)."""
+        try:
+            return self._cached_query(("expense_monthly_rollup",), """
+                SELECT month, SUM(total_minor) / 100.0 AS total, SUM(count) AS count
+                FROM expense_monthly_rollup
+                WHERE user_id = ? AND month >= ? AND month <= ?
+                GROUP BY month
+                ORDER BY month
+            """, (user_id, start_month or "0000-00", end_month or "9999-99"), user_id)
+        except sqlite3.Error as e:
+            print(f"Error fetching monthly spending: {e}")
+            return []
+
+    def get_category_trends(self, user_id, start_month=None, end_month=None):
+        """(month, category, total, count) rows from start_month to end_month ('YYYY-MM', inclusive)."""
+        try:
+            return self._cached_query(("expense_monthly_rollup",), """
+                SELECT r.month, c.name AS category, r.total_minor / 100.0 AS total, r.count
+                FROM expense_monthly_rollup r JOIN expense_categories c ON c.id = r.category_id
+                WHERE r.user_id = ? AND r.month >= ? AND r.month <= ?
+                ORDER BY r.month, r.total_minor DESC
+            """, (user_id, start_month or "0000-00", end_month or "9999-99"), user_id)
+        except sqlite3.Error as e:
+            print(f"Error fetching category trends: {e}")
+            return []
+
+    def rebuild_expense_rollup(self):
+        """Recompute the monthly expense rollup from the ledger (repairs any drift)."""
+        self._in_transaction(
+            lambda cursor: rebuild_expense_rollup(cursor.connection),
+            ["DELETE FROM expense_monthly_rollup", "INSERT INTO expense_monthly_rollup"],
+        )
+
+    def expense_summary(self, user_id, start=None, end=None):
+        """Spending insights for expenses dated in [start, end) ('YYYY-MM-DD', None = unbounded).
+
+        Returns a dict with total, count, categories (type -> amount, largest
+        first), category_count, weekday_counts (day name -> expenses) and
+        biggest (the largest expense row, or None).
+
+        One GROUP BY (category, weekday) pass over the idx_expenses_user_day
+        range; SQLite fills the bare exp_name/day/id columns from the row
+        holding each group's MAX(amount_minor). The at most 7 rows per
+        category are folded together here.
+        """
+        try:
+            first_day = day_ordinal(start) if start else FIRST_DAY
+            end_day = day_ordinal(end) if end else LAST_DAY
+            return self._cached_query(("expenses",), f"""
+                SELECT c.name AS exp_type,
+                       e.day % 7 AS weekday,
+                       COUNT(*) AS expense_count,
+                       SUM(e.amount_minor) AS amount_minor,
+                       MAX(e.amount_minor) AS max_minor,
+                       e.exp_name, date(e.day + {ORDINAL_TO_JULIAN_DAY}) AS exp_date, e.id
+                FROM expenses e JOIN expense_categories c ON c.id = e.category_id
+                WHERE e.user_id = ? AND e.day >= ? AND e.day < ?
+                GROUP BY e.category_id, weekday
+            """, (user_id, first_day, end_day), user_id, summarize_expense_groups)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error summarizing expenses: {e}")
+            return summarize_expense_groups([])
+
+    # 🔹 **Dashboard Counters**
+    # user_counters and deck_counters are kept current by triggers, so these
+    # reads cost one primary-key lookup however much data a user has.
+    def get_dashboard(self, user_id):
+        """Pending/completed tasks, notes, flashcards and this month's spend of a user.
+
+        Returns a dict with pending_tasks, completed_tasks, notes, flashcards,
+        month ('YYYY-MM') and month_spend (rupees).
+        """
+        month = datetime.now().strftime("%Y-%m")
+        try:
+            row = self._dashboard_row(user_id)
+            if row is not None and row['month'] != month:
+                # The counter still holds an earlier month's spend; restart it from the rollup
+                self._execute("""
+                    UPDATE user_counters
+                    SET month = ?, month_spend_minor = (
+                        SELECT COALESCE(SUM(total_minor), 0) FROM expense_monthly_rollup
+                        WHERE user_id = ? AND month = ?
+                    )
+                    WHERE user_id = ?
+                """, (month, user_id, month, user_id), commit=True)
+                row = self._dashboard_row(user_id)
+        except sqlite3.Error as e:
+            print(f"Error fetching dashboard: {e}")
+            row = None
+        if row is None:
+            return {'pending_tasks': 0, 'completed_tasks': 0, 'notes': 0, 'flashcards': 0,
+                    'month': month, 'month_spend': 0.0}
+        return {
+            'pending_tasks': row['pending_tasks'],
+            'completed_tasks': row['completed_tasks'],
+            'notes': row['notes'],
+            'flashcards': row['flashcards'],
+            'month': row['month'],
+            'month_spend': row['month_spend_minor'] / 100,
+        }
+
+    def _dashboard_row(self, user_id):
+        return self._cached_query(("user_counters",), """
+            SELECT pending_tasks, completed_tasks, notes, flashcards, month, month_spend_minor
+            FROM user_counters
+            WHERE user_id = ?
+        """, (user_id,), user_id, lambda rows: rows[0] if rows else None)
+
+    def get_deck_sizes(self, user_id):
+        """{cards_name: number of cards} for every deck of a user, in name order."""
+        try:
+            return self._cached_query(("deck_counters",), """
+                SELECT cards_name, cards FROM deck_counters WHERE user_id = ? ORDER BY cards_name
+            """, (user_id,), user_id, lambda rows: {row['cards_name']: row['cards'] for row in rows})
+        except sqlite3.Error as e:
+            print(f"Error fetching deck sizes: {e}")
+            return {}
+
+    def rebuild_counters(self):
+        """Recompute the dashboard and deck counters from the underlying tables."""
+        self._in_transaction(
+            lambda cursor: rebuild_counters(cursor.connection),
+            ["DELETE FROM user_counters", "DELETE FROM deck_counters"],
+        )
+
+
+def fts_match_query(text):
+    """Turn free text into an FTS5 MATCH expression.
+
+    "Quoted text" becomes a phrase and every other word a prefix term, all
+    of which must match. Quoting each term keeps FTS5 operators literal.
+    Returns None when there is nothing to search for.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text or ""):
+        if phrase.strip():
+            terms.append('"' + phrase.strip() + '"')
+        elif word:
+            word = word.replace('"', '')
+            if word:
+                terms.append('"' + word + '"*')
+    return " ".join(terms) or None
+
+
+WEEKDAY_NAMES = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")  # day % 7
+
+
+def summarize_expense_groups(rows):
+    """Fold expense_summary's (category, weekday) groups into the summary dict.
+
+    Sums stay in integer paise and are converted to rupees once at the end.
+    """
+    total = 0
+    count = 0
+    categories = {}
+    weekday_counts = {}
+    biggest = None
+    for row in rows:
+        total += row['amount_minor']
+        count += row['expense_count']
+        categories[row['exp_type']] = categories.get(row['exp_type'], 0) + row['amount_minor']
+        day = WEEKDAY_NAMES[row['weekday']]
+        weekday_counts[day] = weekday_counts.get(day, 0) + row['expense_count']
+        if biggest is None or row['max_minor'] > biggest['amount_minor']:
+            biggest = {'id': row['id'], 'exp_name': row['exp_name'], 'amount_minor': row['max_minor'],
+                       'exp_date': row['exp_date'], 'exp_type': row['exp_type']}
+    if biggest is not None:
+        biggest['exp_amount'] = biggest.pop('amount_minor') / 100
+    return {
+        'total': total / 100,
+        'count': count,
+        'categories': {
+            name: amount / 100
+            for name, amount in sorted(categories.items(), key=lambda item: item[1], reverse=True)
+        },
+        'category_count': len(categories),
+        'weekday_counts': weekday_counts,
+        'biggest': biggest,
+    }
+
+
+def to_minor_units(amount):
+    """Rupees (number or numeric string) to integer paise, rounding half up."""
+    try:
+        return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, OverflowError):
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+
+
+def day_ordinal(value):
+    """Day ordinal of a date, a 'YYYY-MM-DD' string or an ordinal itself."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal()
+
+
+def month_bounds(month):
+    """Return ('YYYY-MM-01', first day of the next month) for a 'YYYY-MM' string."""
+    year, month_number = (int(part) for part in month.split("-")[:2])
+    if not 1 <= month_number <= 12:
+        raise ValueError(f"Invalid month: {month}")
+    next_year, next_month = (year + 1, 1) if month_number == 12 else (year, month_number + 1)
+    return f"{year:04d}-{month_number:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
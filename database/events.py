@@ -0,0 +1,47 @@
+import threading
+from collections import namedtuple
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# One committed row change. `row` is the new row as a dict (None for deletes).
+ChangeEvent = namedtuple("ChangeEvent", ["table", "op", "row_id", "row"])
+
+
+class ChangeEventBus:
+    """Delivers ChangeEvents to the callbacks subscribed to a table.
+
+    Callbacks run synchronously on the thread that committed the change
+    (which may be the write-behind timer thread), so UI subscribers should
+    hand the event over to the main thread, e.g. with Clock.schedule_once.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # table -> [callback, ...]
+        self._lock = threading.Lock()
+
+    def subscribe(self, table, callback):
+        """Call `callback(event)` after every committed change to `table`."""
+        with self._lock:
+            self._subscribers.setdefault(table, []).append(callback)
+
+    def unsubscribe(self, table, callback):
+        """Stop delivering events for `table` to `callback`."""
+        with self._lock:
+            callbacks = self._subscribers.get(table, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def has_subscribers(self, table):
+        return bool(self._subscribers.get(table))
+
+    def publish(self, event):
+        """Deliver an event; a failing subscriber doesn't stop the others."""
+        with self._lock:
+            callbacks = list(self._subscribers.get(event.table, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error handling {event.op} on {event.table}: {e}")
@@ -1,29 +1,33 @@
-from database_manager import DatabaseManager
+from database.backup import BackupService
+from database.database_manager import DatabaseManager
 import os
 
 def init_database():
     """Initialize the database with tables and default data."""
-    # Remove existing database if it exists
+    # Remove existing database if it exists, keeping a snapshot of it first
     if os.path.exists("Fusion.db"):
+        try:
+            print(f"Backed up existing database to {BackupService('Fusion.db').backup()}")
+        except Exception as e:
+            print(f"Error backing up database; leaving it in place: {e}")
+            return False
         try:
             os.remove("Fusion.db")
+            # WAL side files belong to the old database and must go with it
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists("Fusion.db" + suffix):
+                    os.remove("Fusion.db" + suffix)
             print("Removed existing database")
         except Exception as e:
             print(f"Error removing database: {e}")
             return False
     
     try:
-        # Create new database
+        # Create new database; migrations build the schema and the default user.
+        # Flashcards fall into the 'General' chapter through the column default.
         db = DatabaseManager()
         
-        # Create default chapter
-        db.execute_query(
-            "INSERT INTO chapters_flashcards (chap_name) VALUES (?)",
-            ("General",),
-            commit=True
-        )
-        
-        print("Database initialized successfully!")
+        print(f"Database initialized successfully at schema version {db.get_schema_version()}!")
         return True
         
     except Exception as e:
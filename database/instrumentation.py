@@ -0,0 +1,135 @@
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+DEFAULT_SLOW_QUERY_MS = 50.0
+NO_ACTION = "(none)"
+
+
+def normalize_statement(query):
+    """Collapse whitespace so the same statement always gets the same key."""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class StatementStats:
+    """Aggregated timings for one SQL statement."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lock_wait_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.plan = None  # EXPLAIN QUERY PLAN, captured the first time it runs slow
+
+    def add(self, elapsed_ms, rows, lock_wait_ms, error):
+        self.count += 1
+        self.errors += bool(error)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.lock_wait_ms += lock_wait_ms
+        self.rows += rows or 0
+        for bucket, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                break
+        else:
+            bucket = len(LATENCY_BUCKETS_MS)
+        self.histogram[bucket] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'lock_wait_ms': round(self.lock_wait_ms, 3),
+            'rows': self.rows,
+            'histogram': {label: n for label, n in zip(labels, self.histogram) if n},
+            'plan': self.plan,
+        }
+
+
+class QueryStats:
+    """Per-statement latency histograms, row counts, lock waits and a slow-query log.
+
+    Statements are grouped under the current action (see `action()`), so a
+    dump shows which screen action issued which queries.
+    """
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, max_slow_log=100):
+        self.slow_query_ms = slow_query_ms
+        self._actions = {}  # action -> {statement -> StatementStats}
+        self._slow_log = deque(maxlen=max_slow_log)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def action(self, name):
+        """Attribute every statement run on this thread inside the block to `name`."""
+        previous = getattr(self._local, "action", NO_ACTION)
+        self._local.action = name
+        try:
+            yield
+        finally:
+            self._local.action = previous
+
+    def current_action(self):
+        return getattr(self._local, "action", NO_ACTION)
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+
+    def needs_plan(self, query):
+        """True until a plan has been captured for this statement."""
+        statement = normalize_statement(query)
+        with self._lock:
+            stats = self._actions.get(self.current_action(), {}).get(statement)
+            return stats is None or stats.plan is None
+
+    def record(self, query, elapsed_ms, rows=None, lock_wait_ms=0.0, error=False, plan=None):
+        """Add one execution of `query` to the stats of the current action."""
+        statement = normalize_statement(query)
+        action = self.current_action()
+        with self._lock:
+            stats = self._actions.setdefault(action, {}).get(statement)
+            if stats is None:
+                stats = self._actions[action][statement] = StatementStats()
+            stats.add(elapsed_ms, rows, lock_wait_ms, error)
+            if plan is not None:
+                stats.plan = plan
+            if self.is_slow(elapsed_ms):
+                self._slow_log.append({
+                    'action': action,
+                    'statement': statement,
+                    'ms': round(elapsed_ms, 3),
+                    'rows': rows,
+                    'plan': plan or stats.plan,
+                })
+        if self.is_slow(elapsed_ms):
+            print(f"Slow query ({elapsed_ms:.1f} ms) in {action}: {statement}")
+            for line in plan or ():
+                print(f"    {line}")
+
+    def snapshot(self):
+        """All stats as plain dicts, ready for JSON."""
+        with self._lock:
+            return {
+                'slow_query_ms': self.slow_query_ms,
+                'actions': {
+                    action: {statement: stats.as_dict() for statement, stats in statements.items()}
+                    for action, statements in self._actions.items()
+                },
+                'slow_queries': list(self._slow_log),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._actions.clear()
+            self._slow_log.clear()
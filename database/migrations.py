@@ -0,0 +1,513 @@
+import sqlite3
+
+from database.note_colors import WHITE_RGBA, parse_legacy_color
+from database.note_storage import PREVIEW_CHARS, searchable_content
+
+
+# Each migration is (version, description, function). Versions are stored in
+# PRAGMA user_version, so a database only ever runs the migrations it has not
+# seen yet, in order, each inside its own transaction.
+
+def _migration_001_baseline(connection):
+    """Tables for users, notes, tasks, flashcards and expenses, plus the default user."""
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            Color TEXT DEFAULT '(1, 1, 1, 1)',  -- Default white color
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            task TEXT NOT NULL,
+            status TEXT CHECK(status IN ('Pending', 'Completed')) DEFAULT 'Pending',
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS flashcards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            cards_name TEXT NOT NULL,
+            front TEXT NOT NULL,
+            back TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            chapter TEXT NOT NULL DEFAULT 'General',
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+
+    # Databases created before the chapter column existed
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(flashcards)")}
+    if "chapter" not in columns:
+        connection.execute("ALTER TABLE flashcards ADD COLUMN chapter TEXT NOT NULL DEFAULT 'General'")
+
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exp_name TEXT NOT NULL,
+            exp_type TEXT NOT NULL,
+            exp_amount REAL NOT NULL,
+            exp_date TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+    """)
+
+    connection.execute(
+        "INSERT OR IGNORE INTO users (id, username, password) VALUES (1, 'default_user', 'default_password')"
+    )
+
+
+def _migration_002_per_user_indexes(connection):
+    """Composite indexes for every per-user list, lookup and range query."""
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes (user_id, created_at)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_flashcards_user_name ON flashcards (user_id, cards_name)")
+    # get/update/delete_flashcards_by_name and get_all_cards_names filter on the name alone
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_flashcards_name ON flashcards (cards_name)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, exp_date)")
+
+
+def _create_fts_index(connection, table, columns):
+    """External-content FTS5 index over `columns` of `table`, kept in sync by triggers."""
+    fts = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    connection.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column_list}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    """)
+    # Index the rows that existed before the triggers
+    connection.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _migration_003_full_text_search(connection):
+    """FTS5 indexes over notes (title, content) and flashcards (cards_name, front, back)."""
+    try:
+        _create_fts_index(connection, "notes", ("title", "content"))
+        _create_fts_index(connection, "flashcards", ("cards_name", "front", "back"))
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        # SQLite built without FTS5: searches keep using LIKE
+        print(f"Full-text search unavailable: {e}")
+
+
+def _migration_004_keyset_indexes(connection):
+    """(user_id, id) orderings for keyset-paginated task and flashcard pages."""
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user ON tasks (user_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_flashcards_user ON flashcards (user_id)")
+
+
+# expenses.day is a proleptic Gregorian ordinal (date.toordinal()); adding
+# this offset turns it into a Julian day number for SQLite's date functions.
+# day % 7 matches strftime('%w'): 0 is Sunday.
+ORDINAL_TO_JULIAN_DAY = 1721424.5
+EXPENSE_COPY_CHUNK = 1000
+
+
+def rebuild_expense_rollup(connection):
+    """Recompute expense_monthly_rollup from the expenses ledger."""
+    connection.execute("DELETE FROM expense_monthly_rollup")
+    connection.execute(f"""
+        INSERT INTO expense_monthly_rollup (user_id, month, category_id, total_minor, count)
+        SELECT user_id, strftime('%Y-%m', day + {ORDINAL_TO_JULIAN_DAY}), category_id, SUM(amount_minor), COUNT(*)
+        FROM expenses
+        GROUP BY user_id, strftime('%Y-%m', day + {ORDINAL_TO_JULIAN_DAY}), category_id
+    """)
+
+
+def _migration_005_expenses_v2(connection):
+    """Integer paise amounts, day ordinals, an expense_categories lookup table and monthly totals.
+
+    The old rows are copied over in id order, EXPENSE_COPY_CHUNK at a time,
+    so the conversion never holds the whole ledger in memory. The
+    expense_ledger view keeps the old column names for readers, and
+    expense_monthly_rollup (per user, month and category) is kept exact by
+    triggers.
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS expense_categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    connection.execute("INSERT OR IGNORE INTO expense_categories (name) SELECT DISTINCT exp_type FROM expenses")
+    connection.execute("""
+        CREATE TABLE expenses_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            exp_name TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            amount_minor INTEGER NOT NULL,  -- paise
+            day INTEGER NOT NULL,  -- date.toordinal()
+            FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE,
+            FOREIGN KEY(category_id) REFERENCES expense_categories(id)
+        )
+    """)
+
+    # Dates SQLite can't parse would become NULL days; they are logged and dated today
+    undated = connection.execute("SELECT COUNT(*) FROM expenses WHERE julianday(exp_date) IS NULL").fetchone()[0]
+    if undated:
+        print(f"{undated} expenses had unreadable dates and were dated today")
+    last_id = 0
+    while True:
+        copied = connection.execute(f"""
+            INSERT INTO expenses_v2 (id, user_id, exp_name, category_id, amount_minor, day)
+            SELECT e.id, e.user_id, e.exp_name, c.id, CAST(round(e.exp_amount * 100) AS INTEGER),
+                   CAST(COALESCE(julianday(e.exp_date), julianday('now', 'localtime', 'start of day'))
+                        - {ORDINAL_TO_JULIAN_DAY} AS INTEGER)
+            FROM expenses e JOIN expense_categories c ON c.name = e.exp_type
+            WHERE e.id > ?
+            ORDER BY e.id
+            LIMIT {EXPENSE_COPY_CHUNK}
+        """, (last_id,)).rowcount
+        if copied < EXPENSE_COPY_CHUNK:
+            break
+        last_id = connection.execute("SELECT MAX(id) FROM expenses_v2").fetchone()[0]
+
+    # Keep AUTOINCREMENT from reusing the ids of deleted expenses
+    sequence = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'expenses'").fetchone()
+    connection.execute("DROP TABLE expenses")  # Also drops its indexes
+    connection.execute("ALTER TABLE expenses_v2 RENAME TO expenses")
+    if sequence:
+        connection.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'expenses'", sequence)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_expenses_user_day ON expenses (user_id, day)")
+
+    connection.execute(f"""
+        CREATE VIEW IF NOT EXISTS expense_ledger AS
+        SELECT e.id, e.exp_name, c.name AS exp_type, e.amount_minor / 100.0 AS exp_amount,
+               date(e.day + {ORDINAL_TO_JULIAN_DAY}) AS exp_date, e.user_id,
+               e.category_id, e.amount_minor, e.day
+        FROM expenses e JOIN expense_categories c ON c.id = e.category_id
+    """)
+
+    connection.execute("""
+        CREATE TABLE expense_monthly_rollup (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,  -- 'YYYY-MM'
+            category_id INTEGER NOT NULL,
+            total_minor INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month, category_id)
+        ) WITHOUT ROWID
+    """)
+    # Adding a row upserts its bucket; removing one decrements it and drops
+    # the bucket once empty. An UPDATE is a removal followed by an addition.
+    new_month = f"strftime('%Y-%m', new.day + {ORDINAL_TO_JULIAN_DAY})"
+    old_month = f"strftime('%Y-%m', old.day + {ORDINAL_TO_JULIAN_DAY})"
+    add_new = f"""
+        INSERT INTO expense_monthly_rollup (user_id, month, category_id, total_minor, count)
+        VALUES (new.user_id, {new_month}, new.category_id, new.amount_minor, 1)
+        ON CONFLICT (user_id, month, category_id)
+        DO UPDATE SET total_minor = total_minor + excluded.total_minor, count = count + 1;
+    """
+    remove_old = f"""
+        UPDATE expense_monthly_rollup
+        SET total_minor = total_minor - old.amount_minor, count = count - 1
+        WHERE user_id = old.user_id AND month = {old_month} AND category_id = old.category_id;
+        DELETE FROM expense_monthly_rollup
+        WHERE user_id = old.user_id AND month = {old_month} AND category_id = old.category_id
+          AND count <= 0;
+    """
+    connection.execute(f"""
+        CREATE TRIGGER expenses_rollup_ai AFTER INSERT ON expenses BEGIN
+            {add_new}
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER expenses_rollup_ad AFTER DELETE ON expenses BEGIN
+            {remove_old}
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER expenses_rollup_au
+        AFTER UPDATE OF user_id, category_id, amount_minor, day ON expenses BEGIN
+            {remove_old}
+            {add_new}
+        END
+    """)
+    rebuild_expense_rollup(connection)
+
+
+def rebuild_counters(connection):
+    """Recompute user_counters and deck_counters from the tasks, notes, flashcards and expenses."""
+    connection.execute("DELETE FROM user_counters")
+    connection.execute("DELETE FROM deck_counters")
+    connection.execute("""
+        INSERT INTO user_counters (user_id, pending_tasks, completed_tasks, notes, flashcards, month)
+        SELECT user_id, SUM(pending), SUM(completed), SUM(notes), SUM(flashcards),
+               strftime('%Y-%m', 'now', 'localtime')
+        FROM (
+            SELECT user_id, status IS 'Pending' AS pending, status IS 'Completed' AS completed,
+                   0 AS notes, 0 AS flashcards FROM tasks
+            UNION ALL SELECT user_id, 0, 0, 1, 0 FROM notes
+            UNION ALL SELECT user_id, 0, 0, 0, 1 FROM flashcards
+            UNION ALL SELECT user_id, 0, 0, 0, 0 FROM expense_monthly_rollup
+        )
+        GROUP BY user_id
+    """)
+    connection.execute("""
+        UPDATE user_counters
+        SET month_spend_minor = (
+            SELECT COALESCE(SUM(total_minor), 0) FROM expense_monthly_rollup r
+            WHERE r.user_id = user_counters.user_id AND r.month = user_counters.month
+        )
+    """)
+    connection.execute("""
+        INSERT INTO deck_counters (user_id, cards_name, cards)
+        SELECT user_id, cards_name, COUNT(*) FROM flashcards GROUP BY user_id, cards_name
+    """)
+
+
+def _migration_006_counters(connection):
+    """Trigger-maintained per-user dashboard counts and per-deck card counts.
+
+    month_spend_minor only covers the month in `month`; expenses dated in
+    other months leave it alone, and get_dashboard re-tags the row from the
+    rollup once the calendar month moves on.
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS user_counters (
+            user_id INTEGER PRIMARY KEY,
+            pending_tasks INTEGER NOT NULL DEFAULT 0,
+            completed_tasks INTEGER NOT NULL DEFAULT 0,
+            notes INTEGER NOT NULL DEFAULT 0,
+            flashcards INTEGER NOT NULL DEFAULT 0,
+            month TEXT NOT NULL DEFAULT (strftime('%Y-%m', 'now', 'localtime')),
+            month_spend_minor INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS deck_counters (
+            user_id INTEGER NOT NULL,
+            cards_name TEXT NOT NULL,
+            cards INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, cards_name)
+        ) WITHOUT ROWID
+    """)
+
+    def bump(user, **deltas):
+        """Upsert a user_counters row adding each column's delta expression."""
+        columns = ", ".join(deltas)
+        values = ", ".join(deltas.values())
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in deltas)
+        return f"""
+            INSERT INTO user_counters (user_id, {columns}) VALUES ({user}, {values})
+            ON CONFLICT (user_id) DO UPDATE SET {updates};
+        """
+
+    def counter_triggers(table, watched, add_new, remove_old):
+        connection.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_ai AFTER INSERT ON {table} BEGIN
+                {add_new}
+            END
+        """)
+        connection.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_ad AFTER DELETE ON {table} BEGIN
+                {remove_old}
+            END
+        """)
+        connection.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_au AFTER UPDATE OF {watched} ON {table} BEGIN
+                {remove_old}
+                {add_new}
+            END
+        """)
+
+    counter_triggers(
+        "tasks", "user_id, status",
+        bump("new.user_id", pending_tasks="new.status IS 'Pending'", completed_tasks="new.status IS 'Completed'"),
+        bump("old.user_id", pending_tasks="-(old.status IS 'Pending')", completed_tasks="-(old.status IS 'Completed')"),
+    )
+    counter_triggers("notes", "user_id", bump("new.user_id", notes="1"), bump("old.user_id", notes="-1"))
+    counter_triggers(
+        "flashcards", "user_id, cards_name",
+        bump("new.user_id", flashcards="1") + """
+            INSERT INTO deck_counters (user_id, cards_name, cards) VALUES (new.user_id, new.cards_name, 1)
+            ON CONFLICT (user_id, cards_name) DO UPDATE SET cards = cards + 1;
+        """,
+        bump("old.user_id", flashcards="-1") + """
+            UPDATE deck_counters SET cards = cards - 1
+            WHERE user_id = old.user_id AND cards_name = old.cards_name;
+            DELETE FROM deck_counters
+            WHERE user_id = old.user_id AND cards_name = old.cards_name AND cards <= 0;
+        """,
+    )
+    # Only expenses dated in the row's tagged month count towards month_spend_minor
+    new_month = f"strftime('%Y-%m', new.day + {ORDINAL_TO_JULIAN_DAY})"
+    old_month = f"strftime('%Y-%m', old.day + {ORDINAL_TO_JULIAN_DAY})"
+    counter_triggers(
+        "expenses", "user_id, amount_minor, day",
+        bump("new.user_id", month_spend_minor="0") + f"""
+            UPDATE user_counters SET month_spend_minor = month_spend_minor + new.amount_minor
+            WHERE user_id = new.user_id AND month = {new_month};
+        """,
+        f"""
+            UPDATE user_counters SET month_spend_minor = month_spend_minor - old.amount_minor
+            WHERE user_id = old.user_id AND month = {old_month};
+        """,
+    )
+    rebuild_counters(connection)
+
+
+def _migration_007_packed_note_colors(connection):
+    """Note colours as one 0xRRGGBBAA integer (color_rgba) instead of a tuple literal.
+
+    Every distinct Color text is parsed once with ast.literal_eval, then a
+    single UPDATE maps all rows through a temporary lookup table.
+    """
+    connection.execute(f"ALTER TABLE notes ADD COLUMN color_rgba INTEGER NOT NULL DEFAULT {WHITE_RGBA}")
+    connection.execute("CREATE TEMP TABLE note_color_map (text TEXT PRIMARY KEY, rgba INTEGER NOT NULL)")
+    connection.executemany(
+        "INSERT INTO note_color_map (text, rgba) VALUES (?, ?)",
+        [(text, parse_legacy_color(text)) for (text,) in
+         connection.execute("SELECT DISTINCT Color FROM notes WHERE Color IS NOT NULL").fetchall()],
+    )
+    connection.execute("""
+        UPDATE notes
+        SET color_rgba = (SELECT rgba FROM note_color_map WHERE text = notes.Color)
+        WHERE Color IS NOT NULL
+    """)
+    connection.execute("DROP TABLE note_color_map")
+    try:
+        connection.execute("ALTER TABLE notes DROP COLUMN Color")
+    except sqlite3.OperationalError as e:
+        # SQLite before 3.35 can't drop columns; the old one is simply no longer written
+        print(f"Keeping the unused notes.Color column: {e}")
+
+
+def _migration_008_note_previews(connection):
+    """Stored previews and lengths, plus optional compressed bodies (content_codec).
+
+    notes_fts becomes an external-content index over the notes_search view,
+    kept in sync by triggers. Neither calls app-defined functions, so any
+    SQLite client can still write notes. Compressed bodies are not decoded
+    for the index: such notes are found by title and preview only.
+    """
+    connection.execute("ALTER TABLE notes ADD COLUMN preview TEXT NOT NULL DEFAULT ''")
+    connection.execute("ALTER TABLE notes ADD COLUMN content_length INTEGER NOT NULL DEFAULT 0")
+    connection.execute("ALTER TABLE notes ADD COLUMN content_codec INTEGER NOT NULL DEFAULT 0")
+    connection.execute(f"UPDATE notes SET preview = substr(content, 1, {PREVIEW_CHARS}), content_length = length(content)")
+    connection.execute(f"""
+        CREATE VIEW IF NOT EXISTS notes_search AS
+        SELECT id, title, {searchable_content()} AS content
+        FROM notes
+    """)
+
+    has_fts = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+    ).fetchone()
+    if not has_fts:
+        return  # SQLite without FTS5; searches use LIKE over notes_plain
+    for suffix in ("ai", "ad", "au"):
+        connection.execute(f"DROP TRIGGER IF EXISTS notes_fts_{suffix}")
+    connection.execute("DROP TABLE notes_fts")
+    connection.execute("""
+        CREATE VIRTUAL TABLE notes_fts USING fts5(
+            title, content, content='notes_search', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, {searchable_content("new.")});
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, {searchable_content("old.")});
+        END
+    """)
+    connection.execute(f"""
+        CREATE TRIGGER notes_fts_au AFTER UPDATE OF title, content, content_codec, preview ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, {searchable_content("old.")});
+            INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, {searchable_content("new.")});
+        END
+    """)
+    connection.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [
+    (1, "baseline schema", _migration_001_baseline),
+    (2, "per-user indexes", _migration_002_per_user_indexes),
+    (3, "full-text search", _migration_003_full_text_search),
+    (4, "keyset pagination indexes", _migration_004_keyset_indexes),
+    (5, "expenses v2: paise, day ordinals, categories, monthly rollup", _migration_005_expenses_v2),
+    (6, "dashboard and deck counters", _migration_006_counters),
+    (7, "packed note colours", _migration_007_packed_note_colors),
+    (8, "note previews and compressed bodies", _migration_008_note_previews),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection):
+    """Return the schema version recorded in PRAGMA user_version."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    """Apply all pending migrations in order and return the versions applied.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failure leaves the database at the last
+    version that fully applied.
+    """
+    current = get_schema_version(connection)
+    if current >= SCHEMA_VERSION:
+        return []
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            apply(connection)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            print(f"Migration {version} ({description}) failed: {e}")
+            raise
+        print(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,36 @@
+import ast
+from functools import lru_cache
+
+# Note colours are stored as one 32-bit integer, 0xRRGGBBAA, 8 bits per channel
+WHITE_RGBA = 0xFFFFFFFF
+WHITE = (1.0, 1.0, 1.0, 1.0)
+
+
+def pack_rgba(color):
+    """Pack an (r, g, b[, a]) tuple of 0-1 floats into a 0xRRGGBBAA integer."""
+    channels = list(color)[:4]
+    if len(channels) == 3:
+        channels.append(1.0)
+    if len(channels) != 4:
+        raise ValueError(f"Expected 3 or 4 colour channels, got {color!r}")
+    packed = 0
+    for channel in channels:
+        packed = (packed << 8) | min(255, max(0, round(float(channel) * 255)))
+    return packed
+
+
+@lru_cache(maxsize=256)
+def unpack_rgba(packed):
+    """The (r, g, b, a) tuple of a packed colour; cached, since notes share a few colours."""
+    if packed is None:
+        return WHITE
+    return tuple(((packed >> shift) & 0xFF) / 255 for shift in (24, 16, 8, 0))
+
+
+def parse_legacy_color(text):
+    """Packed colour of a pre-version 7 Color value such as '(1, 1, 1, 1)'; white if unreadable."""
+    try:
+        return pack_rgba(ast.literal_eval(text))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        print(f"Unreadable note colour {text!r}; using white")
+        return WHITE_RGBA
@@ -0,0 +1,73 @@
+import zlib
+
+# Characters of a note body stored in notes.preview for the notes grid
+PREVIEW_CHARS = 120
+
+# notes.content_codec values
+CODEC_PLAIN = 0  # content is the text itself
+CODEC_ZLIB = 1  # content is the zlib-compressed UTF-8 text
+
+
+def encode_note(content, compress_min_bytes=None):
+    """(stored content, codec) for a note body.
+
+    Bodies of at least `compress_min_bytes` UTF-8 bytes are zlib-compressed
+    when that makes them smaller; None leaves every body as plain text.
+    """
+    if compress_min_bytes is not None:
+        data = content.encode("utf-8")
+        if len(data) >= compress_min_bytes:
+            packed = zlib.compress(data, 6)
+            if len(packed) < len(data):
+                return packed, CODEC_ZLIB
+    return content, CODEC_PLAIN
+
+
+def decode_note(stored, codec):
+    """The text of a stored note body."""
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(stored).decode("utf-8")
+    return stored
+
+
+def note_preview(content):
+    return content[:PREVIEW_CHARS]
+
+
+def searchable_content(row=""):
+    """SQL for the text notes_fts indexes as a note's body: the body if plain, else its preview.
+
+    `row` prefixes the column names, e.g. "new." inside a trigger. Plain SQL
+    only, so the schema objects using it work in every SQLite client.
+    """
+    return f"CASE WHEN {row}content_codec = {CODEC_PLAIN} THEN {row}content ELSE {row}preview END"
+
+
+# Notes with plain bodies. It is a TEMP view, created by each app connection,
+# so the database file holds nothing that calls note_text() and any SQLite
+# client can still read and write it.
+NOTES_PLAIN_VIEW = """
+    CREATE TEMP VIEW notes_plain AS
+    SELECT id, user_id, title, note_text(content, content_codec) AS content, created_at,
+           color_rgba, preview, content_length
+    FROM main.notes
+"""
+
+
+def register_note_functions(connection):
+    """Add note_text(content, content_codec) to a connection."""
+    connection.create_function("note_text", 2, decode_note, deterministic=True)
+
+
+def create_notes_plain_view(connection):
+    """(Re)create the notes_plain TEMP view; `notes` must already have the current schema.
+
+    ALTER TABLE checks temp views too, so drop_notes_plain_view() must run
+    before migrations change `notes`.
+    """
+    drop_notes_plain_view(connection)
+    connection.execute(NOTES_PLAIN_VIEW)
+
+
+def drop_notes_plain_view(connection):
+    connection.execute("DROP VIEW IF EXISTS temp.notes_plain")
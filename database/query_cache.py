@@ -0,0 +1,78 @@
+import copy
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Bounded LRU cache of query results, invalidated by per-table generations.
+
+    Every table has a generation counter that writers bump. An entry records
+    the generations of the tables it read when it was loaded and is only
+    served while all of them are unchanged, so a write to `tasks` drops every
+    cached task list at once without having to find the matching keys.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (generations, rows)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generations(self, tables):
+        """Current generation of each table, in order."""
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def get(self, key, tables, default=None):
+        """Return a copy of the cached rows, or `default` when missing or stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            current = tuple(self._generations.get(table, 0) for table in tables)
+            if entry is None or entry[0] != current:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy_rows(entry[1])
+
+    def put(self, key, generations, rows):
+        """Store rows loaded while the tables were at `generations`."""
+        with self._lock:
+            self._entries[key] = (generations, _copy_rows(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tables):
+        """Bump the generation of each table so its cached results go stale."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+def _copy_rows(rows):
+    """Shallow-copy a result so callers can't modify the cached one.
+
+    sqlite3.Row and tuples are immutable; dict rows and summaries are copied.
+    """
+    if isinstance(rows, list):
+        return [dict(row) if isinstance(row, dict) else row for row in rows]
+    if isinstance(rows, dict):
+        return copy.deepcopy(rows)  # Summaries nest dicts
+    return rows
@@ -0,0 +1,167 @@
+"""Deterministic synthetic users, notes, tasks, flashcards and expenses.
+
+The same (rows, seed, users) always produces the same data, so benchmark
+runs on different releases measure the same workload:
+
+    python -m database.cli --db bench.db generate --rows 100000 --seed 7
+"""
+import math
+import random
+from datetime import date, timedelta
+
+# Share of the generated rows that goes to each table
+TABLE_SHARES = {"notes": 0.2, "tasks": 0.3, "flashcards": 0.3, "expenses": 0.2}
+ROWS_PER_USER = 2000  # Default number of users is rows // ROWS_PER_USER
+USER_SKEW = 0.8  # User i gets a share proportional to 1 / (i + 1) ** USER_SKEW
+BATCH_SIZE = 5000  # Rows per bulk insert transaction
+PASSWORD = "benchmark"
+
+# Expenses fall in the EXPENSE_DAYS days up to ANCHOR_DATE, not up to today,
+# so the data doesn't depend on when it was generated
+ANCHOR_DATE = date(2025, 6, 30)
+EXPENSE_DAYS = 730
+
+WORDS = (
+    "meeting", "project", "review", "budget", "draft", "idea", "summary", "lecture", "chapter", "exam",
+    "recipe", "travel", "ticket", "invoice", "report", "design", "garden", "weekend", "family", "doctor",
+    "reading", "notes", "plan", "deadline", "client", "update", "journal", "workout", "market", "history",
+    "science", "energy", "language", "music", "movie", "friend", "holiday", "morning", "evening", "question",
+    "answer", "theory", "method", "result", "example", "problem", "solution", "version", "release", "quarter",
+    "the", "and", "with", "for", "about", "from", "before", "after", "during", "into",
+)
+NOTE_COLORS = (
+    (1, 0.92, 0.8, 1),
+    (0.94, 0.92, 0.8, 1),
+    (0.85, 0.92, 0.8, 1),
+    (0.8, 0.92, 0.94, 1),
+    (0.94, 0.8, 0.9, 1),
+    (1, 1, 1, 1),
+)
+NOTE_COLOR_WEIGHTS = (1, 1, 1, 1, 1, 10)  # Most notes keep the default white
+DECK_TOPICS = ("Biology", "Chemistry", "History", "Spanish", "Algorithms", "Geography", "Physics", "Economics")
+# category -> (relative frequency, median amount in rupees)
+EXPENSE_CATEGORIES = {
+    "Food": (30, 250.0),
+    "Groceries": (20, 900.0),
+    "Travel": (10, 1500.0),
+    "Utilities": (6, 1800.0),
+    "Entertainment": (8, 600.0),
+    "Shopping": (10, 1200.0),
+    "Medical": (4, 1000.0),
+    "Pharmaceutical": (4, 350.0),
+    "Education": (3, 3000.0),
+    "Rent": (2, 15000.0),
+    "Investments": (3, 5000.0),
+}
+
+
+def username(index):
+    """Username of the index-th synthetic user (0 is the heaviest)."""
+    return f"bench_user_{index:05d}"
+
+
+def allocate(total, weights):
+    """Split `total` into integer parts proportional to `weights` (largest remainder)."""
+    weight_sum = sum(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [int(share) for share in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - parts[i], reverse=True)
+    for i in by_remainder[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+def sentence(rnd, words):
+    text = " ".join(rnd.choice(WORDS) for _ in range(words))
+    return text[:1].upper() + text[1:] + "."
+
+
+def note_body(rnd):
+    """Log-normal length: most notes are a few lines, a few run to pages."""
+    words = min(4000, max(3, int(rnd.lognormvariate(math.log(60), 1.0))))
+    sentences = []
+    while words > 0:
+        length = min(words, rnd.randint(6, 18))
+        sentences.append(sentence(rnd, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def generate_notes(rnd, count):
+    for _ in range(count):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))).title()
+        color = rnd.choices(NOTE_COLORS, NOTE_COLOR_WEIGHTS)[0]
+        yield title, note_body(rnd), color
+
+
+def generate_decks(rnd, count):
+    """(deck name, [(front, back), ...]) decks of 5-60 cards adding up to `count`."""
+    deck_number = 0
+    while count > 0:
+        size = min(count, rnd.randint(5, 60))
+        deck_number += 1
+        name = f"{rnd.choice(DECK_TOPICS)} {deck_number}"
+        cards = [(f"What is {rnd.choice(WORDS)} {rnd.choice(WORDS)}?", sentence(rnd, rnd.randint(4, 20)))
+                 for _ in range(size)]
+        yield name, cards
+        count -= size
+
+
+def generate_expenses(rnd, count):
+    categories = list(EXPENSE_CATEGORIES)
+    weights = [EXPENSE_CATEGORIES[category][0] for category in categories]
+    for _ in range(count):
+        category = rnd.choices(categories, weights)[0]
+        median = EXPENSE_CATEGORIES[category][1]
+        amount = round(max(1.0, rnd.lognormvariate(math.log(median), 0.6)), 2)
+        day = ANCHOR_DATE - timedelta(days=rnd.randrange(EXPENSE_DAYS))
+        yield f"{category} {rnd.choice(WORDS)}", category, amount, day
+
+
+def batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_dataset(db, rows, seed=0, users=None):
+    """Fill `db` with about `rows` rows spread over users, notes, tasks, flashcards and expenses.
+
+    Users are bench_user_00000, bench_user_00001, ... (password PASSWORD);
+    the first ones own the most data. Returns a summary with the user IDs
+    and the number of rows written to each table.
+    """
+    rnd = random.Random(seed)
+    users = users or max(1, rows // ROWS_PER_USER)
+    user_ids = []
+    for index in range(users):
+        db.register_user(username(index), PASSWORD)
+        user_ids.append(db.verify_user(username(index), PASSWORD))
+
+    user_weights = [1 / (index + 1) ** USER_SKEW for index in range(users)]
+    counts = {table: 0 for table in TABLE_SHARES}
+    table_rows = allocate(rows, list(TABLE_SHARES.values()))
+    per_user = {table: allocate(total, user_weights) for table, total in zip(TABLE_SHARES, table_rows)}
+
+    for index, user_id in enumerate(user_ids):
+        for batch in batches(generate_notes(rnd, per_user["notes"][index])):
+            counts["notes"] += len(db.add_notes_bulk(user_id, batch))
+
+        for batch in batches(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 8)))
+                             for _ in range(per_user["tasks"][index])):
+            task_ids = db.add_tasks_bulk(user_id, batch)
+            db.update_task_statuses_bulk((task_id, "Completed") for task_id in task_ids if rnd.random() < 0.6)
+            counts["tasks"] += len(task_ids)
+
+        for name, cards in generate_decks(rnd, per_user["flashcards"][index]):
+            counts["flashcards"] += len(db.add_flashcards_bulk(user_id, name, cards))
+
+        for batch in batches(generate_expenses(rnd, per_user["expenses"][index])):
+            counts["expenses"] += len(db.add_expenses_bulk(user_id, batch))
+
+    return {'seed': seed, 'rows': rows, 'users': users, 'user_ids': user_ids, 'counts': counts}
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class WriteBehindQueue:
+    """Coalesces small, frequent row updates and commits them in groups.
+
+    Writes are keyed by (table, row id, column): a newer write to the same
+    key replaces the queued one, so toggling a checkbox ten times costs a
+    single UPDATE. The queue is written out `delay` seconds after the first
+    queued write, or as soon as `max_pending` distinct keys are waiting.
+    Delayed flushes all run on one long-lived worker thread.
+    """
+
+    def __init__(self, apply_batch, delay=0.25, max_pending=64):
+        self._apply_batch = apply_batch  # Runs a list of (key, query, params) in one transaction
+        self.delay = delay
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._in_flight = 0  # Writes taken off the queue whose transaction hasn't committed yet
+        self._in_flight_tables = Counter()  # Their tables (key[0]), counted per write
+        self._deadline = None  # When the oldest queued write is due
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.RLock()
+        self._worker = None
+        self._closed = False
+
+    @property
+    def pending(self):
+        """Number of queued or committing writes; readers must flush() while it is non-zero."""
+        with self._lock:
+            return len(self._pending) + self._in_flight
+
+    def pending_tables(self):
+        """Tables (key[0]) with queued or committing writes."""
+        with self._lock:
+            return {key[0] for key in self._pending} | {table for table, n in self._in_flight_tables.items() if n}
+
+    def submit(self, key, query, params=()):
+        """Queue a write, replacing any queued write with the same key."""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = (query, params)
+            flush_now = len(self._pending) >= self.max_pending
+            if not flush_now and self._deadline is None:
+                self._deadline = time.monotonic() + self.delay
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                    self._worker.start()
+                self._wakeup.notify()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Commit every queued write; returns once they are durable.
+
+        A flush already running on another thread finishes first (the flush
+        lock), so after flush() returns every earlier write is committed.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [(key, query, params) for key, (query, params) in self._pending.items()]
+                self._pending.clear()
+                self._deadline = None
+                self._in_flight += len(batch)
+                self._in_flight_tables.update(key[0] for key, _, _ in batch)
+            if batch:
+                try:
+                    self._apply_batch(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} queued changes: {e}")
+                finally:
+                    with self._lock:
+                        self._in_flight -= len(batch)
+                        self._in_flight_tables.subtract(key[0] for key, _, _ in batch)
+            return len(batch)
+
+    def close(self):
+        """Commit every queued write and stop the worker thread."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self.flush()
+
+    def _run(self):
+        """Worker: flush the queue whenever its oldest write falls due."""
+        while True:
+            with self._lock:
+                while self._deadline is None and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    self._worker = None
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+            self.flush()
@@ -3,14 +3,14 @@ from kivy.lang import Builder
 from kivymd.app import MDApp
 from kivy.uix.screenmanager import ScreenManager
 import os
-import nltk
-from kivy.utils import platform
 
 from kivymd.uix.list import IconLeftWidget, TwoLineIconListItem, OneLineListItem
 from kivy.app import App
 from kivy.logger import Logger
 
 # Import necessary components
+from database.backup import BACKUP_INTERVAL
+from utils.nltk_resources import REQUIRED_FILES, available_resources, register_bundled_data
 from database.database_manager import DatabaseManager
 #from components.equation_solver import EquationSolver
 from components.flashcards import FlashcardScreen
@@ -29,26 +29,22 @@ base_dir = os.path.dirname(os.path.abspath(__file__))  # Get the base directory
 static_dir = os.path.join(base_dir, 'static')  # Define the static directory path
 os.makedirs(static_dir, exist_ok=True)  # Create the static directory if it doesn't exist
 
+# Screens built for the logged-in user in set_user()
+USER_SCREENS = ("note_taking", "task_list", "flashcards", "expense_tracker")
+
 # Set logging level to INFO
 Logger.setLevel('INFO')
 
 def setup_nltk():
-    """Set up NLTK data path for different platforms."""
-    if platform == 'android':
-        # Point to the packaged data
-        nltk_data_path = os.path.join(os.getcwd(), 'nltk_data')
-        nltk.data.path.append(nltk_data_path)
-        print(f"NLTK data path set to: {nltk_data_path}")
-
-    # Download necessary NLTK resources if not already downloaded
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-        nltk.download('maxent_ne_chunker', quiet=True)
-        nltk.download('words', quiet=True)
-        nltk.download('stopwords', quiet=True)
-    except Exception as e:
-        print(f"Error downloading NLTK resources: {e}")
+    """Point NLTK at the bundled nltk_data on every platform and check it offline.
+
+    Nothing is downloaded: startup must not depend on connectivity. Missing
+    resources only disable the note assistant / flashcard features using them.
+    """
+    register_bundled_data()
+    missing = sorted(set(REQUIRED_FILES) - available_resources())
+    if missing:
+        print(f"NLTK resources missing or damaged (see python -m utils.nltk_resources): {', '.join(missing)}")
 
 # Call the setup function at the start of your application
 setup_nltk()
@@ -58,6 +54,8 @@ class FusionApp(MDApp):
         self.screen_manager = ScreenManager()
         self.current_user_id = None  # 🔹 Initialize `current_user_id`
         self.db = DatabaseManager()  # 🔹 Initialize DatabaseManager
+        self.db.enable_write_behind()  # 🔹 Group-commit checkbox toggles and colour changes
+        self.db.backup(min_interval=BACKUP_INTERVAL)  # 🔹 Daily snapshot, copied on a worker thread
 
         # Adding screens to the ScreenManager
         self.screen_manager.add_widget(SignupScreen(name="signup"))
@@ -75,6 +73,7 @@ class FusionApp(MDApp):
         """Sets the user ID after login."""
         self.current_user_id = user_id
         print(f"User Logged In: {user_id}")  # Debugging
+        self.remove_user_screens()
 
         # Add NoteTaking screen **AFTER** login
         note_screen = NoteTaking(user_id=self.current_user_id, name="note_taking")
@@ -93,6 +92,28 @@ class FusionApp(MDApp):
         print(f"Adding ExpenseTrackerScreen with User ID: {self.current_user_id}")  # Debugging
         self.screen_manager.add_widget(expense_tracker)
 
+    def remove_user_screens(self):
+        """Drop the previous login's screens, unsubscribing them from change events first."""
+        for name in USER_SCREENS:
+            if self.screen_manager.has_screen(name):
+                screen = self.screen_manager.get_screen(name)
+                if hasattr(screen, "close"):
+                    screen.close()
+                self.screen_manager.remove_widget(screen)
+
+    def on_pause(self):
+        """Commit queued writes (and take the daily snapshot) before Android may kill the paused app."""
+        self.db.flush()
+        self.db.backup(min_interval=BACKUP_INTERVAL)
+        return True
+
+    def on_stop(self):
+        """Commit queued writes and close the database on exit."""
+        stats_path = os.environ.get("FUSION_QUERY_STATS")
+        if stats_path:
+            self.db.dump_stats(stats_path)  # 🔹 Per-action query timings for profiling
+        self.db.close_connection()
+
     def switch_screen(self, screen_name):
         """Switch to the specified screen."""
         self.screen_manager.current = screen_name
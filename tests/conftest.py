@@ -0,0 +1,33 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from database.database_manager import DatabaseManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A DatabaseManager over a new, fully migrated database with user 1."""
+    DatabaseManager.reset_instance()
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    manager.ensure_default_user()
+    yield manager
+    DatabaseManager.reset_instance()
+
+
+@pytest.fixture
+def legacy_db_path(tmp_path):
+    """A copy of the committed Fusion.db, which predates the migrations (user_version 0)."""
+    path = tmp_path / "legacy.db"
+    try:
+        # The committed copy, not a working-tree file the app may already have migrated
+        with open(path, "wb") as f:
+            subprocess.run(["git", "show", "HEAD:Fusion.db"], cwd=ROOT, stdout=f, stderr=subprocess.DEVNULL,
+                           check=True)
+    except (OSError, subprocess.CalledProcessError):
+        shutil.copyfile(os.path.join(ROOT, "Fusion.db"), path)
+    return str(path)
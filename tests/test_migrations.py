@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from database.database_manager import DatabaseManager
+from database.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+
+
+def row_counts(connection, tables=("users", "notes", "tasks", "flashcards", "expenses")):
+    return {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def test_versions_are_contiguous():
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, SCHEMA_VERSION + 1))
+
+
+def test_legacy_database_migrates_to_latest(legacy_db_path):
+    connection = sqlite3.connect(legacy_db_path)
+    if get_schema_version(connection) != 0:
+        pytest.skip("Fusion.db is no longer a pre-migration database")
+    before = row_counts(connection)
+    expenses = connection.execute("SELECT id, exp_type, exp_amount, exp_date FROM expenses ORDER BY id").fetchall()
+    connection.close()
+
+    DatabaseManager.reset_instance()
+    try:
+        db = DatabaseManager(legacy_db_path)
+        assert db.get_schema_version() == SCHEMA_VERSION
+        db.close_connection()
+    finally:
+        DatabaseManager.reset_instance()
+
+    connection = sqlite3.connect(legacy_db_path)
+    try:
+        assert get_schema_version(connection) == SCHEMA_VERSION
+        assert row_counts(connection) == before
+        assert connection.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert connection.execute("PRAGMA foreign_key_check").fetchall() == []
+        # Expenses keep their category, amount (now in paise) and date
+        assert connection.execute(
+            "SELECT id, exp_type, exp_amount, exp_date FROM expense_ledger ORDER BY id"
+        ).fetchall() == expenses
+        # The rollup matches the ledger it was built from
+        assert connection.execute("SELECT SUM(total_minor), SUM(count) FROM expense_monthly_rollup").fetchone() == \
+            connection.execute("SELECT SUM(amount_minor), COUNT(*) FROM expenses").fetchone()
+        connection.execute("INSERT INTO notes_fts(notes_fts, rank) VALUES ('integrity-check', 1)")
+        assert connection.execute("SELECT COUNT(*) FROM notes WHERE preview IS NULL").fetchone()[0] == 0
+    finally:
+        connection.close()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    connection = sqlite3.connect(tmp_path / "fresh.db", isolation_level=None)
+    try:
+        assert migrate(connection) == list(range(1, SCHEMA_VERSION + 1))
+        assert migrate(connection) == []
+        assert get_schema_version(connection) == SCHEMA_VERSION
+    finally:
+        connection.close()
+
+
+def test_failed_migration_leaves_previous_version(tmp_path, monkeypatch):
+    import database.migrations as migrations
+
+    def broken(connection):
+        connection.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [(SCHEMA_VERSION + 1, "broken", broken)])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", SCHEMA_VERSION + 1)
+    connection = sqlite3.connect(tmp_path / "fresh.db", isolation_level=None)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            migrations.migrate(connection)
+        assert get_schema_version(connection) == SCHEMA_VERSION
+        assert connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    finally:
+        connection.close()
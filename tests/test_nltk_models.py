@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import nltk
+import pytest
+from nltk.chunk.named_entity import Maxent_NE_Chunker
+from nltk.tag.perceptron import PerceptronTagger
+
+from utils import nltk_model_cache
+from utils.nltk_model_cache import (
+    CHUNKER_FILES, CHUNKER_PATH, TAGGER_FILES, TAGGER_PATH, KeyIndex, MappedNEChunker, cache_path, is_fresh,
+    load_ne_chunker, load_perceptron_tagger,
+)
+from utils.nltk_resources import BUNDLED_DATA, register_bundled_data
+
+SENTENCES = [
+    "Barack Obama met Angela Merkel in Berlin on Tuesday.",
+    "Ellie's mother had to travel from New York to London for work.",
+    "The quick brown fox jumps over the lazy dog near Mount Everest.",
+    "Google and Microsoft opened offices in Seattle, Washington.",
+    "Zyzzogeton frobnicated the unflappable Quuxington Corp yesterday.",
+]
+
+
+@pytest.fixture(scope="module")
+def nltk_copy(tmp_path_factory):
+    """The bundled tagger and chunker copied to a temporary nltk_data searched first.
+
+    Their binary copies are written there, not into the repository.
+    """
+    register_bundled_data()
+    root = tmp_path_factory.mktemp("nltk_data")
+    for relative in (CHUNKER_PATH.format(fmt="binary"), TAGGER_PATH):
+        shutil.copytree(os.path.join(BUNDLED_DATA, relative), root / relative, ignore=shutil.ignore_patterns("binary*"))
+    nltk.data.path.insert(0, str(root))
+    yield root
+    nltk.data.path.remove(str(root))
+
+
+@pytest.fixture(scope="module")
+def tagged(nltk_copy):
+    return [PerceptronTagger().tag(nltk.word_tokenize(sentence)) for sentence in SENTENCES]
+
+
+def test_key_index_finds_every_key(tmp_path):
+    texts = ["alpha", "beta", "", "ünïcode", "('w', 'x', 'NE')"]
+    order = KeyIndex.write(str(tmp_path), texts)
+    index = KeyIndex(str(tmp_path))
+    assert len(index) == len(texts)
+    for row, position in enumerate(order):
+        assert index.find(texts[position]) == row
+    assert index.find("gamma") == -1
+
+
+def test_mapped_tagger_matches_nltk(nltk_copy):
+    tagger = load_perceptron_tagger()
+    assert isinstance(tagger.model.weights, nltk_model_cache.MappedPerceptronWeights)
+    reference = PerceptronTagger()
+    for sentence in SENTENCES:
+        tokens = nltk.word_tokenize(sentence)
+        assert tagger.tag(tokens) == reference.tag(tokens)
+
+
+def test_mapped_chunker_matches_nltk(nltk_copy, tagged):
+    chunker = load_ne_chunker()
+    assert isinstance(chunker, MappedNEChunker)
+    reference = Maxent_NE_Chunker("binary")
+    for sentence in tagged:
+        assert chunker.parse(sentence) == reference.parse(sentence)
+
+
+def test_binary_copy_is_rebuilt_when_the_source_changes(nltk_copy):
+    loc = str(nltk_copy / TAGGER_PATH)
+    load_perceptron_tagger()
+    assert is_fresh(cache_path(loc), loc, TAGGER_FILES.values())
+    with open(os.path.join(loc, TAGGER_FILES["classes"]), "a", encoding="utf-8") as f:
+        f.write(" ")
+    assert not is_fresh(cache_path(loc), loc, TAGGER_FILES.values())
+    load_perceptron_tagger()
+    assert is_fresh(cache_path(loc), loc, TAGGER_FILES.values())
+
+    tab_dir = str(nltk_copy / CHUNKER_PATH.format(fmt="binary"))
+    load_ne_chunker()
+    assert is_fresh(cache_path(tab_dir), tab_dir, CHUNKER_FILES)
+
+
+def test_service_types_entities(nltk_copy):
+    from utils.nlp_service import NLPService
+
+    nlp = NLPService()
+    labels = {}
+    for sentence in SENTENCES:
+        for chunk in nlp.ne_chunk(nlp.pos_tag(nlp.word_tokenize(sentence))):
+            if isinstance(chunk, nltk.Tree):
+                labels[" ".join(word for word, _ in chunk.leaves())] = chunk.label()
+    assert labels["Berlin"] == "GPE"
+    assert labels["New York"] == "GPE"
+    assert labels["Ellie"] == "PERSON"
+    assert labels["Mount Everest"] == "LOCATION"
+    assert nlp.entity_type(["Quuxington", "Corp"]) == "ORGANIZATION"
+    assert nlp.entity_type(["Zyzzogeton"]) == "PERSON"
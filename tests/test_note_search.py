@@ -0,0 +1,78 @@
+import sqlite3
+
+from database.database_manager import fts_match_query
+
+
+def ranked_titles(db, text):
+    return [row['title'] for row in db.search_notes_ranked(1, text)]
+
+
+def test_match_query_quotes_terms():
+    assert fts_match_query('kiwi "green apple" OR') == '"kiwi"* "green apple" "OR"*'
+    assert fts_match_query('  ') is None
+    assert fts_match_query('"') is None
+
+
+def test_title_hits_outrank_body_hits(db):
+    db.add_note(1, "Shopping", "buy kiwi and bread")
+    db.add_note(1, "Kiwi", "a note about birds")
+    db.add_note(1, "Misc", "nothing relevant here")
+    assert ranked_titles(db, "kiwi") == ["Kiwi", "Shopping"]
+
+
+def test_more_frequent_term_ranks_higher(db):
+    db.add_note(1, "One", "tea once, then coffee coffee coffee")
+    db.add_note(1, "Two", "tea tea tea tea and a biscuit")
+    rows = db.search_notes_ranked(1, "tea")
+    assert [row['title'] for row in rows] == ["Two", "One"]
+    assert rows[0]['rank'] <= rows[1]['rank']
+
+
+def test_prefix_phrase_and_user_scoping(db):
+    db.register_user("other", "secret")
+    other = db.verify_user("other", "secret")
+    db.add_note(1, "Garden", "plant the tomatoes in spring")
+    db.add_note(other, "Garden too", "tomatoes everywhere")
+    assert ranked_titles(db, "tomat") == ["Garden"]
+    assert ranked_titles(db, '"the tomatoes"') == ["Garden"]
+    assert ranked_titles(db, '"tomatoes the"') == []
+
+
+def test_snippet_highlights_the_match(db):
+    db.add_note(1, "Essay", "the quick brown fox jumps over the lazy dog")
+    snippet = db.search_notes_ranked(1, "fox", highlight=("<", ">"))[0]['snippet']
+    assert "<fox>" in snippet
+
+
+def test_index_follows_updates_and_deletes(db):
+    note_id = db.add_note(1, "Draft", "apples")
+    db.update_note(note_id, "Draft", "pears")
+    assert ranked_titles(db, "apples") == []
+    assert ranked_titles(db, "pears") == ["Draft"]
+    db.delete_note(note_id)
+    assert ranked_titles(db, "pears") == []
+
+
+def test_index_follows_other_clients(db, tmp_path):
+    note_id = db.add_note(1, "Groceries", "apples")
+    db.close_connection()
+    # A client without the app's SQL functions; the triggers keep notes_fts in step
+    connection = sqlite3.connect(tmp_path / "test.db")
+    connection.execute("UPDATE notes SET content = 'kiwi', preview = 'kiwi' WHERE id = ?", (note_id,))
+    connection.execute("INSERT INTO notes (user_id, title, content, preview) VALUES (1, 'Raw', 'mango', 'mango')")
+    connection.commit()
+    connection.execute("INSERT INTO notes_fts(notes_fts, rank) VALUES ('integrity-check', 1)")
+    connection.close()
+    assert ranked_titles(db, "kiwi") == ["Groceries"]
+    assert ranked_titles(db, "apples") == []
+    assert ranked_titles(db, "mango") == ["Raw"]
+
+
+def test_compressed_notes_are_found_by_title_and_preview(db):
+    db.enable_note_compression(min_bytes=100)
+    note_id = db.add_note(1, "Essay", "zebra intro " + "lorem ipsum " * 50 + "hidden_tail_word")
+    assert db.execute_query("SELECT content_codec FROM notes WHERE id = ?", (note_id,), fetch_one=True)[0] != 0
+    assert db.get_note(note_id)['content'].endswith("hidden_tail_word")
+    assert ranked_titles(db, "essay") == ["Essay"]
+    assert ranked_titles(db, "zebra") == ["Essay"]
+    assert ranked_titles(db, "hidden_tail_word") == []  # Past the preview
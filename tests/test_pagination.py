@@ -0,0 +1,62 @@
+import pytest
+
+
+def pages(fetch_page, next_cursor, limit):
+    """Every page of a keyset-paged read, following the cursor of each page's last row."""
+    result, cursor = [], {}
+    while True:
+        rows = fetch_page(limit=limit, **cursor)
+        if not rows:
+            return result
+        result.append([row['id'] for row in rows])
+        cursor = next_cursor(rows[-1])
+
+
+@pytest.mark.parametrize("limit", [1, 3, 10, 50])
+def test_tasks_pages_cover_every_row_once(db, limit):
+    ids = db.add_tasks_bulk(1, [f"task {i}" for i in range(23)])
+    db.register_user("other", "secret")
+    assert db.add_tasks_bulk(db.verify_user("other", "secret"), ["someone else's"])
+    result = pages(lambda **kw: db.get_tasks_page(1, **kw), lambda row: {'after_id': row['id']}, limit)
+    assert [task_id for page in result for task_id in page] == ids
+    assert all(len(page) == limit for page in result[:-1])
+
+
+def test_notes_pages_break_created_at_ties_by_id(db):
+    ids = db.add_notes_bulk(1, [(f"note {i}", f"body {i}", None) for i in range(12)])
+    # Bulk-inserted notes share created_at, so only the id orders them
+    db.execute_query("UPDATE notes SET created_at = '2025-01-01 00:00:00'", commit=True)
+    result = pages(lambda **kw: db.get_notes_page(1, **kw),
+                   lambda row: {'after_created_at': row['created_at'], 'after_id': row['id']}, 5)
+    assert [len(page) for page in result] == [5, 5, 2]
+    assert [note_id for page in result for note_id in page] == sorted(ids, reverse=True)
+
+
+def test_expenses_pages_run_newest_first(db):
+    dates = ["2025-03-12", "2024-09-09", "2025-03-14", "2025-03-12", "2025-01-01"]
+    ids = db.add_expenses_bulk(1, [(f"e{i}", "Food", 1.0, date) for i, date in enumerate(dates)])
+    result = pages(lambda **kw: db.get_expenses_page(1, **kw),
+                   lambda row: {'after_date': row['exp_date'], 'after_id': row['id']}, 2)
+    expected = [expense_id for _, expense_id in sorted(zip(dates, ids), reverse=True)]
+    assert [expense_id for page in result for expense_id in page] == expected
+
+
+def test_iterators_stream_everything(db):
+    db.add_tasks_bulk(1, [f"task {i}" for i in range(7)])
+    db.add_notes_bulk(1, [(f"note {i}", "body", None) for i in range(7)])
+    db.add_flashcards_bulk(1, "Deck", [(f"q{i}", f"a{i}") for i in range(7)])
+    assert len(list(db.iter_tasks(1, batch_size=3))) == 7
+    assert len(list(db.iter_notes(1, batch_size=3))) == 7
+    assert len(list(db.iter_flashcards(1, batch_size=7))) == 7
+
+
+def test_page_queries_use_an_index(db):
+    plans = [
+        db.execute_query("EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                         (1, 0, 10), fetch_all=True),
+        db.execute_query("EXPLAIN QUERY PLAN SELECT id FROM expenses WHERE user_id = ? AND (day, id) < (?, ?)"
+                         " ORDER BY day DESC, id DESC LIMIT ?", (1, 800000, 10, 10), fetch_all=True),
+    ]
+    for plan in plans:
+        details = " ".join(row[-1] for row in plan)
+        assert "USING" in details and "TEMP B-TREE" not in details, details
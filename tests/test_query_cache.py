@@ -0,0 +1,62 @@
+from database.query_cache import QueryCache
+
+
+def test_write_to_a_table_makes_its_entries_stale():
+    cache = QueryCache()
+    cache.put("tasks-1", cache.generations(("tasks",)), [("a",)])
+    cache.put("notes-1", cache.generations(("notes",)), [("n",)])
+    assert cache.get("tasks-1", ("tasks",)) == [("a",)]
+
+    cache.invalidate("tasks")
+    assert cache.get("tasks-1", ("tasks",)) is None
+    assert cache.get("notes-1", ("notes",)) == [("n",)]  # Other tables are untouched
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 1}
+
+
+def test_entry_over_several_tables_goes_stale_with_any_of_them():
+    cache = QueryCache()
+    tables = ("expenses", "expense_categories")
+    cache.put("ledger", cache.generations(tables), [1])
+    cache.invalidate("expense_categories")
+    assert cache.get("ledger", tables, "missing") == "missing"
+
+
+def test_rows_loaded_before_an_invalidation_are_not_served():
+    cache = QueryCache()
+    generations = cache.generations(("tasks",))  # Read starts
+    cache.invalidate("tasks")  # A write commits meanwhile
+    cache.put("tasks-1", generations, [("old",)])
+    assert cache.get("tasks-1", ("tasks",)) is None
+
+
+def test_callers_get_copies():
+    cache = QueryCache()
+    cache.put("k", cache.generations(("t",)), [{'id': 1}])
+    cache.get("k", ("t",))[0]['id'] = 2
+    assert cache.get("k", ("t",)) == [{'id': 1}]
+
+
+def test_lru_bound():
+    cache = QueryCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, cache.generations(("t",)), [key])
+    assert cache.get("a", ("t",)) is None
+    assert cache.get("c", ("t",)) == ["c"]
+
+
+def test_manager_reads_through_and_invalidates_on_write(db):
+    task_id = db.add_task(1, "write tests")
+    assert [task['task'] for task in db.get_tasks(1)] == ["write tests"]
+    hits = db.cache_stats()['hits']
+    assert [task['task'] for task in db.get_tasks(1)] == ["write tests"]
+    assert db.cache_stats()['hits'] == hits + 1
+
+    db.update_task_status(task_id, "Completed")
+    assert [task['status'] for task in db.get_tasks(1)] == ["Completed"]
+
+
+def test_write_invalidates_trigger_kept_tables(db):
+    db.add_expense(1, "lunch", "Food", 12.5, "2025-03-12")
+    assert [tuple(row) for row in db.get_monthly_spending(1)] == [("2025-03", 12.5, 1)]
+    db.add_expense(1, "dinner", "Food", 7.5, "2025-03-13")  # Changes the rollup through a trigger
+    assert [tuple(row) for row in db.get_monthly_spending(1)] == [("2025-03", 20.0, 2)]
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from utils.sentence_index import B, K1, SentenceIndex, normalize
+
+
+def bm25(sentence_terms, query_terms, sentence):
+    """Textbook BM25 of one sentence, to check the vectorised index against."""
+    n = len(sentence_terms)
+    average = sum(len(terms) for terms in sentence_terms) / n
+    terms = sentence_terms[sentence]
+    score = 0.0
+    for term in dict.fromkeys(query_terms):
+        tf = terms.count(term)
+        if not tf:
+            continue
+        df = sum(term in other for other in sentence_terms)
+        idf = math.log1p((n - df + 0.5) / (df + 0.5))
+        score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(terms) / average))
+    return score
+
+
+def test_normalize_stems_and_drops_punctuation_and_stopwords():
+    assert normalize(["The", "Cats", "were", "running", ",", "!"], frozenset(["the", "were"])) == ["cat", "run"]
+
+
+def test_whole_words_only():
+    index = SentenceIndex([normalize("You should start early".split()), normalize("Modern art is loud".split())])
+    assert [sentence for sentence, _ in index.search(normalize(["art"]))] == [1]
+
+
+def test_scores_match_reference_bm25():
+    sentences = [
+        "the cat sat on the mat",
+        "the dog chased the cat around the garden",
+        "dogs and cats and more cats",
+        "nothing to see here",
+        "a cat",
+    ]
+    terms = [normalize(sentence.split()) for sentence in sentences]
+    index = SentenceIndex(terms)
+    query = normalize(["cat", "dog"])
+    results = index.search(query, limit=len(sentences))
+    assert {sentence for sentence, _ in results} == {0, 1, 2, 4}
+    for sentence, score in results:
+        assert score == pytest.approx(bm25(terms, query, sentence))
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_rare_terms_weigh_more():
+    terms = [normalize(text.split()) for text in (
+        "note about python", "note about kivy", "note about sqlite", "note about python and kivy",
+    )]
+    index = SentenceIndex(terms)
+    best, _ = index.search(normalize(["note", "sqlite"]), limit=1)[0]
+    assert best == 2
+
+
+def test_ties_keep_note_order_and_limit_applies():
+    index = SentenceIndex([["x"], ["y"], ["x"], ["x"]])
+    assert [sentence for sentence, _ in index.search(["x"], limit=2)] == [0, 2]
+
+
+def test_no_match_and_empty_note():
+    assert SentenceIndex([["a"]]).search(["b"]) == []
+    assert SentenceIndex([]).search(["a"]) == []
+    assert SentenceIndex([[], []]).search(["a"]) == []
+
+
+def test_notai_answers_from_the_best_sentence():
+    from utils.note_analysis import NoteAnalysisCache
+    from utils.notai import EnhancedNotAI
+
+    note = ("Photosynthesis happens in the chloroplasts of plant cells. "
+            "The mitochondria produce energy for the cell. "
+            "Roots absorb water from the soil.")
+    ai = EnhancedNotAI(NoteAnalysisCache())
+    assert ai.find_relevant_sentences("Where do roots get water?", note)[0] == "Roots absorb water from the soil."
+    assert ai.find_relevant_sentences("What do mitochondria produce?", note)[0] == \
+        "The mitochondria produce energy for the cell."
+    assert ai.analysis_cache.stats()['misses'] == 1  # One analysis, reused by the second question
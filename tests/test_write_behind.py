@@ -0,0 +1,99 @@
+import threading
+
+from database.write_behind import WriteBehindQueue
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(batch)
+
+
+def test_writes_to_the_same_key_coalesce():
+    applied = Recorder()
+    queue = WriteBehindQueue(applied, delay=60)
+    for status in ("Completed", "Pending", "Completed"):
+        queue.submit(("tasks", 1, "status"), "UPDATE tasks SET status=? WHERE id=?", (status, 1))
+    queue.submit(("tasks", 2, "status"), "UPDATE tasks SET status=? WHERE id=?", ("Pending", 2))
+    assert queue.pending == 2
+    assert queue.pending_tables() == {"tasks"}
+
+    assert queue.flush() == 2
+    assert [(key, params) for key, _, params in applied.batches[0]] == [
+        (("tasks", 1, "status"), ("Completed", 1)),
+        (("tasks", 2, "status"), ("Pending", 2)),
+    ]
+    assert queue.pending == 0
+    assert queue.pending_tables() == set()
+    queue.close()
+
+
+def test_max_pending_flushes_at_once():
+    applied = Recorder()
+    queue = WriteBehindQueue(applied, delay=60, max_pending=3)
+    for row_id in range(3):
+        queue.submit(("tasks", row_id, "status"), "UPDATE", ())
+    assert len(applied.batches) == 1 and len(applied.batches[0]) == 3
+    queue.close()
+
+
+def test_delay_flushes_on_the_worker():
+    done = threading.Event()
+    queue = WriteBehindQueue(lambda batch: done.set(), delay=0.01)
+    queue.submit(("notes", 1, "color_rgba"), "UPDATE", ())
+    assert done.wait(5)
+    queue.close()
+
+
+def test_committing_batch_still_counts_as_pending():
+    started, release = threading.Event(), threading.Event()
+
+    def slow(batch):
+        started.set()
+        release.wait(5)
+
+    queue = WriteBehindQueue(slow, delay=60)
+    queue.submit(("notes", 1, "color_rgba"), "UPDATE", ())
+    worker = threading.Thread(target=queue.flush)
+    worker.start()
+    assert started.wait(5)
+    assert queue.pending == 1 and queue.pending_tables() == {"notes"}
+    release.set()
+    worker.join()
+    assert queue.pending_tables() == set()
+    queue.close()
+
+
+def test_manager_reads_see_queued_writes(db):
+    db.enable_write_behind(delay=60)
+    task_id = db.add_task(1, "write tests")
+    db.update_task_status(task_id, "Completed")
+    assert db._write_behind.pending_tables() == {"tasks"}
+    assert db.get_tasks(1)[0]['status'] == "Completed"
+    assert db.get_dashboard(1)['completed_tasks'] == 1  # Through the trigger-kept user_counters
+
+
+def test_manager_reads_of_other_tables_leave_the_queue(db):
+    db.enable_write_behind(delay=60)
+    task_id = db.add_task(1, "write tests")
+    db.add_note(1, "Groceries", "apples")
+    db.update_task_status(task_id, "Completed")
+    db.search_notes_ranked(1, "apples")
+    db.get_notes(1)
+    assert db._write_behind.pending_tables() == {"tasks"}
+    db.flush()
+    assert db._write_behind.pending_tables() == set()
+
+
+def test_manager_colour_writes_coalesce_and_publish(db):
+    events = []
+    db.subscribe("notes", events.append)
+    note_id = db.add_note(1, "Groceries", "apples")
+    db.enable_write_behind(delay=60)
+    for color in ((1, 0, 0, 1), (0, 1, 0, 1), (0, 0, 1, 1)):
+        db.update_note_color(note_id, color)
+    db.flush()
+    assert [event.op for event in events] == ["insert", "update"]
+    assert db.execute_query("SELECT color_rgba FROM notes WHERE id = ?", (note_id,), fetch_one=True)[0] == 0x0000FFFF
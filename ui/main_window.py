@@ -9,6 +9,7 @@ from kivymd.uix.screen import MDScreen
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.popup import Popup
+from kivy.app import App
 from database.database_manager import DatabaseManager  # Import your DatabaseManager
 from kivy.metrics import dp
 
@@ -94,9 +95,14 @@ class MainWindow(MDScreen):
         self.add_widget(self.layout)
         self.add_widget(self.nav_drawer)
 
-        # Load pending tasks count
+    def on_enter(self):
+        """Refresh the pending tasks count whenever the home screen is shown."""
         self.update_pending_tasks_count()
 
+    def current_user_id(self):
+        """The logged-in user's ID, or None before login."""
+        return getattr(App.get_running_app(), 'current_user_id', None)
+
     def toggle_menu(self):
         """Opens or closes the navigation drawer."""
         self.nav_drawer.set_state("toggle")
@@ -108,9 +114,12 @@ class MainWindow(MDScreen):
 
     def update_pending_tasks_count(self):
         """Updates the count of pending tasks displayed in the main window."""
-        user_id = 1  # Replace with actual user ID
-        pending_tasks = self.db_manager.get_tasks(user_id)
-        pending_count = sum(1 for task in pending_tasks if task['status'] == 'Pending')
+        user_id = self.current_user_id()
+        if user_id is None:
+            return
+        # One counter-row lookup instead of loading every task
+        with self.db_manager.action("MainWindow.update_pending_tasks_count"):
+            pending_count = self.db_manager.get_dashboard(user_id)['pending_tasks']
         self.pending_tasks_label.text = f"Pending Tasks: {pending_count}"
 
         # Update the UI to reflect no pending tasks
@@ -119,7 +128,7 @@ class MainWindow(MDScreen):
 
     def show_pending_tasks(self, instance):
         """Show a popup with the list of pending tasks."""
-        user_id = 1  # Replace with actual user ID
+        user_id = self.current_user_id()
         pending_tasks = self.db_manager.get_tasks(user_id)
         pending_tasks_list = [task['task'] for task in pending_tasks if task['status'] == 'Pending']
 
@@ -0,0 +1,126 @@
+import threading
+
+import nltk
+
+from nltk.tree import Tree
+
+from utils.nltk_resources import available_resources, register_bundled_data
+
+# Last words that make an untyped entity an organisation
+ORGANIZATION_WORDS = frozenset((
+    "inc", "inc.", "corp", "corp.", "corporation", "co", "co.", "company", "ltd", "ltd.", "llc", "plc", "ag", "gmbh",
+    "group", "bank", "university", "college", "institute", "school", "association", "foundation",
+    "agency", "ministry", "department", "council", "committee", "party", "club",
+))
+
+
+class NLPService:
+    """Process-wide NLTK models, shared by EnhancedNotAI and EnhancedQAGenerator.
+
+    Nothing is loaded until first use. The tokenizer, tagger, chunker,
+    stopwords and WordNet are each loaded once, the first time a method
+    needs them, and reused for the life of the process. nltk.pos_tag() and
+    nltk.ne_chunk() would rebuild their model on every call. The tagger and
+    chunker weights are memory-mapped from binary copies (utils.nltk_model_cache).
+
+    The bundled NE chunker is NLTK's binary model, which finds entities but
+    not their type; ne_chunk() types them from WordNet (see entity_type).
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    register_bundled_data()
+                    cls._instance = super(NLPService, cls).__new__(cls)
+                    cls._instance._load_lock = threading.RLock()
+                    cls._instance._tagger = None
+                    cls._instance._chunker = None
+                    cls._instance._stopwords = None
+        return cls._instance
+
+    def ensure(self, *names):
+        """Raise LookupError unless the named resources are installed; never downloads."""
+        missing = [name for name in names if name not in available_resources()]
+        if missing:
+            raise LookupError(f"NLTK resources not installed: {', '.join(missing)}")
+
+    def sent_tokenize(self, text):
+        self.ensure("punkt_tab")
+        return nltk.sent_tokenize(text)
+
+    def word_tokenize(self, text):
+        self.ensure("punkt_tab")
+        return nltk.word_tokenize(text)
+
+    def pos_tag(self, tokens):
+        """Penn Treebank tags of a token list, like nltk.pos_tag."""
+        if self._tagger is None:
+            with self._load_lock:
+                if self._tagger is None:
+                    self.ensure("averaged_perceptron_tagger_eng")
+                    from utils.nltk_model_cache import load_perceptron_tagger
+                    self._tagger = load_perceptron_tagger()
+        return self._tagger.tag(tokens)
+
+    def ne_chunk(self, tagged_tokens):
+        """Named-entity tree of POS-tagged tokens, like nltk.ne_chunk, with entities typed by entity_type()."""
+        if self._chunker is None:
+            with self._load_lock:
+                if self._chunker is None:
+                    self.ensure("maxent_ne_chunker_tab", "words")
+                    from utils.nltk_model_cache import load_ne_chunker
+                    self._chunker = load_ne_chunker()
+        tree = self._chunker.parse(tagged_tokens)
+        for i, chunk in enumerate(tree):
+            if isinstance(chunk, Tree) and chunk.label() == "NE":
+                tree[i] = Tree(self.entity_type([word for word, tag in chunk.leaves()]), list(chunk))
+        return tree
+
+    def entity_type(self, words):
+        """PERSON, ORGANIZATION, GPE or LOCATION for an entity's words.
+
+        Looks the entity, then its last word, up in WordNet (nouns only): cities
+        and countries are GPE, other places LOCATION. Names WordNet doesn't
+        know are ORGANIZATION if they end like one ("... Inc", "... University"),
+        else PERSON.
+        """
+        wordnet = self.wordnet
+        if wordnet is not None:
+            for lemma in ("_".join(words), words[-1]):
+                for synset in wordnet.synsets(lemma, pos=wordnet.NOUN)[:3]:
+                    kinds = {s.name() for s in synset.closure(lambda s: s.hypernyms() + s.instance_hypernyms())}
+                    if "person.n.01" in kinds:
+                        return "PERSON"
+                    if "organization.n.01" in kinds:
+                        return "ORGANIZATION"
+                    if {"city.n.01", "administrative_district.n.01"} & kinds:
+                        return "GPE"
+                    if "location.n.01" in kinds:
+                        return "LOCATION"
+                if len(words) == 1:
+                    break
+        return "ORGANIZATION" if words[-1].lower() in ORGANIZATION_WORDS else "PERSON"
+
+    @property
+    def stopwords(self):
+        """English stopwords as a frozenset."""
+        if self._stopwords is None:
+            with self._load_lock:
+                if self._stopwords is None:
+                    self.ensure("stopwords")
+                    from nltk.corpus import stopwords
+                    self._stopwords = frozenset(stopwords.words("english"))
+        return self._stopwords
+
+    @property
+    def wordnet(self):
+        """The WordNet corpus reader (it loads its index on first lookup), or None if not installed."""
+        try:
+            self.ensure("wordnet")
+        except LookupError:
+            return None
+        from nltk.corpus import wordnet
+        return wordnet
@@ -0,0 +1,315 @@
+"""Memory-mapped binary copies of the NLTK NE chunker and POS tagger models.
+
+NLTK 3.9 ships the maxent NE chunker as text tables (weights.txt,
+mapping.tab, ...) and the perceptron tagger weights as JSON, and every
+process parses them in full. The app bundles the binary (untyped) chunker
+model, so that is the one converted by default. The converters here write each model once as
+NumPy arrays in a binary/ directory next to the original files; the loaders
+memory-map those arrays and look features up only when a sentence needs
+them (64-bit key hash + searchsorted), so a model loads in milliseconds and
+its pages are shared between processes.
+
+    python -m utils.nltk_model_cache   # convert the models found on NLTK's path
+"""
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+from collections.abc import Mapping
+
+import nltk
+import numpy as np
+from nltk.chunk.named_entity import Maxent_NE_Chunker, NEChunkParserTagger
+from nltk.classify.maxent import BinaryMaxentFeatureEncoding, MaxentClassifier, load_maxent_params
+from nltk.tag.perceptron import PerceptronTagger
+
+CACHE_DIR = "binary"
+FORMAT_VERSION = 1
+META_NAME = "meta.json"
+MEMO_SIZE = 1 << 16  # Looked-up keys remembered per model; cleared when full
+
+CHUNKER_PATH = "chunkers/maxent_ne_chunker_tab/english_ace_{fmt}/"
+CHUNKER_FILES = ("weights.txt", "mapping.tab", "labels.txt", "alwayson.tab")
+TAGGER_PATH = "taggers/averaged_perceptron_tagger_eng/"
+TAGGER_FILES = {part: f"averaged_perceptron_tagger_eng.{part}.json" for part in ("weights", "tagdict", "classes")}
+
+
+def key_hash(text):
+    """Stable 64-bit hash of a key's text (Python's hash() changes per process)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class KeyIndex:
+    """Memory-mapped sorted key hashes plus the key texts, mapping a key text to its row."""
+
+    def __init__(self, directory):
+        self.hashes = np.load(os.path.join(directory, "hashes.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "key_offsets.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(directory, "keys.npy"), mmap_mode="r")
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def find(self, text):
+        """Row of a key text, or -1 if the model has no such key."""
+        row = self._memo.get(text)
+        if row is None:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            row = self._memo[text] = self._search(text)
+        return row
+
+    def _search(self, text):
+        target = key_hash(text)
+        encoded = text.encode("utf-8")
+        row = int(np.searchsorted(self.hashes, np.uint64(target)))
+        while row < len(self.hashes) and int(self.hashes[row]) == target:  # Compare texts: hashes can collide
+            if self.key_bytes(row) == encoded:
+                return row
+            row += 1
+        return -1
+
+    def key_bytes(self, row):
+        return self.keys[self.offsets[row]:self.offsets[row + 1]].tobytes()
+
+    @staticmethod
+    def write(directory, texts):
+        """Write the index of `texts`; returns their order in it (positions into `texts`)."""
+        hashes = np.fromiter((key_hash(text) for text in texts), dtype=np.uint64, count=len(texts))
+        order = np.argsort(hashes, kind="stable")
+        encoded = [texts[i].encode("utf-8") for i in order]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(key) for key in encoded], out=offsets[1:])
+        np.save(os.path.join(directory, "hashes.npy"), hashes[order])
+        np.save(os.path.join(directory, "key_offsets.npy"), offsets)
+        np.save(os.path.join(directory, "keys.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        return order
+
+
+# 🔹 **Maxent NE chunker**
+class MappedFeatureMapping(Mapping):
+    """(fname, fval, label) -> joint-feature id, read from the memory-mapped index on demand."""
+
+    def __init__(self, directory):
+        self._index = KeyIndex(directory)
+        self._ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+
+    def __getitem__(self, key):
+        row = self._index.find(repr(key))
+        if row < 0:
+            raise KeyError(key)
+        return int(self._ids[row])
+
+    def __contains__(self, key):
+        return self._index.find(repr(key)) >= 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        for row in range(len(self._ids)):
+            yield ast.literal_eval(self._index.key_bytes(row).decode("utf-8"))
+
+
+class MappedMaxentEncoding(BinaryMaxentFeatureEncoding):
+    """BinaryMaxentFeatureEncoding over a MappedFeatureMapping.
+
+    Sets up what the parent's __init__ would for NLTK's NE chunker (always-on
+    features, no unseen features) without its check over every mapping value,
+    which would read the whole index.
+    """
+
+    def __init__(self, labels, mapping):
+        self._labels = list(labels)
+        self._mapping = mapping
+        self._length = len(mapping)
+        self._alwayson = {label: i + self._length for i, label in enumerate(self._labels)}
+        self._length += len(self._alwayson)
+        self._unseen = None
+
+
+class MappedNEChunker(Maxent_NE_Chunker):
+    """Drop-in for nltk's Maxent_NE_Chunker reading a converted model from `directory`."""
+
+    def __init__(self, directory, fmt="binary"):
+        self._fmt = fmt
+        self._tab_dir = directory
+        self.load_params()
+
+    def load_params(self):
+        meta = read_meta(self._tab_dir)
+        encoding = MappedMaxentEncoding(meta["labels"], MappedFeatureMapping(self._tab_dir))
+        weights = np.load(os.path.join(self._tab_dir, "weights.npy"), mmap_mode="r")
+        self._tagger = NEChunkParserTagger(classifier=MaxentClassifier(encoding, weights))
+
+
+def convert_chunker(tab_dir):
+    """Write the binary copy of a maxent_ne_chunker_tab model directory; returns its path."""
+    weights, mapping, labels, _ = load_maxent_params(tab_dir)
+    keys = list(mapping)
+
+    def write(directory):
+        order = KeyIndex.write(directory, [repr(key) for key in keys])
+        np.save(os.path.join(directory, "ids.npy"), np.array([mapping[keys[i]] for i in order], dtype=np.int32))
+        np.save(os.path.join(directory, "weights.npy"), np.asarray(weights, dtype=np.float64))
+        return {"labels": list(labels)}
+
+    return write_cache(tab_dir, CHUNKER_FILES, write)
+
+
+def load_ne_chunker(fmt="binary"):
+    """The NE chunker from its binary copy, converting it first if needed.
+
+    Falls back to nltk's own text loader when the copy can't be written.
+    """
+    tab_dir = nltk.data.find(CHUNKER_PATH.format(fmt=fmt))
+    directory = cache_path(tab_dir)
+    if not is_fresh(directory, tab_dir, CHUNKER_FILES):
+        try:
+            convert_chunker(tab_dir)
+        except OSError as e:
+            print(f"Cannot write binary NE chunker model ({e}); loading the text tables")
+            return Maxent_NE_Chunker(fmt)
+    return MappedNEChunker(directory, fmt)
+
+
+# 🔹 **Averaged perceptron tagger**
+class MappedPerceptronWeights(Mapping):
+    """feature -> {tag: weight} of an averaged perceptron, decoded from memory-mapped arrays on demand."""
+
+    def __init__(self, directory, labels):
+        self._index = KeyIndex(directory)
+        self._starts = np.load(os.path.join(directory, "row_starts.npy"), mmap_mode="r")
+        self._label_ids = np.load(os.path.join(directory, "label_ids.npy"), mmap_mode="r")
+        self._weights = np.load(os.path.join(directory, "weights.npy"), mmap_mode="r")
+        self._labels = labels
+
+    def __getitem__(self, feature):
+        row = self._index.find(feature)
+        if row < 0:
+            raise KeyError(feature)
+        start, end = int(self._starts[row]), int(self._starts[row + 1])
+        labels = [self._labels[i] for i in self._label_ids[start:end].tolist()]
+        return dict(zip(labels, self._weights[start:end].tolist()))
+
+    def __contains__(self, feature):
+        return self._index.find(feature) >= 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        for row in range(len(self._index)):
+            yield self._index.key_bytes(row).decode("utf-8")
+
+
+def convert_tagger(loc):
+    """Write the binary copy of an averaged_perceptron_tagger_eng model directory; returns its path."""
+    with open(os.path.join(loc, TAGGER_FILES["weights"]), encoding="utf-8") as f:
+        weights = json.load(f)
+    features = list(weights)
+    labels = sorted({label for label_weights in weights.values() for label in label_weights})
+    label_ids = {label: i for i, label in enumerate(labels)}
+
+    def write(directory):
+        order = KeyIndex.write(directory, features)
+        rows = [weights[features[i]] for i in order]
+        starts = np.zeros(len(rows) + 1, dtype=np.uint32)
+        np.cumsum([len(row) for row in rows], out=starts[1:])
+        np.save(os.path.join(directory, "row_starts.npy"), starts)
+        np.save(os.path.join(directory, "label_ids.npy"),
+                np.array([label_ids[label] for row in rows for label in row], dtype=np.uint16))
+        np.save(os.path.join(directory, "weights.npy"),
+                np.array([weight for row in rows for weight in row.values()], dtype=np.float64))
+        return {"labels": labels}
+
+    return write_cache(loc, TAGGER_FILES.values(), write)
+
+
+def load_perceptron_tagger():
+    """The English perceptron tagger with memory-mapped weights, converting them first if needed.
+
+    Falls back to nltk's JSON loader when the binary copy can't be written.
+    """
+    loc = nltk.data.find(TAGGER_PATH)
+    directory = cache_path(loc)
+    if not is_fresh(directory, loc, TAGGER_FILES.values()):
+        try:
+            convert_tagger(loc)
+        except OSError as e:
+            print(f"Cannot write binary tagger model ({e}); loading the JSON weights")
+            return PerceptronTagger()
+    tagger = PerceptronTagger(load=False)
+    with open(os.path.join(loc, TAGGER_FILES["tagdict"]), encoding="utf-8") as f:
+        tagger.tagdict = json.load(f)
+    with open(os.path.join(loc, TAGGER_FILES["classes"]), encoding="utf-8") as f:
+        tagger.classes = set(json.load(f))
+    tagger.model.classes = tagger.classes
+    tagger.model.weights = MappedPerceptronWeights(directory, read_meta(directory)["labels"])
+    return tagger
+
+
+# 🔹 **Cache directories**
+def cache_path(model_dir):
+    return os.path.join(model_dir, CACHE_DIR)
+
+
+def source_sizes(model_dir, names):
+    return {name: os.path.getsize(os.path.join(model_dir, name)) for name in names}
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, META_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_fresh(directory, model_dir, names):
+    """Whether the binary copy exists, has the current format and matches the source file sizes."""
+    try:
+        meta = read_meta(directory)
+        return meta["version"] == FORMAT_VERSION and meta["source"] == source_sizes(model_dir, names)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def write_cache(model_dir, names, write):
+    """Run write(tmp_dir) -> meta, then swap tmp_dir in as the model's binary copy."""
+    directory = cache_path(model_dir)
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        meta = write(tmp_dir)
+        meta.update(version=FORMAT_VERSION, source=source_sizes(model_dir, names))
+        with open(os.path.join(tmp_dir, META_NAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return directory
+
+
+def main():
+    from utils.nltk_resources import register_bundled_data
+
+    register_bundled_data()
+    failed = False
+    for name, find_path, convert in (
+        ("NE chunker", CHUNKER_PATH.format(fmt="binary"), convert_chunker),
+        ("POS tagger", TAGGER_PATH, convert_tagger),
+    ):
+        try:
+            print(f"{name}: wrote {convert(nltk.data.find(find_path))}")
+        except (LookupError, OSError) as e:
+            print(f"{name}: cannot convert: {e}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Offline check of the NLTK data the app needs; nothing is ever downloaded.
+
+The app ships its NLTK data in nltk_data/ (sources in nltk_data/README).
+nltk_data/manifest.json records the size and SHA-256 of every bundled
+file; startup only compares sizes (a few stat calls), the hashes are
+checked on request:
+
+    python -m utils.nltk_resources [--deep]
+    python -m utils.nltk_resources --write-manifest   # after updating nltk_data/
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+
+import nltk
+
+BUNDLED_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data")
+MANIFEST_NAME = "manifest.json"
+
+# Files NLTK 3.9 reads for each resource, relative to an nltk_data directory
+REQUIRED_FILES = {
+    "punkt_tab": tuple(
+        f"tokenizers/punkt_tab/english/{name}"
+        for name in ("abbrev_types.txt", "collocations.tab", "ortho_context.tab", "sent_starters.txt")
+    ),
+    "averaged_perceptron_tagger_eng": tuple(
+        f"taggers/averaged_perceptron_tagger_eng/averaged_perceptron_tagger_eng.{part}.json"
+        for part in ("weights", "tagdict", "classes")
+    ),
+    # The untyped (binary) model; NLPService types its entities with WordNet
+    "maxent_ne_chunker_tab": tuple(
+        f"chunkers/maxent_ne_chunker_tab/english_ace_binary/{name}"
+        for name in ("weights.txt", "mapping.tab", "labels.txt", "alwayson.tab")
+    ),
+    "words": ("corpora/words/en-basic",),
+    "stopwords": ("corpora/stopwords/english",),
+    # What the reader opens when created (3.9.1 also reads index.sense then) plus the
+    # noun synsets the app looks up; data.verb/data.adv are not bundled
+    "wordnet": tuple(
+        f"corpora/wordnet/{name}"
+        for name in ("lexnames", "index.sense", "data.noun", "data.adj",
+                     *(f"index.{pos}" for pos in ("noun", "verb", "adj", "adv")),
+                     *(f"{pos}.exc" for pos in ("noun", "verb", "adj", "adv")))
+    ),
+}
+# Where nltk.data.find() looks for each resource outside the bundle (e.g. a developer's ~/nltk_data)
+FIND_PATHS = {
+    "punkt_tab": "tokenizers/punkt_tab/english/",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng/",
+    "maxent_ne_chunker_tab": "chunkers/maxent_ne_chunker_tab/english_ace_binary/",
+    "words": "corpora/words",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+
+
+def register_bundled_data(path=BUNDLED_DATA):
+    """Add the bundled nltk_data to NLTK's search path, on every platform.
+
+    It goes last, so a complete local install (e.g. ~/nltk_data) still wins
+    over a bundle with a damaged resource.
+    """
+    if path not in nltk.data.path:
+        nltk.data.path.append(path)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(root=BUNDLED_DATA):
+    """{relative path: {'size', 'sha256'}} from root/manifest.json; empty if there is none."""
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cannot read NLTK data manifest in {root}: {e}")
+        return {}
+
+
+def write_manifest(root=BUNDLED_DATA):
+    """Record size and SHA-256 of every bundled file a resource needs; returns the manifest path."""
+    files = {}
+    for paths in REQUIRED_FILES.values():
+        for relative in paths:
+            path = os.path.join(root, relative)
+            if os.path.isfile(path):
+                files[relative] = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest_path
+
+
+def check_bundle(root=BUNDLED_DATA, deep=False):
+    """{resource: [problems]} for the bundled data; an empty list means the resource is intact.
+
+    Files must exist and match the manifest's size (and SHA-256 with `deep`).
+    """
+    manifest = load_manifest(root)
+    problems = {}
+    for resource, paths in REQUIRED_FILES.items():
+        problems[resource] = []
+        for relative in paths:
+            path = os.path.join(root, relative)
+            expected = manifest.get(relative)
+            if not os.path.isfile(path):
+                problems[resource].append(f"{relative} is missing")
+            elif expected is None:
+                problems[resource].append(f"{relative} is not in the manifest")
+            elif os.path.getsize(path) != expected["size"]:
+                problems[resource].append(f"{relative} is {os.path.getsize(path)} bytes, expected {expected['size']}")
+            elif deep and file_sha256(path) != expected["sha256"]:
+                problems[resource].append(f"{relative} does not match its SHA-256")
+    return problems
+
+
+@lru_cache(maxsize=1)
+def available_resources():
+    """Resources usable offline: intact in the bundle, or installed where NLTK looks locally."""
+    available = set()
+    other_paths = [path for path in nltk.data.path if os.path.abspath(path) != BUNDLED_DATA]
+    for resource, problems in check_bundle().items():
+        if not problems:
+            available.add(resource)
+            continue
+        try:
+            nltk.data.find(FIND_PATHS[resource], paths=other_paths)  # Local directories only; no network
+            available.add(resource)
+        except LookupError:
+            pass
+    return frozenset(available)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.nltk_resources", description=__doc__.splitlines()[0])
+    parser.add_argument("--deep", action="store_true", help="compare SHA-256 hashes, not just sizes")
+    parser.add_argument("--write-manifest", action="store_true", help="record the current bundle in the manifest")
+    args = parser.parse_args(argv)
+
+    if args.write_manifest:
+        print(f"Wrote {write_manifest()}")
+    failed = False
+    for resource, problems in check_bundle(deep=args.deep).items():
+        print(f"{resource}: {'ok' if not problems else 'BROKEN'}")
+        for problem in problems:
+            print(f"    {problem}")
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
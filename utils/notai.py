@@ -1,29 +1,28 @@
-import nltk
-from nltk import pos_tag, word_tokenize, ne_chunk, sent_tokenize
 from nltk.tree import Tree
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize
+from utils.nlp_service import NLPService
+from utils.nltk_resources import available_resources
+from utils.note_analysis import NoteAnalysis, NoteAnalysisCache, analysis_key
+from utils.sentence_index import SentenceIndex, normalize
 import re
 import string
 import random
 from collections import Counter
 
 
+# Content-word tags counted as keywords (nouns, verbs, adjectives, adverbs)
+KEYWORD_TAGS = frozenset(['NN', 'NNS', 'NNP', 'NNPS', 'VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ', 'JJ', 'JJR', 'JJS',
+                          'RB', 'RBR', 'RBS'])
+ENTITY_TYPES = ('PERSON', 'GPE', 'LOCATION', 'ORGANIZATION', 'DATE', 'TIME', 'MONEY', 'PERCENT')
+
+
 class EnhancedNotAI:
     """An enhanced AI for answering questions based on note content with deeper analysis capabilities."""
 
-    def __init__(self):
-        # Download necessary NLTK resources
-        try:
-            nltk.download('punkt', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-            nltk.download('maxent_ne_chunker', quiet=True)
-            nltk.download('words', quiet=True)
-            nltk.download('stopwords', quiet=True)
-        except Exception as e:
-            print(f"Error downloading NLTK resources: {e}")
-
-        self.stopwords = set(stopwords.words('english'))
+    def __init__(self, analysis_cache=None):
+        # Shared NLTK models; loaded on first use, not here
+        self.nlp = NLPService()
+        # Note analyses by content and installed resources, so follow-up questions only parse the question
+        self.analysis_cache = analysis_cache if analysis_cache is not None else NoteAnalysisCache()
 
         # Add question words to track question types
         self.question_words = {
@@ -44,82 +43,102 @@ class EnhancedNotAI:
             'does': 'action'
         }
 
-    def extract_entities(self, text):
-        """Extract named entities from text."""
-        entities = {'PERSON': [], 'GPE': [], 'LOCATION': [], 'ORGANIZATION': [], 'DATE': [], 'TIME': [], 'MONEY': [],
-                    'PERCENT': []}
+    @property
+    def stopwords(self):
+        return self.nlp.stopwords
 
+    def analyze(self, note_content, note_id=None):
+        """Sentences, tokens, POS tags, entities and keyword counts of a note.
+
+        Cached by content and installed NLTK resources, partial analyses
+        too: a step that failed for lack of a model is redone once it appears.
+        `note_id` (a saved note's id) lets forget_note() drop it later.
+        """
+        key = analysis_key(note_content, available_resources())
+        analysis = self.analysis_cache.get(key)
+        if analysis is not None:
+            return analysis
+
+        sentences = self.nlp.sent_tokenize(note_content)
+        tokens = [self.nlp.word_tokenize(sentence) for sentence in sentences]
         try:
-            sentences = sent_tokenize(text)
-            for sentence in sentences:
-                chunks = ne_chunk(pos_tag(word_tokenize(sentence)))
-
-                for chunk in chunks:
-                    if isinstance(chunk, Tree):
-                        entity_type = chunk.label()
-                        entity_text = " ".join([word for word, tag in chunk.leaves()])
-                        if entity_type in entities:
-                            entities[entity_type].append(entity_text)
+            pos_tags = [self.nlp.pos_tag(sentence_tokens) for sentence_tokens in tokens]
+        except Exception as e:
+            print(f"Error tagging note: {e}")
+            pos_tags = [[] for _ in tokens]
+
+        entities = {entity_type: {} for entity_type in ENTITY_TYPES}  # Dicts as ordered sets
+        try:
+            for tagged in pos_tags:
+                for chunk in self.nlp.ne_chunk(tagged) if tagged else ():
+                    if isinstance(chunk, Tree) and chunk.label() in entities:
+                        entities[chunk.label()][" ".join([word for word, tag in chunk.leaves()])] = None
         except Exception as e:
             print(f"Error extracting entities: {e}")
 
-        # Filter out duplicates
-        for entity_type, entity_list in entities.items():
-            entities[entity_type] = list(set(entity_list))
+        try:
+            keyword_counts = self.keyword_counts(note_content)
+        except Exception as e:
+            print(f"Error extracting keywords: {e}")
+            keyword_counts = Counter()
 
-        return entities
+        analysis = NoteAnalysis(sentences, tokens, pos_tags,
+                                {entity_type: list(found) for entity_type, found in entities.items()}, keyword_counts)
+        self.analysis_cache.put(key, analysis, note_id)
+        return analysis
 
-    def extract_keywords(self, text):
-        """Extract important keywords from text."""
+    def extract_entities(self, text, analysis=None):
+        """Extract named entities from text; `analysis` is its analyze() result, if already at hand."""
         try:
-            # Tokenize and get POS tags
-            tokens = word_tokenize(text.lower())
-            tagged = pos_tag(tokens)
-
-            # Get content words (nouns, verbs, adjectives, adverbs)
-            important_tags = ['NN', 'NNS', 'NNP', 'NNPS', 'VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ', 'JJ', 'JJR', 'JJS',
-                              'RB', 'RBR', 'RBS']
-            content_words = [word.lower() for word, tag in tagged if
-                             tag in important_tags and word.lower() not in self.stopwords]
+            entities = (analysis or self.analyze(text)).entities
+        except Exception as e:
+            print(f"Error extracting entities: {e}")
+            entities = {}
+        # Copies, so callers can't change the cached analysis
+        return {entity_type: list(entities.get(entity_type, [])) for entity_type in ENTITY_TYPES}
 
-            # Count frequency
-            word_freq = Counter(content_words)
+    def keyword_counts(self, text):
+        """Counter of the content words of the lower-cased text."""
+        tagged = self.nlp.pos_tag(self.nlp.word_tokenize(text.lower()))
+        return Counter(word.lower() for word, tag in tagged
+                       if tag in KEYWORD_TAGS and word.lower() not in self.stopwords)
 
+    def extract_keywords(self, text):
+        """Extract important keywords from text."""
+        try:
             # Return top 10 keywords
-            return [word for word, _ in word_freq.most_common(10)]
+            return [word for word, _ in self.keyword_counts(text).most_common(10)]
         except Exception as e:
             print(f"Error extracting keywords: {e}")
             return []
 
-    def find_relevant_sentences(self, question, note_content):
+    def find_relevant_sentences(self, question, note_content, question_keywords=None, analysis=None):
         """Find sentences in the note that are relevant to the question."""
         try:
             # Extract question keywords
-            question_keywords = self.extract_keywords(question)
+            if question_keywords is None:
+                question_keywords = self.extract_keywords(question)
 
-            # Split note into sentences
-            sentences = sent_tokenize(note_content)
-
-            # Score sentences based on keyword overlap
-            scored_sentences = []
-            for sentence in sentences:
-                score = sum(1 for keyword in question_keywords if keyword in sentence.lower())
-                if score > 0:
-                    scored_sentences.append((sentence, score))
-
-            # Sort by relevance score
-            scored_sentences.sort(key=lambda x: x[1], reverse=True)
+            # Rank the note's sentences by BM25 over stemmed keywords
+            analysis = analysis or self.analyze(note_content)
+            ranked = self.sentence_index(analysis).search(normalize(question_keywords), limit=3)
 
             # Return top relevant sentences
-            return [sentence for sentence, score in scored_sentences[:3]]
+            return [analysis.sentences[number] for number, score in ranked]
         except Exception as e:
             print(f"Error finding relevant sentences: {e}")
             return []
 
+    def sentence_index(self, analysis):
+        """The BM25 index of an analysed note's sentences, built on first use and kept with the analysis."""
+        if analysis.sentence_index is None:
+            analysis.sentence_index = SentenceIndex([normalize(tokens, self.stopwords) for tokens in analysis.tokens])
+        return analysis.sentence_index
+
     def determine_question_type(self, question):
         """Determine the type of question being asked."""
         question_lower = question.lower()
-        tokens = word_tokenize(question_lower)
+        tokens = self.nlp.word_tokenize(question_lower)
 
         # Check for question words
         for token in tokens:
@@ -129,23 +148,28 @@ class EnhancedNotAI:
         # Default question type if no match
         return 'general'
 
-    def answer_question(self, question, note_content):
+    def forget_note(self, note_id, note_content=None):
+        """Drop a note's cached analyses once it is edited (keeping that of `note_content`) or deleted."""
+        keep = analysis_key(note_content, available_resources()) if note_content is not None else None
+        self.analysis_cache.forget_note(note_id, keep)
+
+    def answer_question(self, question, note_content, note_id=None):
         """Answer a question based on the note content with improved comprehension."""
         if not question or not note_content:
             return "I need both a question and note content to provide an answer."
 
         try:
-            # Extract question type
+            # Extract question type and keywords; this is all that is parsed per question
             question_type = self.determine_question_type(question)
+            question_keywords = self.extract_keywords(question)
 
-            # Find relevant sentences in the note
-            relevant_sentences = self.find_relevant_sentences(question, note_content)
-
-            # Extract entities from the note content
-            entities = self.extract_entities(note_content)
+            # Everything about the note comes from one (usually cached) analysis
+            analysis = self.analyze(note_content, note_id)
+            sentences = analysis.sentences
 
-            # Extract keywords from question
-            question_keywords = self.extract_keywords(question)
+            # Find relevant sentences in the note
+            relevant_sentences = self.find_relevant_sentences(question, note_content, question_keywords, analysis)
+            entities = self.extract_entities(note_content, analysis)
 
             # If no relevant sentences found
             if not relevant_sentences:
@@ -154,7 +178,7 @@ class EnhancedNotAI:
             # Generate response based on question type and relevant content
             if question_type == 'person':
                 if entities['PERSON']:
-                    people_context = self.find_context_for_entities(entities['PERSON'], note_content)
+                    people_context = self.find_context_for_entities(entities['PERSON'], note_content, analysis)
                     return f"Based on your note, {','.join(entities['PERSON'])} {'are' if len(entities['PERSON']) > 1 else 'is'} mentioned. {people_context}"
                 else:
                     return "I couldn't find any specific people mentioned in your note."
@@ -162,7 +186,7 @@ class EnhancedNotAI:
             elif question_type == 'location':
                 locations = entities['GPE'] + entities['LOCATION']
                 if locations:
-                    location_context = self.find_context_for_entities(locations, note_content)
+                    location_context = self.find_context_for_entities(locations, note_content, analysis)
                     return f"The note mentions these locations: {', '.join(locations)}. {location_context}"
                 else:
                     return "I couldn't find any specific locations in your note."
@@ -175,7 +199,7 @@ class EnhancedNotAI:
                     # Look for time-related words
                     time_words = ['today', 'yesterday', 'tomorrow', 'morning', 'afternoon', 'evening', 'night', 'month',
                                   'year', 'week', 'day']
-                    time_contexts = [sent for sent in sent_tokenize(note_content) if
+                    time_contexts = [sent for sent in sentences if
                                      any(word in sent.lower() for word in time_words)]
                     if time_contexts:
                         return f"Your note includes these time references: {' '.join(time_contexts[:2])}"
@@ -183,7 +207,7 @@ class EnhancedNotAI:
 
             elif question_type == 'reason':
                 reason_indicators = ['because', 'since', 'as', 'due to', 'result of', 'reason', 'why']
-                reason_sentences = [sent for sent in sent_tokenize(note_content) if
+                reason_sentences = [sent for sent in sentences if
                                     any(indicator in sent.lower() for indicator in reason_indicators)]
                 if reason_sentences:
                     return f"The reason mentioned in your note appears to be: {reason_sentences[0]}"
@@ -192,7 +216,7 @@ class EnhancedNotAI:
 
             elif question_type == 'method':
                 method_indicators = ['how', 'steps', 'process', 'procedure', 'way', 'method']
-                method_sentences = [sent for sent in sent_tokenize(note_content) if
+                method_sentences = [sent for sent in sentences if
                                     any(indicator in sent.lower() for indicator in method_indicators)]
                 if method_sentences:
                     return f"Here's the method described in your note: {' '.join(method_sentences[:2])}"
@@ -202,7 +226,7 @@ class EnhancedNotAI:
             elif question_type == 'definition':
                 definition_patterns = [r"is a", r"refers to", r"defined as", r"means", r"is an"]
                 definition_sentences = []
-                for sent in sent_tokenize(note_content):
+                for sent in sentences:
                     if any(re.search(pattern, sent.lower()) for pattern in definition_patterns):
                         definition_sentences.append(sent)
 
@@ -219,10 +243,10 @@ class EnhancedNotAI:
             print(f"Error answering question: {e}")
             return "I encountered an error while processing your question. Please try asking in a different way."
 
-    def find_context_for_entities(self, entities, note_content):
+    def find_context_for_entities(self, entities, note_content, analysis=None):
         """Find context sentences for entities."""
         context = []
-        sentences = sent_tokenize(note_content)
+        sentences = (analysis or self.analyze(note_content)).sentences
 
         for entity in entities[:2]:  # Limit to first 2 entities
             for sentence in sentences:
@@ -234,14 +258,16 @@ class EnhancedNotAI:
             return " " + " ".join(context[:2])  # Limit context
         return ""
 
-    def extract_main_topics(self, note_content):
+    def extract_main_topics(self, note_content, analysis=None):
         """Extract the main topics from the note content."""
         try:
+            analysis = analysis or self.analyze(note_content)
+
             # Get keywords
-            keywords = self.extract_keywords(note_content)
+            keywords = [word for word, _ in analysis.keyword_counts.most_common(10)]
 
             # Extract entities
-            entities = self.extract_entities(note_content)
+            entities = self.extract_entities(note_content, analysis)
             all_entities = []
             for entity_type, entity_list in entities.items():
                 all_entities.extend(entity_list)
@@ -258,11 +284,13 @@ class EnhancedNotAI:
     def summarize_content(self, note_content):
         """Generate a brief summary of the note content."""
         try:
+            analysis = self.analyze(note_content)
+
             # Get the main topics
-            main_topics = self.extract_main_topics(note_content)
+            main_topics = self.extract_main_topics(note_content, analysis)
 
             # Get the most important sentences
-            sentences = sent_tokenize(note_content)
+            sentences = analysis.sentences
             important_sentences = []
 
             if sentences:
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+ANALYSIS_VERSION = 2  # Bump when NoteAnalysis changes; older persisted rows are then ignored
+ANALYSIS_DB = "NoteAnalysis.db"
+MAX_PERSISTED = 1000  # Rows kept in the SQLite file, least recently used dropped first
+
+
+def content_hash(text):
+    """Hex digest identifying a note's content."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def analysis_key(text, resources):
+    """Cache key of a note's analysis: its content and the NLTK resources it was made with.
+
+    An analysis missing a step (e.g. entities without the chunker) is cached
+    like any other, and is no longer found once the missing model appears.
+    """
+    return content_hash(" ".join([content_hash(text), *sorted(resources)]))
+
+
+class NoteAnalysis:
+    """NLP results for one note's content, computed once and reused by every question about it.
+
+    `tokens` and `pos_tags` are per sentence; `keyword_counts` counts the
+    content words of the whole lower-cased note, as extract_keywords() does.
+    """
+
+    def __init__(self, sentences, tokens, pos_tags, entities, keyword_counts):
+        self.sentences = sentences
+        self.tokens = tokens
+        self.pos_tags = pos_tags
+        self.entities = entities  # {entity type: [entity text]}
+        self.keyword_counts = keyword_counts
+        self.sentence_index = None  # Built from `tokens` when first searched; not persisted
+
+    def to_dict(self):
+        return {
+            'sentences': self.sentences,
+            'tokens': self.tokens,
+            'pos_tags': self.pos_tags,
+            'entities': self.entities,
+            'keyword_counts': list(self.keyword_counts.items()),  # Pairs keep most_common()'s tie order
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['sentences'],
+            data['tokens'],
+            [[tuple(pair) for pair in tags] for tags in data['pos_tags']],
+            data['entities'],
+            Counter(dict(data['keyword_counts'])),
+        )
+
+
+class NoteAnalysisCache:
+    """Bounded LRU of NoteAnalysis by analysis_key(), optionally persisted to an SQLite file.
+
+    With a `db_path`, misses in memory are looked up in the file and analyses
+    of saved notes (put() with a note_id) are written to it, so notes analysed
+    in an earlier session are not parsed again. forget_note() drops a note's
+    analyses when it is edited or deleted, so the file keeps no old note text.
+    """
+
+    def __init__(self, max_entries=32, db_path=None, max_persisted=MAX_PERSISTED):
+        self.max_entries = max_entries
+        self.max_persisted = max_persisted
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # analysis_key() -> NoteAnalysis
+        self._note_ids = {}  # analysis_key() -> id of the note it was put() for
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                columns = {row[1] for row in self._db.execute("PRAGMA table_info(note_analysis)")}
+                if columns and "note_id" not in columns:
+                    self._db.execute("DROP TABLE note_analysis")  # Written before rows knew their note
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS note_analysis (
+                        analysis_key TEXT PRIMARY KEY,
+                        note_id INTEGER NOT NULL,
+                        version INTEGER NOT NULL,
+                        analysis TEXT NOT NULL,
+                        used_at REAL NOT NULL
+                    )
+                """)
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_note_analysis_note ON note_analysis(note_id)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Note analysis cache not persisted: {e}")
+                self._db = None
+
+    def get(self, key):
+        """The cached analysis for an analysis_key(), or None."""
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is None:
+                analysis = self._load(key)
+                if analysis is not None:
+                    self._remember(key, analysis)
+            else:
+                self._entries.move_to_end(key)
+            if analysis is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return analysis
+
+    def put(self, key, analysis, note_id=None):
+        """Cache an analysis; only those of a saved note (`note_id`) are persisted."""
+        with self._lock:
+            self._remember(key, analysis)
+            self._note_ids.pop(key, None)
+            if note_id is not None:
+                self._note_ids[key] = note_id
+                self._store(key, analysis, note_id)
+
+    def forget_note(self, note_id, keep=None):
+        """Drop the analyses put() for a note, except the one under analysis_key() `keep`."""
+        with self._lock:
+            for key in [key for key, owner in self._note_ids.items() if owner == note_id and key != keep]:
+                del self._note_ids[key]
+                self._entries.pop(key, None)
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM note_analysis WHERE note_id = ? AND analysis_key IS NOT ?",
+                                         (note_id, keep))
+                except sqlite3.Error as e:
+                    print(f"Error purging note analysis cache: {e}")
+
+    def clear(self):
+        """Drop every entry, in memory and on disk, and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._note_ids.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM note_analysis")
+                except sqlite3.Error as e:
+                    print(f"Error clearing note analysis cache: {e}")
+
+    def stats(self):
+        """Hit/miss counters and the current number of entries in memory."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, analysis):
+        self._entries[key] = analysis
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._note_ids.pop(evicted, None)
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT analysis, note_id FROM note_analysis WHERE analysis_key = ? AND version = ?",
+                (key, ANALYSIS_VERSION),
+            ).fetchone()
+            if row is None:
+                return None
+            with self._db:
+                self._db.execute("UPDATE note_analysis SET used_at = ? WHERE analysis_key = ?", (time.time(), key))
+            self._note_ids[key] = row[1]
+            return NoteAnalysis.from_dict(json.loads(row[0]))
+        except (sqlite3.Error, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading note analysis cache: {e}")
+            return None
+
+    def _store(self, key, analysis, note_id):
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO note_analysis (analysis_key, note_id, version, analysis, used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, note_id, ANALYSIS_VERSION, json.dumps(analysis.to_dict()), time.time()),
+                )
+                self._db.execute("""
+                    DELETE FROM note_analysis WHERE analysis_key NOT IN (
+                        SELECT analysis_key FROM note_analysis ORDER BY used_at DESC LIMIT ?
+                    )
+                """, (self.max_persisted,))
+        except sqlite3.Error as e:
+            print(f"Error writing note analysis cache: {e}")
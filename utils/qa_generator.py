@@ -1,8 +1,5 @@
-import nltk
-from nltk import sent_tokenize, word_tokenize
-from nltk import pos_tag, ne_chunk
 from nltk.tree import Tree
-from nltk.corpus import wordnet, stopwords
+from utils.nlp_service import NLPService
 import random
 import sys
 import re
@@ -13,19 +10,16 @@ class EnhancedQAGenerator:
     """An enhanced question-answer generator using NLTK with multiple question types."""
     
     def __init__(self):
-        # Download necessary NLTK resources
-        nltk.download('punkt', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-        nltk.download('maxent_ne_chunker', quiet=True)
-        nltk.download('words', quiet=True)
-        nltk.download('wordnet', quiet=True)
-        nltk.download('stopwords', quiet=True)
+        # Shared NLTK models; loaded on first use, so a new generator costs nothing
+        self.nlp = NLPService()
 
-        self.stopwords = set(stopwords.words('english'))
+    @property
+    def stopwords(self):
+        return self.nlp.stopwords
 
     def extract_entities(self, sentence):
         """Extract named entities from a sentence."""
-        chunks = ne_chunk(pos_tag(word_tokenize(sentence)))
+        chunks = self.nlp.ne_chunk(self.nlp.pos_tag(self.nlp.word_tokenize(sentence)))
         entities = []
 
         for chunk in chunks:
@@ -149,8 +143,8 @@ class EnhancedQAGenerator:
 
     def generate_true_false_question(self, sentence):
         """Generate a true/false question by modifying the original sentence."""
-        words = word_tokenize(sentence)
-        pos_tags = pos_tag(words)
+        words = self.nlp.word_tokenize(sentence)
+        pos_tags = self.nlp.pos_tag(words)
 
         # Find verbs to negate or nouns to replace
         verbs = [(i, word) for i, (word, tag) in enumerate(pos_tags) if tag.startswith('VB')]
@@ -195,8 +189,9 @@ class EnhancedQAGenerator:
             noun_idx, noun = random.choice(nouns)
             similar_nouns = []
 
-            # Find similar but different nouns using WordNet
-            for synset in wordnet.synsets(noun, pos=wordnet.NOUN):
+            # Find similar but different nouns using WordNet (when it is installed)
+            wordnet = self.nlp.wordnet
+            for synset in wordnet.synsets(noun, pos=wordnet.NOUN) if wordnet else ():
                 for hypernym in synset.hypernyms():
                     for hyponym in hypernym.hyponyms():
                         if hyponym.name().split('.')[0] != noun and hyponym.name().split('.')[0] not in similar_nouns:
@@ -254,7 +249,7 @@ class EnhancedQAGenerator:
 
             print("Starting enhanced text processing...")
             # Tokenize the text into sentences
-            sentences = sent_tokenize(text)
+            sentences = self.nlp.sent_tokenize(text)
             all_qa_pairs = []
 
             for sentence in sentences:
@@ -263,8 +258,8 @@ class EnhancedQAGenerator:
                     continue
 
                 # Tokenize and tag the sentence
-                words = word_tokenize(sentence)
-                pos_tags = pos_tag(words)
+                words = self.nlp.word_tokenize(sentence)
+                pos_tags = self.nlp.pos_tag(words)
                 entities = self.extract_entities(sentence)
 
                 # Apply different question generation techniques
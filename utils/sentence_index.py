@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+import numpy as np
+from nltk.stem import PorterStemmer
+
+# BM25 parameters: term-frequency saturation and sentence-length normalisation
+K1 = 1.5
+B = 0.75
+
+_stemmer = PorterStemmer()
+
+
+@lru_cache(maxsize=1 << 16)
+def stem(word):
+    return _stemmer.stem(word)
+
+
+def normalize(tokens, stopwords=frozenset()):
+    """Index terms of a token list: lower-cased Porter stems, without punctuation or stopwords."""
+    terms = []
+    for token in tokens:
+        word = token.lower()
+        if word not in stopwords and any(ch.isalnum() for ch in word):
+            terms.append(stem(word))
+    return terms
+
+
+class SentenceIndex:
+    """BM25 inverted index over the sentences of one note.
+
+    Postings are CSR-style arrays: the postings of term i are
+    sentences[indptr[i]:indptr[i + 1]], with weights holding each posting's
+    BM25 term-frequency part, so a search only reads the postings of the
+    query's terms and never scans the note.
+    """
+
+    def __init__(self, sentence_terms, k1=K1, b=B):
+        self.size = len(sentence_terms)
+        postings = {}  # term -> {sentence: term frequency}
+        for sentence, terms in enumerate(sentence_terms):
+            for term in terms:
+                frequencies = postings.setdefault(term, {})
+                frequencies[sentence] = frequencies.get(sentence, 0) + 1
+
+        self.terms = {term: i for i, term in enumerate(postings)}
+        counts = [len(frequencies) for frequencies in postings.values()]
+        self.indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+        total = int(self.indptr[-1])
+        self.sentences = np.fromiter((s for frequencies in postings.values() for s in frequencies),
+                                     dtype=np.int32, count=total)
+        tf = np.fromiter((n for frequencies in postings.values() for n in frequencies.values()),
+                         dtype=np.float64, count=total)
+
+        lengths = np.array([len(terms) for terms in sentence_terms], dtype=np.float64)
+        average = float(lengths.mean()) if lengths.any() else 1.0
+        self.weights = tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[self.sentences] / average))
+        df = np.asarray(counts, dtype=np.float64)
+        self.idf = np.log1p((self.size - df + 0.5) / (df + 0.5))
+
+    def search(self, query_terms, limit=3):
+        """[(sentence number, score)] of the best sentences containing a query term, best first.
+
+        Equal scores keep the note's order.
+        """
+        term_ids = [self.terms[term] for term in dict.fromkeys(query_terms) if term in self.terms]
+        if not term_ids:
+            return []
+        spans = [slice(self.indptr[i], self.indptr[i + 1]) for i in term_ids]
+        sentences = np.concatenate([self.sentences[span] for span in spans])
+        scores = np.concatenate([self.idf[i] * self.weights[span] for i, span in zip(term_ids, spans)])
+        matched, positions = np.unique(sentences, return_inverse=True)
+        totals = np.bincount(positions, weights=scores)
+        order = np.lexsort((matched, -totals))[:limit]
+        return [(int(matched[i]), float(totals[i])) for i in order]